@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DOCX 合并方式性能对比
+对比流式合并、基础合并（移动元素）、旧版基础合并（深拷贝）和 docxcompose 的耗时、峰值内存与内容完整性
+"""
+
+import argparse
+import glob
+import io
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+import zipfile
+from copy import deepcopy
+from pathlib import Path
+
+from docx import Document  # pyright: ignore[reportMissingImports]
+
+
+def _legacy_merge_basic(docx_files, output_path):
+    """旧版基础合并：逐个深拷贝正文元素，不处理图片和超链接关系（仅用于对比）"""
+    merged_doc = Document(docx_files[0])
+    for docx_file in docx_files[1:]:
+        doc = Document(docx_file)
+        merged_doc.add_page_break()
+        for element in doc.element.body:
+            merged_doc.element.body.append(deepcopy(element))
+    merged_doc.save(output_path)
+    return True
+
+
+def _engines():
+    from organize_output import _merge_docx_basic, _merge_docx_compose
+    from docx_merge import stream_merge_docx
+
+    engines = {
+        'stream': stream_merge_docx,
+        'basic': _merge_docx_basic,
+        'legacy_basic': _legacy_merge_basic,
+    }
+    try:
+        import docxcompose  # noqa: F401  # pyright: ignore[reportMissingImports]
+        engines['docxcompose'] = _merge_docx_compose
+    except ImportError:
+        pass
+    return engines
+
+
+def _peak_rss_kb() -> int:
+    """当前进程的峰值内存（KB）。Linux 读取 VmHWM（ru_maxrss 会继承父进程的值）"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _run_engine(name, docx_files, output_path, queue):
+    """在子进程中运行，峰值内存（含导入开销）不受其他合并方式影响"""
+    engine = _engines()[name]
+    t0 = time.perf_counter()
+    engine(docx_files, output_path)
+    elapsed = time.perf_counter() - t0
+    queue.put((elapsed, _peak_rss_kb()))
+
+
+def inspect_docx(docx_path):
+    """统计合并结果：段落数、表格数、图片引用数、图片文件数、超链接数、文件大小"""
+    doc = Document(str(docx_path))
+    body = doc.element.body
+    with zipfile.ZipFile(str(docx_path)) as z:
+        media = sum(1 for n in z.namelist() if '/media/' in n)
+    return {
+        'paragraphs': len(doc.paragraphs),
+        'tables': len(doc.tables),
+        'images': len(body.xpath('.//a:blip')),
+        'media': media,
+        'broken': sum(1 for rid in body.xpath('.//a:blip/@r:embed') if rid not in doc.part.rels),
+        'hyperlinks': len(body.xpath('.//w:hyperlink')),
+        'size_kb': Path(docx_path).stat().st_size / 1024
+    }
+
+
+def make_synthetic_pages(output_dir, pages):
+    """
+    生成模拟 PaddleOCR 分页输出的 DOCX：每页包含标题、重复的 logo、每页不同的图片、
+    编号列表、超链接和表格
+    """
+    import fitz  # pyright: ignore[reportMissingImports]
+    from docx.shared import Inches
+    from docx.oxml import OxmlElement
+    from docx.oxml.ns import qn
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+
+    def png(color):
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 64, 64), False)
+        pix.set_rect(pix.irect, color)
+        return io.BytesIO(pix.tobytes('png'))
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    files = []
+    for i in range(pages):
+        doc = Document()
+        doc.add_heading(f'第 {i + 1} 页', 1)
+        doc.add_picture(png((200, 0, 0)), width=Inches(0.5))
+        doc.add_picture(png((i % 256, 100, 50)), width=Inches(0.5))
+        for k in range(3):
+            doc.add_paragraph(f'条款 {k + 1}', style='List Number')
+        para = doc.add_paragraph('链接: ')
+        link = OxmlElement('w:hyperlink')
+        link.set(qn('r:id'), para.part.relate_to(f'https://example.com/{i % 3}', RT.HYPERLINK, is_external=True))
+        run = OxmlElement('w:r')
+        text = OxmlElement('w:t')
+        text.text = '网址'
+        run.append(text)
+        link.append(run)
+        para._p.append(link)
+        table = doc.add_table(rows=3, cols=3)
+        for r in range(3):
+            for c in range(3):
+                table.cell(r, c).text = f'{i}-{r}-{c}'
+        doc.add_paragraph('正文内容 ' * 40)
+        path = output_dir / f'page_{i}.docx'
+        doc.save(str(path))
+        files.append(path)
+    return files
+
+
+def _page_files(directory):
+    """按页码排序目录中的分页 DOCX（page_N.docx 或 文件名_N.docx）"""
+    files = []
+    for path in glob.glob(str(Path(directory) / '*.docx')):
+        suffix = Path(path).stem.rsplit('_', 1)[-1]
+        if suffix.isdigit():
+            files.append((int(suffix), path))
+    return [p for _, p in sorted(files)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DOCX 合并方式性能对比')
+    parser.add_argument('pages_dir', nargs='?',
+                        help='分页 DOCX 目录（如 output/文件名/pages），不提供时使用 --synthetic 生成')
+    parser.add_argument('--synthetic', type=int, default=100, metavar='N',
+                        help='未提供目录时生成 N 页模拟文档（默认: 100）')
+    parser.add_argument('--engines', nargs='+', help='只运行指定的合并方式')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='merge_bench_') as tmp:
+        if args.pages_dir:
+            docx_files = _page_files(args.pages_dir)
+        else:
+            print(f"生成 {args.synthetic} 页模拟文档...")
+            docx_files = [str(p) for p in make_synthetic_pages(Path(tmp) / 'pages', args.synthetic)]
+        if not docx_files:
+            print("未找到分页 DOCX")
+            sys.exit(1)
+
+        names = args.engines or list(_engines())
+        print(f"页数: {len(docx_files)}\n")
+        print(f"{'方式':<14} {'耗时(s)':>8} {'峰值内存(MB)':>12} {'段落':>6} {'表格':>6} "
+              f"{'图片引用':>8} {'图片文件':>8} {'失效图片':>8} {'超链接':>6} {'大小(KB)':>9}")
+        print("-" * 100)
+
+        ctx = multiprocessing.get_context('spawn')
+        for name in names:
+            output = Path(tmp) / f'{name}.docx'
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_engine, args=(name, docx_files, str(output), queue))
+            proc.start()
+            proc.join()
+            if proc.exitcode != 0 or queue.empty():
+                print(f"{name:<14} 失败")
+                continue
+            elapsed, peak_kb = queue.get()
+            stats = inspect_docx(output)
+            print(f"{name:<14} {elapsed:>8.2f} {peak_kb / 1024:>12.1f} {stats['paragraphs']:>6} {stats['tables']:>6} "
+                  f"{stats['images']:>8} {stats['media']:>8} {stats['broken']:>8} {stats['hyperlinks']:>6} "
+                  f"{stats['size_kb']:>9.1f}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, str(Path(__file__).parent))
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+输出目录扫描性能对比
+对比旧版多次 glob 扫描与 os.scandir 单次索引在批量检测 + 文件分类上的耗时
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+# 每页生成的文件（与 PaddleOCR 输出命名一致）
+_PAGE_FILES = (
+    "{base}_{i}.docx",
+    "{base}_{i}.md",
+    "{base}_{i}_res.json",
+    "{base}_{i}_layout_det_res.png",
+    "{base}_{i}_overall_ocr_res.png",
+    "{base}_{i}_formula.tex",
+)
+
+
+def make_synthetic_tree(root: Path, total_files: int, dirs: int):
+    """生成 dirs 个输出目录，共约 total_files 个空文件"""
+    pages_per_dir = max(1, total_files // (dirs * len(_PAGE_FILES)))
+    for d in range(dirs):
+        base = f"doc{d:04d}"
+        out = root / base
+        (out / "imgs").mkdir(parents=True)
+        for i in range(pages_per_dir):
+            for pattern in _PAGE_FILES:
+                (out / pattern.format(base=base, i=i)).touch()
+    return dirs * pages_per_dir * len(_PAGE_FILES)
+
+
+def _legacy_classify(output_path: Path):
+    """旧版：对同一目录分别 glob 分页 docx、md、png、json、tex 和 imgs"""
+    base_name = output_path.name
+    docx_files, md_files = [], []
+    for file in sorted(output_path.glob(f"{base_name}_*.docx")):
+        page_num = file.stem.split('_')[-1]
+        if page_num.isdigit():
+            docx_files.append((int(page_num), file))
+    for file in sorted(output_path.glob(f"{base_name}_*.md")):
+        page_num = file.stem.split('_')[-1]
+        if page_num.isdigit():
+            md_files.append((int(page_num), file))
+    images = [f for f in output_path.glob("*.png") if f.is_file()]
+    json_files = [f for f in output_path.glob("*.json") if f.is_file()]
+    tex_files = [f for f in output_path.glob("*.tex") if f.is_file()]
+    has_imgs = (output_path / "imgs").exists()
+    return len(docx_files) + len(md_files) + len(images) + len(json_files) + len(tex_files) + has_imgs
+
+
+def legacy_scan(base_dir: Path):
+    """旧版批量检测（iterdir + glob）后再逐个目录分类"""
+    found = []
+    for item in base_dir.iterdir():
+        if item.is_dir():
+            docx_files = list(item.glob("*_*.docx"))
+            final_dir = item / "final"
+            if docx_files and (not final_dir.exists() or not list(final_dir.glob("*.docx"))):
+                found.append(item)
+    return sum(_legacy_classify(item) for item in found)
+
+
+def index_scan(base_dir: Path):
+    """新版：每个目录一次 os.scandir，检测和分类共用索引"""
+    from organize_output import _OutputIndex
+
+    total = 0
+    with os.scandir(base_dir) as it:
+        for entry in it:
+            if entry.is_dir():
+                index = _OutputIndex(entry.path)
+                if index.needs_organize():
+                    total += (len(index.docx_pages) + len(index.md_pages) + len(index.images)
+                              + len(index.json_files) + len(index.tex_files) + index.has_imgs)
+    return total
+
+
+def _time(func, base_dir, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(base_dir)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='输出目录扫描性能对比')
+    parser.add_argument('base_dir', nargs='?', help='包含多个输出目录的根目录（不提供则生成模拟目录）')
+    parser.add_argument('--files', type=int, default=50000,
+                        help='模拟目录的文件总数（默认: 50000）')
+    parser.add_argument('--dirs', type=int, default=100,
+                        help='模拟输出目录数（默认: 100）')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='每种方式重复次数，取最短耗时（默认: 3）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='organize_scan_bench_') as tmp:
+        if args.base_dir:
+            base_dir = Path(args.base_dir)
+        else:
+            base_dir = Path(tmp)
+            print(f"生成模拟目录: {args.dirs} 个输出目录...")
+            count = make_synthetic_tree(base_dir, args.files, args.dirs)
+            print(f"文件数: {count}\n")
+
+        print(f"{'方式':<10} {'耗时(s)':>8} {'分类文件数':>10}")
+        print("-" * 32)
+        for name, func in (('glob', legacy_scan), ('scandir', index_scan)):
+            elapsed, result = _time(func, base_dir, args.repeat)
+            print(f"{name:<10} {elapsed:>8.3f} {result:>10}")
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, str(Path(__file__).parent))
+    main()
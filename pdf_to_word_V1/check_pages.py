@@ -4,35 +4,144 @@
 检查 Word 文档的页数和内容
 """
 
-from docx import Document
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-import sys
 
 
-def count_docx_content(docx_path):
-    """统计 Word 文档的内容"""
-    doc = Document(docx_path)
-    
-    paragraphs = len(doc.paragraphs)
-    tables = len(doc.tables)
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_R_EMBED = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed'
+_BLIP = '{http://schemas.openxmlformats.org/drawingml/2006/main}blip'
+_IMAGEDATA = '{urn:schemas-microsoft-com:vml}imagedata'
+
+# 与 python-docx Run.text 一致的文本元素
+_RUN_TEXT = {
+    _W + 't': None,
+    _W + 'tab': '\t',
+    _W + 'ptab': '\t',
+    _W + 'cr': '\n',
+    _W + 'noBreakHyphen': '-',
+}
+
+
+class _TextLength:
+    """增量计算 len('\n'.join(段落文本).strip())，不保存全文"""
     
-    # 统计文本内容
-    text_content = '\n'.join([p.text for p in doc.paragraphs])
-    text_length = len(text_content.strip())
+    def __init__(self):
+        self.length = 0
+        self.pending = 0        # 末尾空白字符数（后面出现非空白时才计入）
+        self.started = False
     
-    # 统计分页符
-    page_breaks = sum(1 for para in doc.paragraphs if para.text == '' and hasattr(para, '_element') and 'page-break' in str(para._element.xml))
+    def feed(self, text):
+        if not self.started:
+            text = text.lstrip()
+            if not text:
+                return
+            self.started = True
+        body = text.rstrip()
+        if body:
+            self.length += self.pending + len(body)
+            self.pending = len(text) - len(body)
+        else:
+            self.pending += len(text)
+
+
+def count_docx_content(docx_path):
+    """
+    统计 Word 文档的内容
     
-    return {
-        'paragraphs': paragraphs,
-        'tables': tables,
-        'text_length': text_length,
-        'page_breaks': page_breaks
+    用 iterparse 单次流式读取 word/document.xml，不加载整个文档：
+    段落、表格（正文顶层）、文本长度（与 python-docx 段落文本一致）、
+    显式分页符（w:br type=page 和 pageBreakBefore）、分节符和图片。
+    """
+    stats = {
+        'paragraphs': 0,
+        'tables': 0,
+        'text_length': 0,
+        'page_breaks': 0,
+        'section_breaks': 0,
+        'images': 0,
     }
+    text = _TextLength()
+    stack = []      # 当前元素路径上的标签
+    
+    with zipfile.ZipFile(docx_path) as z, z.open('word/document.xml') as f:
+        for event, elem in ET.iterparse(f, events=('start', 'end')):
+            tag = elem.tag
+            if event == 'start':
+                stack.append(tag)
+                if len(stack) == 3:
+                    if tag == _W + 'p':
+                        if stats['paragraphs']:
+                            text.feed('\n')
+                        stats['paragraphs'] += 1
+                    elif tag == _W + 'tbl':
+                        stats['tables'] += 1
+                continue
+            
+            stack.pop()
+            depth = len(stack)
+            if tag == _W + 'br':
+                br_type = elem.get(_W + 'type')
+                if br_type == 'page':
+                    stats['page_breaks'] += 1
+                elif br_type in (None, 'textWrapping') and _in_paragraph_run(stack):
+                    text.feed('\n')
+            elif tag in _RUN_TEXT:
+                if _in_paragraph_run(stack):
+                    value = _RUN_TEXT[tag]
+                    text.feed((elem.text or '') if value is None else value)
+            elif tag == _W + 'pageBreakBefore':
+                if elem.get(_W + 'val') not in ('0', 'false', 'off'):
+                    stats['page_breaks'] += 1
+            elif tag == _W + 'sectPr':
+                # 文档末尾的 sectPr 是最后一节本身，段落属性中的才是分节符
+                if depth > 2:
+                    stats['section_breaks'] += 1
+            elif tag == _BLIP:
+                if elem.get(_R_EMBED):
+                    stats['images'] += 1
+            elif tag == _IMAGEDATA:
+                stats['images'] += 1
+            
+            # 正文块处理完即释放
+            if depth == 2:
+                elem.clear()
+    
+    stats['text_length'] = text.length
+    return stats
+
+
+def _in_paragraph_run(stack):
+    """父元素是正文顶层段落中的 run（直接子元素或超链接中的 run）"""
+    n = len(stack)
+    if n == 4:
+        return stack[3] == _W + 'r' and stack[2] == _W + 'p'
+    if n == 5:
+        return stack[4] == _W + 'r' and stack[3] == _W + 'hyperlink' and stack[2] == _W + 'p'
+    return False
 
 
-def compare_docx_files(docx_dir):
-    """对比目录中的多个 Word 文档"""
+def _inspect_file(docx_file):
+    """工作进程入口，返回 (文件, 统计结果, 错误信息)"""
+    try:
+        stats = count_docx_content(docx_file)
+        stats['size'] = docx_file.stat().st_size / 1024
+        return docx_file, stats, None
+    except Exception as e:
+        return docx_file, None, str(e)
+
+
+def compare_docx_files(docx_dir, workers=0):
+    """
+    对比目录中的多个 Word 文档
+    
+    Args:
+        docx_dir: 文档目录
+        workers: 并行进程数（<= 0 则使用 CPU 核数，1 为逐个统计）
+    """
     dir_path = Path(docx_dir)
     
     if not dir_path.exists():
@@ -50,29 +159,37 @@ def compare_docx_files(docx_dir):
     print("=" * 80)
     print()
     
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(docx_files))
+    
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            inspected = list(executor.map(_inspect_file, docx_files, chunksize=16))
+    else:
+        inspected = [_inspect_file(f) for f in docx_files]
+    
     results = []
-    for docx_file in docx_files:
-        try:
-            stats = count_docx_content(docx_file)
-            file_size = docx_file.stat().st_size / 1024
-            
-            results.append({
-                'name': docx_file.name,
-                'size': file_size,
-                **stats
-            })
-        except Exception as e:
-            print(f"⚠️  {docx_file.name}: 无法读取 - {e}")
+    for docx_file, stats, error in inspected:
+        if error is not None:
+            print(f"⚠️  {docx_file.name}: 无法读取 - {error}")
+            continue
+        results.append({
+            'name': docx_file.name,
+            **stats
+        })
     
     if not results:
         return
     
     # 打印表格
-    print(f"{'文件名':<40} {'大小(KB)':<10} {'段落':<8} {'表格':<8} {'文本长度':<10}")
-    print("-" * 80)
+    print(f"{'文件名':<40} {'大小(KB)':<10} {'段落':<8} {'表格':<8} {'文本长度':<10} "
+          f"{'分页符':<6} {'分节符':<6} {'图片':<6}")
+    print("-" * 110)
     
     for r in results:
-        print(f"{r['name']:<40} {r['size']:>8.1f}  {r['paragraphs']:>6}   {r['tables']:>6}   {r['text_length']:>8}")
+        print(f"{r['name']:<40} {r['size']:>8.1f}  {r['paragraphs']:>6}   {r['tables']:>6}   {r['text_length']:>8}   "
+              f"{r['page_breaks']:>6} {r['section_breaks']:>6} {r['images']:>6}")
     
     print()
     print("=" * 80)
@@ -86,10 +203,12 @@ def compare_docx_files(docx_dir):
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("用法: python check_pages.py <docx目录>")
-        print("示例: python check_pages.py output/常规2/final")
-        sys.exit(1)
+    import argparse
     
-    compare_docx_files(sys.argv[1])
-
+    parser = argparse.ArgumentParser(description='检查 Word 文档的页数和内容')
+    parser.add_argument('docx_dir', help='Word 文档目录（示例: output/常规2/final）')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='并行进程数（0 表示使用 CPU 核数，默认: 0）')
+    args = parser.parse_args()
+    
+    compare_docx_files(args.docx_dir, workers=args.workers)
@@ -2,18 +2,24 @@
 # -*- coding: utf-8 -*-
 """
 PaddleOCR PDF 转 Word/Markdown 工具
-使用 paddleocr 命令行工具
+使用 PaddleOCR PP-StructureV3（批量转换时常驻模型，单文件调用命令行）
 """
 
 import os
 import sys
 import argparse
 import subprocess
+import time
 from pathlib import Path
 from typing import List
 import logging
+import yaml
 from tqdm import tqdm
 
+from ocr_batch import PageBatchEngine
+from ocr_worker import StructureWorker
+from results_log import ResultsLog, settings_hash
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -25,8 +31,80 @@ logger = logging.getLogger(__name__)
 CURRENT_DIR = Path(__file__).parent.absolute()
 
 
+def _resolve_output_dir(pdf_path: Path, output_dir: str = None) -> Path:
+    """返回单个 PDF 的输出目录（output/<文件名>）"""
+    if output_dir is None:
+        return CURRENT_DIR / 'output' / pdf_path.stem
+    return Path(output_dir) / pdf_path.stem
+
+
+def _run_cli(pdf_path: Path, output_dir: Path, use_gpu: bool, enable_table: bool, options: dict = None) -> str:
+    """
+    调用 paddleocr 命令行转换（每次都会重新启动解释器并加载模型）
+    
+    Returns:
+        错误信息，成功时返回 None
+    """
+    # 构建命令 (使用 PaddleOCR 3.x 的命令格式)
+    cmd = [
+        'paddleocr',
+        'pp_structurev3',  # 使用 PP-Structure V3
+        '--input', str(pdf_path.absolute()),
+        '--save_path', str(output_dir.absolute()),
+        '--device', 'gpu' if use_gpu else 'cpu',
+    ]
+    
+    # 表格识别选项
+    if enable_table:
+        cmd.extend(['--use_table_recognition', 'True'])
+    
+    for name, value in (options or {}).items():
+        cmd.extend([f'--{name}', str(value)])
+    
+    # 执行命令
+    result = subprocess.run(
+        cmd,
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+    
+    if result.returncode != 0:
+        return result.stderr or '转换失败'
+    return None
+
+
+def _collect_outputs(pdf_path: Path, output_dir: Path) -> dict:
+    """整理识别结果并返回最终文件"""
+    logger.info("正在整理输出文件...")
+    from organize_output import organize_output_directory
+    organize_output_directory(str(output_dir))
+    
+    # 查找最终文件
+    final_dir = output_dir / 'final'
+    outputs = {}
+    
+    final_docx = final_dir / f"{pdf_path.stem}.docx"
+    if final_docx.exists():
+        outputs['docx'] = str(final_docx)
+        logger.info(f"✓ Word 文档: {final_docx}")
+    
+    final_md = final_dir / f"{pdf_path.stem}.md"
+    if final_md.exists():
+        outputs['markdown'] = str(final_md)
+        logger.info(f"✓ Markdown 文档: {final_md}")
+    
+    return {
+        'status': 'success',
+        'input': str(pdf_path),
+        'outputs': outputs,
+        'output_dir': str(output_dir)
+    }
+
+
 def convert_pdf(pdf_path: str, output_dir: str = None, use_gpu: bool = False,
-               enable_table: bool = True) -> dict:
+               enable_table: bool = True, worker: StructureWorker = None, options: dict = None) -> dict:
     """
     转换单个 PDF 文件
     
@@ -35,6 +113,8 @@ def convert_pdf(pdf_path: str, output_dir: str = None, use_gpu: bool = False,
         output_dir: 输出目录
         use_gpu: 是否使用 GPU
         enable_table: 是否启用表格识别
+        worker: 常驻识别线程（None 时调用 paddleocr 命令行）
+        options: PP-StructureV3 参数（见 pipeline_options，仅命令行方式使用）
         
     Returns:
         转换结果字典
@@ -44,70 +124,25 @@ def convert_pdf(pdf_path: str, output_dir: str = None, use_gpu: bool = False,
         return {'status': 'failed', 'input': str(pdf_path), 'error': '文件不存在'}
     
     # 准备输出目录
-    if output_dir is None:
-        output_dir = CURRENT_DIR / 'output' / pdf_path.stem
-    else:
-        output_dir = Path(output_dir) / pdf_path.stem
-    
+    output_dir = _resolve_output_dir(pdf_path, output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
     logger.info(f"转换: {pdf_path.name} -> {output_dir}")
     
-    # 构建命令 (使用 PaddleOCR 3.x 的命令格式)
-    cmd = [
-        'paddleocr',
-        'pp_structurev3',  # 使用 PP-Structure V3
-        '--input', str(pdf_path.absolute()),
-        '--save_path', str(output_dir.absolute()),
-        '--device', 'gpu' if use_gpu else 'cpu',
-    ]
-    
-    # 表格识别选项
-    if enable_table:
-        cmd.extend(['--use_table_recognition', 'True'])
-    
+    start_time = time.time()
     try:
-        # 执行命令
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace'
-        )
-        
-        if result.returncode == 0:
-            # 整理输出文件
-            logger.info("正在整理输出文件...")
-            from organize_output import organize_output_directory
-            organize_output_directory(str(output_dir))
-            
-            # 查找最终文件
-            final_dir = output_dir / 'final'
-            outputs = {}
-            
-            final_docx = final_dir / f"{pdf_path.stem}.docx"
-            if final_docx.exists():
-                outputs['docx'] = str(final_docx)
-                logger.info(f"✓ Word 文档: {final_docx}")
-            
-            final_md = final_dir / f"{pdf_path.stem}.md"
-            if final_md.exists():
-                outputs['markdown'] = str(final_md)
-                logger.info(f"✓ Markdown 文档: {final_md}")
-            
-            return {
-                'status': 'success',
-                'input': str(pdf_path),
-                'outputs': outputs,
-                'output_dir': str(output_dir)
-            }
+        if worker is not None:
+            worker.submit(pdf_path, output_dir).result()
+            error = None
         else:
-            return {
-                'status': 'failed',
-                'input': str(pdf_path),
-                'error': result.stderr or '转换失败'
-            }
+            error = _run_cli(pdf_path, output_dir, use_gpu, enable_table, options)
+        
+        if error is not None:
+            return {'status': 'failed', 'input': str(pdf_path), 'error': error}
+        
+        result = _collect_outputs(pdf_path, output_dir)
+        result['duration'] = time.time() - start_time
+        return result
     
     except Exception as e:
         return {
@@ -117,9 +152,110 @@ def convert_pdf(pdf_path: str, output_dir: str = None, use_gpu: bool = False,
         }
 
 
+def load_config(config_path: str = None) -> dict:
+    """加载配置文件（不存在时返回空配置）"""
+    config_file = Path(config_path) if config_path else CURRENT_DIR / 'config.yaml'
+    if not config_file.exists():
+        return {}
+    with open(config_file, 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+def pipeline_options(config: dict) -> dict:
+    """
+    将配置中的识别参数转换为 PP-StructureV3 参数名
+    
+    - rec_batch_num -> text_recognition_batch_size（每批识别的文本行数）
+    - det_limit_side_len -> text_det_limit_side_len（文本检测输入边长限制）
+    """
+    options = {}
+    for key, name in (('rec_batch_num', 'text_recognition_batch_size'),
+                      ('det_limit_side_len', 'text_det_limit_side_len')):
+        if config.get(key) is not None:
+            options[name] = config[key]
+    return options
+
+
+def start_worker(use_gpu: bool = False, enable_table: bool = True, options: dict = None) -> StructureWorker:
+    """
+    启动常驻识别线程并等待模型加载完成
+    
+    Returns:
+        StructureWorker，未安装 PaddleOCR Python 接口或加载失败时返回 None
+    """
+    worker = StructureWorker(use_gpu, enable_table, **(options or {})).start()
+    try:
+        load_time = worker.wait_ready()
+    except Exception as e:
+        logger.warning(f"无法加载 PP-StructureV3 ({e})，改用 paddleocr 命令行逐个转换")
+        worker.close()
+        return None
+    logger.info(f"模型加载完成，耗时 {load_time:.1f}s")
+    return worker
+
+
+def open_results_log(config: dict, output_dir: str = None, enable_table: bool = True):
+    """
+    打开输出目录下的结果日志
+    
+    Returns:
+        ResultsLog，配置中关闭 results_log 时返回 None
+    """
+    if not config.get('results_log', 'results.jsonl'):
+        return None
+    output_base = Path(output_dir) if output_dir else CURRENT_DIR / 'output'
+    return ResultsLog(
+        output_base / config.get('results_log', 'results.jsonl'),
+        settings_hash({'options': pipeline_options(config), 'enable_table': enable_table})
+    )
+
+
+def write_summary(summary_file: Path, records: List[dict]):
+    """写入批量转换摘要（records 为 convert_pdf 结果或结果日志记录）"""
+    summary_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        f.write("转换结果摘要\n" + "=" * 60 + "\n\n")
+        for r in records:
+            f.write(f"文件: {r['input']}\n")
+            f.write(f"状态: {r['status']}\n")
+            if r.get('duration') is not None:
+                f.write(f"耗时: {r['duration']:.1f}s\n")
+            if r['status'] == 'success':
+                for k, v in (r.get('outputs') or {}).items():
+                    f.write(f"  {k}: {v}\n")
+            else:
+                f.write(f"  错误: {r.get('error')}\n")
+            f.write("\n")
+
+
+def batch_records(input_dir: str, results: List[dict], results_log=None) -> List[dict]:
+    """
+    汇总整个批次的结果
+    
+    续跑时本次只转换了部分文件：每个文件取结果日志中的最后一条记录（成功或失败），
+    日志中没有的文件使用本次的结果；没有结果日志时只汇总本次结果。
+    """
+    if results_log is None:
+        return results
+    latest = {str(Path(r['input']).resolve()): r for r in results}
+    latest.update(results_log.latest())
+    keys = [str(f.resolve()) for f in sorted(Path(input_dir).rglob("*.pdf"))]
+    return [latest[key] for key in keys if key in latest]
+
+
 def convert_batch(input_dir: str, output_dir: str = None, use_gpu: bool = False,
-                 enable_table: bool = True) -> List[dict]:
-    """批量转换 PDF 文件"""
+                 enable_table: bool = True, persistent: bool = True, config: dict = None,
+                 resume: bool = False) -> List[dict]:
+    """
+    批量转换 PDF 文件
+    
+    persistent 为 True 时模型只加载一次：
+    - 默认所有文档一次性放入常驻识别线程的队列，识别下一份文档的同时在主线程整理上一份的输出
+    - 配置 batch_ocr.enable 时，所有文档的页面进入共享页面队列，跨文档按批推理
+    
+    每个文件完成后立即追加到输出目录下的 results.jsonl；resume 为 True 时跳过
+    日志中已成功、PDF 内容和识别参数均未变化的文件（返回结果只包含本次转换的文件）
+    """
     input_path = Path(input_dir)
     if not input_path.exists():
         logger.error(f"目录不存在: {input_dir}")
@@ -133,19 +269,135 @@ def convert_batch(input_dir: str, output_dir: str = None, use_gpu: bool = False,
     
     logger.info(f"找到 {len(pdf_files)} 个 PDF 文件")
     
-    results = []
-    for pdf_file in tqdm(pdf_files, desc="转换进度", ncols=80):
-        result = convert_pdf(str(pdf_file), output_dir, use_gpu, enable_table)
-        results.append(result)
+    config = load_config() if config is None else config
+    options = pipeline_options(config)
+    batch_cfg = config.get('batch_ocr') or {}
+    
+    results_log = open_results_log(config, output_dir, enable_table)
+    if resume and results_log is not None:
+        completed = results_log.completed()
+        remaining = [f for f in pdf_files if not results_log.is_done(completed.get(str(f.resolve())), f)]
+        if len(remaining) < len(pdf_files):
+            logger.info(f"跳过 {len(pdf_files) - len(remaining)} 个已完成的文件（{results_log.path}）")
+        pdf_files = remaining
+        if not pdf_files:
+            return []
+    on_result = results_log.append if results_log is not None else (lambda result: None)
+    
+    load_time = None
+    results = None
+    if persistent and batch_cfg.get('enable', False):
+        results, load_time = _convert_page_batches(pdf_files, output_dir, use_gpu, enable_table, batch_cfg, options,
+                                                   on_result)
+    
+    if results is None:
+        worker = start_worker(use_gpu, enable_table, options) if persistent else None
+        results = []
+        try:
+            if worker is None:
+                for pdf_file in tqdm(pdf_files, desc="转换进度", ncols=80):
+                    result = convert_pdf(str(pdf_file), output_dir, use_gpu, enable_table, options=options)
+                    on_result(result)
+                    results.append(result)
+            else:
+                load_time = worker.load_time
+                results = _convert_with_worker(pdf_files, output_dir, worker, on_result)
+        finally:
+            if worker is not None:
+                worker.close()
     
     success = sum(1 for r in results if r['status'] == 'success')
     failed = len(results) - success
     
     logger.info(f"完成！成功: {success}, 失败: {failed}")
     
+    durations = [r['duration'] for r in results if 'duration' in r]
+    if durations:
+        if load_time is not None:
+            logger.info(f"模型加载: {load_time:.1f}s（仅一次）")
+        logger.info(f"单文档耗时: 平均 {sum(durations) / len(durations):.1f}s, 最长 {max(durations):.1f}s")
+    
+    return results
+
+
+def _convert_with_worker(pdf_files: List[Path], output_dir: str, worker: StructureWorker,
+                        on_result=None) -> List[dict]:
+    """所有文档放入常驻识别线程的队列，按顺序等待结果并整理输出（每个结果交给 on_result）"""
+    jobs = []
+    for pdf_file in pdf_files:
+        file_output_dir = _resolve_output_dir(pdf_file, output_dir)
+        file_output_dir.mkdir(parents=True, exist_ok=True)
+        jobs.append((pdf_file, file_output_dir, worker.submit(pdf_file, file_output_dir)))
+    
+    results = []
+    for pdf_file, file_output_dir, future in tqdm(jobs, desc="转换进度", ncols=80):
+        try:
+            ocr = future.result()
+            t0 = time.time()
+            result = _collect_outputs(pdf_file, file_output_dir)
+            result['pages'] = ocr['pages']
+            result['duration'] = ocr['duration'] + time.time() - t0
+        except Exception as e:
+            result = {'status': 'failed', 'input': str(pdf_file), 'error': str(e)}
+        if on_result is not None:
+            on_result(result)
+        results.append(result)
     return results
 
 
+def _convert_page_batches(pdf_files: List[Path], output_dir: str, use_gpu: bool, enable_table: bool,
+                          batch_cfg: dict, options: dict, on_result=None):
+    """
+    跨文档分批识别：页面进入共享队列按批推理，每个文档的页面全部完成后立即整理其输出（结果交给 on_result）
+    
+    Returns:
+        (结果列表, 模型加载耗时)，无法加载模型时返回 (None, None)
+    """
+    engine = PageBatchEngine(
+        use_gpu, enable_table,
+        page_batch_size=batch_cfg.get('page_batch_size', 8),
+        render_zoom=batch_cfg.get('render_zoom', 2.0),
+        **options
+    )
+    try:
+        load_time = engine.load()
+    except Exception as e:
+        logger.warning(f"无法加载 PP-StructureV3 ({e})，不使用分批识别")
+        return None, None
+    logger.info(f"模型加载完成，耗时 {load_time:.1f}s（每批 {engine.page_batch_size} 页）")
+    
+    jobs = []
+    for pdf_file in pdf_files:
+        file_output_dir = _resolve_output_dir(pdf_file, output_dir)
+        file_output_dir.mkdir(parents=True, exist_ok=True)
+        jobs.append((pdf_file, file_output_dir))
+    
+    results = [None] * len(jobs)
+    progress = tqdm(total=len(jobs), desc="转换进度", ncols=80)
+    
+    def on_done(index: int, ocr: dict):
+        pdf_file, file_output_dir = jobs[index]
+        if ocr.get('error'):
+            results[index] = {'status': 'failed', 'input': str(pdf_file), 'error': ocr['error']}
+        else:
+            t0 = time.time()
+            try:
+                results[index] = _collect_outputs(pdf_file, file_output_dir)
+                results[index]['pages'] = ocr['pages']
+                results[index]['duration'] = ocr['duration'] + time.time() - t0
+            except Exception as e:
+                results[index] = {'status': 'failed', 'input': str(pdf_file), 'error': str(e)}
+        if on_result is not None:
+            on_result(results[index])
+        progress.update(1)
+    
+    try:
+        engine.run(jobs, on_done)
+    finally:
+        progress.close()
+    return results, load_time
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='PaddleOCR PDF 转 Word/Markdown 工具',
@@ -157,9 +409,20 @@ def main():
     parser.add_argument('--batch', action='store_true', help='批量处理')
     parser.add_argument('--no-table', action='store_true', help='禁用表格识别')
     parser.add_argument('--gpu', action='store_true', help='使用 GPU')
+    parser.add_argument('--cli', action='store_true',
+                        help='批量处理时每个文件单独调用 paddleocr 命令行（不使用常驻模型）')
+    parser.add_argument('--config', help='配置文件路径（默认: 脚本目录下的 config.yaml）')
+    parser.add_argument('--page-batch', type=int, metavar='N',
+                        help='批量处理时跨文档按批识别，每批 N 页（覆盖 config.yaml 中的 batch_ocr）')
+    parser.add_argument('--resume', action='store_true',
+                        help='批量处理时跳过 results.jsonl 中已成功且 PDF 和参数未变的文件')
     
     args = parser.parse_args()
     
+    config = load_config(args.config)
+    if args.page_batch:
+        config['batch_ocr'] = dict(config.get('batch_ocr') or {}, enable=True, page_batch_size=args.page_batch)
+    
     input_path = Path(args.input)
     
     if not input_path.exists():
@@ -172,27 +435,21 @@ def main():
             str(input_path),
             args.output,
             args.gpu,
-            not args.no_table
+            not args.no_table,
+            persistent=not args.cli,
+            config=config,
+            resume=args.resume
         )
         
-        # 保存摘要
+        # 保存摘要（按结果日志汇总整个批次，续跑前已完成的文件也包括在内）
         output_base = Path(args.output) if args.output else CURRENT_DIR / 'output'
         summary_file = output_base / 'summary.txt'
-        summary_file.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            f.write("转换结果摘要\n" + "=" * 60 + "\n\n")
-            for r in results:
-                f.write(f"文件: {r['input']}\n")
-                f.write(f"状态: {r['status']}\n")
-                if r['status'] == 'success':
-                    for k, v in r.get('outputs', {}).items():
-                        f.write(f"  {k}: {v}\n")
-                else:
-                    f.write(f"  错误: {r.get('error')}\n")
-                f.write("\n")
+        results_log = open_results_log(config, args.output, not args.no_table)
+        write_summary(summary_file, batch_records(str(input_path), results, results_log))
         
         print(f"\n摘要已保存: {summary_file}")
+        if results_log is not None:
+            print(f"结果日志: {results_log.path}")
     
     else:
         # 单文件转换
@@ -200,7 +457,8 @@ def main():
             str(input_path),
             args.output,
             args.gpu,
-            not args.no_table
+            not args.no_table,
+            options=pipeline_options(config)
         )
         
         if result['status'] == 'success':
@@ -0,0 +1,672 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式 DOCX 合并
+逐个读取分页 DOCX，把正文写入输出包的 word/document.xml；样式、编号、图片按内容哈希一次性去重，
+输出 zip 增量写入，内存占用与页数无关
+"""
+
+import hashlib
+import posixpath
+import shutil
+import tempfile
+import zipfile
+from copy import deepcopy
+from pathlib import Path
+
+from lxml import etree  # pyright: ignore[reportMissingImports]
+
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+CT_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+WP_NS = 'http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing'
+
+RT_OFFICE_DOCUMENT = R_NS + '/officeDocument'
+RT_IMAGE = R_NS + '/image'
+RT_HYPERLINK = R_NS + '/hyperlink'
+RT_STYLES = R_NS + '/styles'
+RT_NUMBERING = R_NS + '/numbering'
+
+CT_NUMBERING = 'application/vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml'
+
+# 元素上引用关系（图片、超链接等）的属性
+_REL_ATTRS = ('{%s}embed' % R_NS, '{%s}id' % R_NS, '{%s}link' % R_NS)
+# 引用样式的元素
+_STYLE_REFS = ('{%s}pStyle' % W_NS, '{%s}rStyle' % W_NS, '{%s}tblStyle' % W_NS)
+# 样式之间的引用
+_STYLE_LINKS = ('{%s}basedOn' % W_NS, '{%s}next' % W_NS, '{%s}link' % W_NS)
+# 编号定义中随机生成、不影响效果的元素（比较内容时忽略）
+_NUMBERING_NOISE = ('{%s}nsid' % W_NS, '{%s}tmpl' % W_NS)
+
+# 正文中引用页眉页脚部件的元素（关系目标缺失时整个删除）
+_PART_REFS = ('{%s}headerReference' % W_NS, '{%s}footerReference' % W_NS)
+
+_VAL = '{%s}val' % W_NS
+_TYPE = '{%s}type' % W_NS
+_DEFAULT = '{%s}default' % W_NS
+_STYLE_ID = '{%s}styleId' % W_NS
+_NUM_ID = '{%s}numId' % W_NS
+_ABSTRACT_NUM_ID = '{%s}abstractNumId' % W_NS
+_DOC_PR = '{%s}docPr' % WP_NS
+
+_PAGE_BREAK = (
+    '<w:p xmlns:w="%s"><w:r><w:br w:type="page"/></w:r></w:p>' % W_NS
+).encode('utf-8')
+
+
+# document.xml 根元素模板中正文位置的占位符
+_BODY_MARKER = '@@BODY@@'
+
+
+def _w(tag: str) -> str:
+    return '{%s}%s' % (W_NS, tag)
+
+
+def _digest(element) -> str:
+    return hashlib.sha1(etree.tostring(element, method='c14n')).hexdigest()
+
+
+def _default_paragraph_style(styles):
+    for style in styles:
+        if style.get(_TYPE) == 'paragraph' and style.get(_DEFAULT) in ('1', 'true', 'on'):
+            return style.get(_STYLE_ID)
+    return None
+
+
+def _remap_style_links(style, style_map: dict):
+    for element in style:
+        if element.tag in _STYLE_LINKS and element.get(_VAL) in style_map:
+            element.set(_VAL, style_map[element.get(_VAL)])
+
+
+def _drop_refs(element, rids: set):
+    """删除元素中引用 rids（目标缺失的关系）的属性；页眉页脚引用整个删除"""
+    dangling = [(node, attr) for node in element.iter() for attr in _REL_ATTRS if node.get(attr) in rids]
+    for node, attr in dangling:
+        parent = node.getparent()
+        if node.tag in _PART_REFS and parent is not None:
+            parent.remove(node)
+        else:
+            node.attrib.pop(attr, None)
+
+
+def _rels_name(part: str) -> str:
+    """部件对应的关系文件名，如 word/document.xml -> word/_rels/document.xml.rels"""
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, '_rels', name + '.rels')
+
+
+class _Package:
+    """只读打开的 DOCX 包"""
+
+    def __init__(self, path):
+        self.zip = zipfile.ZipFile(str(path))
+        self.names = set(self.zip.namelist())
+        root_rels = self.rels('')
+        self.main = next(target for _, (rtype, target, _) in root_rels.items() if rtype == RT_OFFICE_DOCUMENT)
+        self.main = self.main.lstrip('/')
+
+        types = etree.fromstring(self.zip.read('[Content_Types].xml'))
+        self.defaults = {e.get('Extension').lower(): e.get('ContentType') for e in types.iter('{%s}Default' % CT_NS)}
+        self.overrides = {e.get('PartName'): e.get('ContentType') for e in types.iter('{%s}Override' % CT_NS)}
+
+    def rels(self, part: str) -> dict:
+        """读取部件的关系 {rId: (类型, 目标部件名, TargetMode)}，目标为包内绝对路径（外部链接保持原样）"""
+        name = '_rels/.rels' if not part else _rels_name(part)
+        if name not in self.names:
+            return {}
+        base = posixpath.dirname(part)
+        rels = {}
+        for rel in etree.fromstring(self.zip.read(name)).iter('{%s}Relationship' % PKG_REL_NS):
+            mode = rel.get('TargetMode')
+            target = rel.get('Target')
+            if mode != 'External':
+                target = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join(base, target))
+            rels[rel.get('Id')] = (rel.get('Type'), target, mode)
+        return rels
+
+    def closure(self, parts, exclude=()) -> set:
+        """parts 及其关系（递归）指向的包内部件"""
+        seen = set()
+        stack = list(parts)
+        while stack:
+            part = stack.pop()
+            if part in seen or part in exclude or part not in self.names:
+                continue
+            seen.add(part)
+            stack.extend(target for _, target, mode in self.rels(part).values() if mode != 'External')
+        return seen
+
+    def content_type(self, part: str) -> str:
+        override = self.overrides.get('/' + part)
+        if override:
+            return override
+        return self.defaults.get(posixpath.splitext(part)[1].lstrip('.').lower(), 'application/octet-stream')
+
+    def read_xml(self, part: str):
+        return etree.fromstring(self.zip.read(part))
+
+    def close(self):
+        self.zip.close()
+
+
+class StreamingDocxMerger:
+    """
+    流式合并多个 DOCX（每页一个）
+
+    - 第一个文档提供文档级部件（设置、主题、字体表、docProps 等）和最后一节的页面设置
+    - 正文逐页写入磁盘上的临时文件，最后一次性写入 zip，页与页之间插入分页符
+    - 样式按 styleId + 内容哈希去重，同名不同内容的样式以及（递归）基于它的样式重命名后再引用，
+      规则与 V2 的 docx_stitch 相同
+    - 编号定义按内容哈希去重（忽略随机的 nsid），页面中的 numId 重新映射
+    - 图片按内容哈希去重，相同图片（重复的 logo、印章）只保存一次
+    - 只复制保留下来的正文和节属性引用的部件，页眉页脚等部件连同其关系（图片、超链接）递归复制；
+      目标缺失的关系不写入，引用它的属性（页眉页脚引用）删除
+    - 图形对象的 docPr id 重新编号
+
+    用法:
+        with StreamingDocxMerger(output_path) as merger:
+            for page in pages:
+                merger.add(page)
+    """
+
+    def __init__(self, output_path):
+        self.output_path = Path(output_path)
+        self.zip = zipfile.ZipFile(str(self.output_path), 'w', zipfile.ZIP_DEFLATED)
+        self.body = tempfile.TemporaryFile()
+        self.pages = 0
+
+        self.main = None
+        self.doc_head = None
+        self.doc_tail = None
+        self.sect_pr = None
+        self.written = set()
+
+        self.rels = []
+        self.rel_counter = 0
+        self.defaults = {}
+        self.overrides = {}
+
+        # {图片内容哈希: 输出包中的部件名}，{部件名: 正文关系 id}
+        self.media = {}
+        self.media_rels = {}
+        self.links = {}
+        # 当前页面中已复制的部件 {页面包中的部件名: 输出包中的部件名}
+        self.copied = {}
+        self.docpr_id = 0
+
+        self.styles_part = None
+        self.styles_root = None
+        self.styles = {}
+        self.style_hashes = {}
+
+        self.numbering_part = None
+        self.numbering_root = None
+        self.abstract_nums = {}
+        self.abstract_list = []
+        self.nums = {}
+        self.num_list = []
+        # 内容完全相同的样式 / 编号部件（同一模板生成的页面）直接复用上次的映射
+        self.part_maps = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    # ------------------------------------------------------------------ 写入
+
+    def add(self, docx_path):
+        """追加一个 DOCX 的正文"""
+        package = _Package(docx_path)
+        try:
+            self._add_package(package)
+        finally:
+            package.close()
+
+    def close(self) -> bool:
+        """写入 document.xml、样式、编号、关系和内容类型，完成输出包"""
+        if not self.pages:
+            self.abort()
+            return False
+
+        with self.zip.open(self.main, 'w') as out:
+            out.write(self.doc_head)
+            self.body.seek(0)
+            shutil.copyfileobj(self.body, out)
+            if self.sect_pr is not None:
+                out.write(etree.tostring(self.sect_pr))
+            out.write(self.doc_tail)
+        self.body.close()
+
+        if self.styles_root is not None:
+            for style in self.styles.values():
+                self.styles_root.append(style)
+            self._write_xml(self.styles_part, self.styles_root)
+
+        if self.abstract_list or self.numbering_part:
+            if self.numbering_root is None:
+                self.numbering_root = etree.Element(_w('numbering'), nsmap={'w': W_NS})
+            for element in self.abstract_list + self.num_list:
+                self.numbering_root.append(element)
+            if self.numbering_part is None:
+                self.numbering_part = posixpath.join(posixpath.dirname(self.main), 'numbering.xml')
+                self._add_rel(RT_NUMBERING, 'numbering.xml')
+                self.overrides['/' + self.numbering_part] = CT_NUMBERING
+            self._write_xml(self.numbering_part, self.numbering_root)
+
+        rels = etree.Element('{%s}Relationships' % PKG_REL_NS, nsmap={None: PKG_REL_NS})
+        for rid, rtype, target, mode in self.rels:
+            rel = etree.SubElement(rels, '{%s}Relationship' % PKG_REL_NS, Id=rid, Type=rtype, Target=target)
+            if mode:
+                rel.set('TargetMode', mode)
+        self._write_xml(_rels_name(self.main), rels)
+
+        types = etree.Element('{%s}Types' % CT_NS, nsmap={None: CT_NS})
+        for ext, content_type in sorted(self.defaults.items()):
+            etree.SubElement(types, '{%s}Default' % CT_NS, Extension=ext, ContentType=content_type)
+        for part, content_type in sorted(self.overrides.items()):
+            if part.lstrip('/') in self.written:
+                etree.SubElement(types, '{%s}Override' % CT_NS, PartName=part, ContentType=content_type)
+        self._write_xml('[Content_Types].xml', types)
+
+        self.zip.close()
+        return True
+
+    def abort(self):
+        """放弃输出（删除不完整的文件）"""
+        self.body.close()
+        self.zip.close()
+        if self.output_path.exists():
+            self.output_path.unlink()
+
+    # ------------------------------------------------------------------ 单个文档
+
+    def _add_package(self, package: _Package):
+        document = package.read_xml(package.main)
+        body = document.find(_w('body'))
+        rels = package.rels(package.main)
+
+        children = list(body)
+        sect_pr = children.pop() if children and children[-1].tag == _w('sectPr') else None
+        if self.pages:
+            # 只保留第一页的最后一节页面设置，后续页面的节属性及其页眉页脚不复制
+            sect_pr = None
+        kept = children + ([sect_pr] if sect_pr is not None else [])
+        referenced = {value for element in kept for node in element.iter() for attr in _REL_ATTRS
+                      for value in [node.get(attr)] if value}
+
+        if self.main is None:
+            self._init_from_first(package, rels, document, referenced)
+
+        num_map = self._merge_numbering(package, rels)
+        style_map, default_style = self._merge_styles(package, rels, num_map)
+        self.copied = {}
+        rel_map = {rid: self._map_rel(package, rels[rid]) if rid in rels else None for rid in referenced}
+        dangling = {rid for rid, new_rid in rel_map.items() if new_rid is None}
+
+        if self.pages:
+            self.body.write(_PAGE_BREAK)
+        for element in children:
+            _drop_refs(element, dangling)
+            self._remap(element, rel_map, style_map, num_map, default_style)
+            self.body.write(etree.tostring(element))
+
+        if sect_pr is not None:
+            _drop_refs(sect_pr, dangling)
+            self._remap(sect_pr, rel_map, style_map, num_map)
+            self.sect_pr = sect_pr
+        self.pages += 1
+
+    def _init_from_first(self, package: _Package, rels: dict, document, referenced: set):
+        """第一个文档：记录 document.xml 的根元素，复制文档级部件和关系"""
+        self.main = package.main
+        shell = etree.Element(document.tag, attrib=dict(document.attrib), nsmap=document.nsmap)
+        etree.SubElement(shell, _w('body')).text = _BODY_MARKER
+        head, tail = etree.tostring(shell, xml_declaration=True, encoding='UTF-8',
+                                    standalone=True).split(_BODY_MARKER.encode('utf-8'))
+        self.doc_head, self.doc_tail = head, tail
+
+        self.defaults = dict(package.defaults)
+        self.overrides = {package_name: ct for package_name, ct in package.overrides.items()}
+
+        base = posixpath.dirname(self.main)
+        document_parts = []
+        for rid, (rtype, target, mode) in rels.items():
+            if rid in referenced:
+                continue
+            if rtype == RT_STYLES:
+                self.styles_part = target
+            elif rtype == RT_NUMBERING:
+                self.numbering_part = target
+            elif mode != 'External':
+                if target not in package.names:
+                    # 目标缺失的关系不写入
+                    continue
+                document_parts.append(target)
+            rel_target = target if mode == 'External' else posixpath.relpath(target, base)
+            self.rels.append((rid, rtype, rel_target, mode))
+
+        # 复制包级（docProps 等）和文档级部件（设置、主题、字体表等）及其关系；
+        # 正文、样式、编号以及正文引用的部件由合并过程重新生成，未被引用的部件不复制
+        package_parts = [target for _, target, mode in package.rels('').values()
+                         if mode != 'External' and target != self.main]
+        skip = {self.main, self.styles_part, self.numbering_part}
+        names = {'_rels/.rels'}
+        for part in package.closure(package_parts + document_parts, exclude=skip):
+            names.add(part)
+            if _rels_name(part) in package.names:
+                names.add(_rels_name(part))
+        for name in sorted(names & package.names):
+            with package.zip.open(name) as src, self.zip.open(name, 'w') as dst:
+                shutil.copyfileobj(src, dst)
+            self.written.add(name)
+        self.written.update(skip - {None})
+
+        self.rel_counter = len(self.rels)
+        if self.styles_part:
+            self.styles_root = package.read_xml(self.styles_part)
+            for style in self.styles_root.findall(_w('style')):
+                self.styles_root.remove(style)
+        if self.numbering_part and self.numbering_part in package.names:
+            self.numbering_root = package.read_xml(self.numbering_part)
+            for element in self.numbering_root.findall(_w('abstractNum')) + self.numbering_root.findall(_w('num')):
+                self.numbering_root.remove(element)
+
+    def _add_rel(self, rtype: str, target: str, mode: str = None) -> str:
+        existing = {rid for rid, _, _, _ in self.rels}
+        while True:
+            self.rel_counter += 1
+            rid = f"rId{self.rel_counter}"
+            if rid not in existing:
+                break
+        self.rels.append((rid, rtype, target, mode))
+        return rid
+
+    def _map_rel(self, package: _Package, rel):
+        """
+        把页面中的关系映射到输出包：图片按内容去重，外部链接按地址去重，其他部件连同其关系复制一份
+
+        Returns:
+            输出包正文中的关系 id；目标部件不在页面包中时为 None（不写入关系）
+        """
+        rtype, target, mode = rel
+        if mode == 'External':
+            key = (rtype, target)
+            if key not in self.links:
+                self.links[key] = self._add_rel(rtype, target, mode)
+            return self.links[key]
+
+        if target not in package.names:
+            return None
+        base = posixpath.dirname(self.main)
+        if rtype == RT_IMAGE:
+            name = self._copy_media(package, target)
+            if name not in self.media_rels:
+                self.media_rels[name] = self._add_rel(rtype, posixpath.relpath(name, base))
+            return self.media_rels[name]
+        return self._add_rel(rtype, posixpath.relpath(self._copy_part(package, target), base))
+
+    def _copy_media(self, package: _Package, target: str) -> str:
+        """复制图片（按内容去重），返回输出包中的部件名"""
+        data = package.zip.read(target)
+        digest = hashlib.sha1(data).hexdigest()
+        if digest not in self.media:
+            ext = posixpath.splitext(target)[1].lower()
+            name = self._unique_part(posixpath.join(posixpath.dirname(self.main), 'media', f"image{len(self.media) + 1}{ext}"))
+            self._write_part(name, data, package.content_type(target))
+            self.media[digest] = name
+        return self.media[digest]
+
+    def _copy_part(self, package: _Package, target: str) -> str:
+        """复制部件（页眉、页脚、脚注等）及其关系（递归），返回输出包中的部件名"""
+        if target in self.copied:
+            return self.copied[target]
+        name = self._unique_part(target)
+        self.copied[target] = name
+        # 先占用名称，递归复制的部件不会取到同一个名字
+        self.written.add(name)
+        data = package.zip.read(target)
+
+        part_rels = package.rels(target)
+        if part_rels:
+            folder = posixpath.dirname(name)
+            out_rels = etree.Element('{%s}Relationships' % PKG_REL_NS, nsmap={None: PKG_REL_NS})
+            dangling = set()
+            for rid, (rtype, rel_target, mode) in part_rels.items():
+                if mode == 'External':
+                    out_target = rel_target
+                elif rel_target not in package.names:
+                    dangling.add(rid)
+                    continue
+                elif rtype == RT_IMAGE:
+                    out_target = posixpath.relpath(self._copy_media(package, rel_target), folder)
+                else:
+                    out_target = posixpath.relpath(self._copy_part(package, rel_target), folder)
+                rel = etree.SubElement(out_rels, '{%s}Relationship' % PKG_REL_NS, Id=rid, Type=rtype, Target=out_target)
+                if mode:
+                    rel.set('TargetMode', mode)
+            if dangling:
+                root = etree.fromstring(data)
+                _drop_refs(root, dangling)
+                data = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+            self._write_xml(_rels_name(name), out_rels)
+
+        self._write_part(name, data, package.content_type(target))
+        return name
+
+    def _unique_part(self, name: str) -> str:
+        stem, ext = posixpath.splitext(name)
+        candidate, n = name, 1
+        while candidate in self.written:
+            n += 1
+            candidate = f"{stem}_{n}{ext}"
+        return candidate
+
+    def _write_part(self, name: str, data: bytes, content_type: str):
+        self.zip.writestr(name, data)
+        self.written.add(name)
+        ext = posixpath.splitext(name)[1].lstrip('.').lower()
+        if self.defaults.get(ext) != content_type:
+            self.overrides['/' + name] = content_type
+
+    def _write_xml(self, name: str, root):
+        self.zip.writestr(name, etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True))
+        self.written.add(name)
+
+    # ------------------------------------------------------------------ 样式与编号
+
+    def _merge_numbering(self, package: _Package, rels: dict) -> dict:
+        """合并页面的编号定义，返回 {原 numId: 新 numId}"""
+        part = next((t for rtype, t, mode in rels.values() if rtype == RT_NUMBERING and mode != 'External'), None)
+        if not part or part not in package.names:
+            return {}
+        data = package.zip.read(part)
+        part_digest = hashlib.sha1(data).hexdigest()
+        if part_digest in self.part_maps:
+            return self.part_maps[part_digest]
+        numbering = etree.fromstring(data)
+
+        abstract_map = {}
+        for abstract in numbering.findall(_w('abstractNum')):
+            old_id = abstract.get(_ABSTRACT_NUM_ID)
+            key = deepcopy(abstract)
+            key.attrib.pop(_ABSTRACT_NUM_ID, None)
+            for noise in _NUMBERING_NOISE:
+                for element in key.findall(noise):
+                    key.remove(element)
+            digest = _digest(key)
+            if digest not in self.abstract_nums:
+                new_id = str(len(self.abstract_list))
+                abstract.set(_ABSTRACT_NUM_ID, new_id)
+                self.abstract_nums[digest] = new_id
+                self.abstract_list.append(abstract)
+            abstract_map[old_id] = self.abstract_nums[digest]
+
+        num_map = {}
+        for num in numbering.findall(_w('num')):
+            ref = num.find(_w('abstractNumId'))
+            if ref is None:
+                continue
+            ref.set(_VAL, abstract_map.get(ref.get(_VAL), ref.get(_VAL)))
+            old_id = num.get(_NUM_ID)
+            key = deepcopy(num)
+            key.attrib.pop(_NUM_ID, None)
+            digest = _digest(key)
+            if digest not in self.nums:
+                new_id = str(len(self.num_list) + 1)
+                num.set(_NUM_ID, new_id)
+                self.nums[digest] = new_id
+                self.num_list.append(num)
+            num_map[old_id] = self.nums[digest]
+        self.part_maps[part_digest] = num_map
+        return num_map
+
+    def _merge_styles(self, package: _Package, rels: dict, num_map: dict):
+        """
+        合并页面样式（规则与 V2 的 docx_stitch 相同）
+
+        与已有样式同名但内容不同的样式，以及（递归）基于这些样式的样式都需要重命名，
+        否则继承到的是输出文档中同名基础样式的格式。
+
+        Returns:
+            ({原 styleId: 新 styleId}（仅包含被重命名的样式），
+             页面默认段落样式在输出中的 styleId（与输出的默认段落样式相同时为 None）)
+        """
+        if self.styles_root is None:
+            return {}, None
+        part = next((t for rtype, t, mode in rels.values() if rtype == RT_STYLES and mode != 'External'), None)
+        if not part or part not in package.names:
+            return {}, None
+
+        data = package.zip.read(part)
+        part_key = (hashlib.sha1(data).hexdigest(), tuple(sorted(num_map.items())))
+        if part_key in self.part_maps:
+            return self.part_maps[part_key]
+        src_styles = {}
+        for style in etree.fromstring(data).findall(_w('style')):
+            for element in style.iter(_NUM_ID):
+                if element.get(_VAL) in num_map:
+                    element.set(_VAL, num_map[element.get(_VAL)])
+            src_styles[style.get(_STYLE_ID)] = style
+        first = not self.styles
+        src_default = _default_paragraph_style(src_styles.values())
+        dst_default = _default_paragraph_style(self.styles.values())
+
+        def base_of(sid):
+            base = src_styles[sid].find(_w('basedOn'))
+            return base.get(_VAL) if base is not None else None
+
+        conflicts = {sid for sid, style in src_styles.items()
+                     if sid in self.styles and self.style_hashes[sid] != _digest(style)}
+        changed = True
+        while changed:
+            changed = False
+            for sid in src_styles:
+                if sid in self.styles and sid not in conflicts and base_of(sid) in conflicts:
+                    conflicts.add(sid)
+                    changed = True
+
+        def depth(sid, seen=()):
+            base = base_of(sid)
+            if base not in src_styles or base in seen:
+                return 0
+            return depth(base, seen + (sid,)) + 1
+
+        style_map = {}
+        added = []
+        for sid, style in src_styles.items():
+            if sid not in self.styles:
+                self.style_hashes[sid] = _digest(style)
+                added.append(style)
+        # 基础样式先确定新名称，派生样式的 basedOn 随之更新后再比较内容
+        for sid in sorted(conflicts, key=depth):
+            style = src_styles[sid]
+            _remap_style_links(style, style_map)
+            digest = _digest(style)
+            # 查找此前已重命名的相同样式，否则新建
+            n = 2
+            while f"{sid}{n}" in self.style_hashes and self.style_hashes[f"{sid}{n}"] != digest:
+                n += 1
+            new_id = f"{sid}{n}"
+            style_map[sid] = new_id
+            if new_id not in self.style_hashes:
+                style.set(_STYLE_ID, new_id)
+                name = style.find(_w('name'))
+                if name is not None:
+                    name.set(_VAL, f"{name.get(_VAL)} {n}")
+                self.style_hashes[new_id] = digest
+                added.append(style)
+
+        for style in added:
+            if not first:
+                # 输出文档已有默认样式
+                style.attrib.pop(_DEFAULT, None)
+            _remap_style_links(style, style_map)
+            self.styles[style.get(_STYLE_ID)] = style
+
+        default_style = None
+        if not first and src_default and style_map.get(src_default, src_default) != dst_default:
+            default_style = style_map.get(src_default, src_default)
+        self.part_maps[part_key] = (style_map, default_style)
+        return style_map, default_style
+
+    # ------------------------------------------------------------------ 正文
+
+    def _remap(self, element, rel_map: dict, style_map: dict, num_map: dict, default_style=None):
+        """重写正文元素中的关系 id、样式 id、numId 和 docPr id"""
+        if default_style:
+            # 页面的默认段落样式与输出不同：没有显式样式的段落改为显式引用
+            paragraphs = [element] if element.tag == _w('p') else list(element.iter(_w('p')))
+            for p in paragraphs:
+                ppr = p.find(_w('pPr'))
+                if ppr is None:
+                    ppr = etree.Element(_w('pPr'))
+                    p.insert(0, ppr)
+                if ppr.find(_w('pStyle')) is None:
+                    p_style = etree.Element(_w('pStyle'))
+                    p_style.set(_VAL, default_style)
+                    ppr.insert(0, p_style)
+        for node in element.iter():
+            for attr in _REL_ATTRS:
+                value = node.get(attr)
+                if value and value in rel_map:
+                    node.set(attr, rel_map[value])
+            tag = node.tag
+            if tag in _STYLE_REFS:
+                value = node.get(_VAL)
+                if value in style_map:
+                    node.set(_VAL, style_map[value])
+            elif tag == _NUM_ID:
+                value = node.get(_VAL)
+                if value in num_map:
+                    node.set(_VAL, num_map[value])
+            elif tag == _DOC_PR:
+                self.docpr_id += 1
+                node.set('id', str(self.docpr_id))
+
+
+def stream_merge_docx(docx_files, output_path) -> bool:
+    """
+    流式合并多个 DOCX（页与页之间插入分页符）
+
+    Args:
+        docx_files: DOCX 文件路径（按页码顺序）
+        output_path: 输出 DOCX 路径
+
+    Returns:
+        是否合并成功
+    """
+    if not docx_files:
+        return False
+    with StreamingDocxMerger(output_path) as merger:
+        for docx_file in docx_files:
+            merger.add(docx_file)
+    return merger.pages > 0
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻 PP-StructureV3 工作线程
+模型只加载一次，通过队列依次处理多个 PDF，避免每个文件重复启动 paddleocr 命令行和加载模型
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StructureWorker:
+    """
+    在后台线程中持有 PP-StructureV3 流水线
+
+    submit() 把文档放入队列并返回 Future；工作线程按顺序处理，
+    输出与 `paddleocr pp_structurev3 --save_path` 相同（每页 res.save_all）。
+    主线程可以在等待下一份文档识别时整理上一份的输出。
+    """
+
+    def __init__(self, use_gpu: bool = False, enable_table: bool = True, **pipeline_kwargs):
+        """
+        Args:
+            use_gpu: 是否使用 GPU
+            enable_table: 是否启用表格识别
+            pipeline_kwargs: 传给 PPStructureV3 的其他参数
+        """
+        self.use_gpu = use_gpu
+        self.enable_table = enable_table
+        self.pipeline_kwargs = pipeline_kwargs
+        self.pipeline = None
+        self.load_time = None
+        self._load_error = None
+        self._ready = threading.Event()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='pp-structure-worker', daemon=True)
+
+    def start(self):
+        """启动工作线程（立即开始加载模型）"""
+        self._thread.start()
+        return self
+
+    def wait_ready(self, timeout: float = None) -> float:
+        """
+        等待模型加载完成
+
+        Returns:
+            模型加载耗时（秒）
+
+        Raises:
+            加载失败时抛出加载过程中的异常（未安装 paddleocr 时为 ImportError）
+        """
+        self._ready.wait(timeout)
+        if self._load_error is not None:
+            raise self._load_error
+        return self.load_time
+
+    def submit(self, pdf_path, save_dir) -> Future:
+        """
+        提交一份文档
+
+        Returns:
+            Future，结果为 {'pages': 页数, 'duration': 识别耗时（秒，不含排队时间）}
+        """
+        future = Future()
+        self._queue.put((Path(pdf_path), Path(save_dir), future))
+        return future
+
+    def close(self):
+        """处理完队列中剩余的文档后停止工作线程"""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _load(self):
+        from paddleocr import PPStructureV3  # pyright: ignore[reportMissingImports]
+        t0 = time.time()
+        self.pipeline = PPStructureV3(
+            device='gpu' if self.use_gpu else 'cpu',
+            use_table_recognition=self.enable_table,
+            **self.pipeline_kwargs
+        )
+        self.load_time = time.time() - t0
+
+    def _run(self):
+        try:
+            self._load()
+        except BaseException as e:
+            self._load_error = e
+        finally:
+            self._ready.set()
+
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            pdf_path, save_dir, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            if self._load_error is not None:
+                future.set_exception(self._load_error)
+                continue
+            try:
+                future.set_result(self._predict(pdf_path, save_dir))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _predict(self, pdf_path: Path, save_dir: Path) -> dict:
+        """识别一份文档，每页结果保存到 save_dir"""
+        t0 = time.time()
+        pages = 0
+        for res in self.pipeline.predict_iter(str(pdf_path.absolute())):
+            res.save_all(str(save_dir.absolute()))
+            pages += 1
+        return {'pages': pages, 'duration': time.time() - t0}
@@ -5,27 +5,57 @@
 自动将分散的页面合并成最终文档
 """
 
+import errno
 import os
+import re
 import shutil
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from docx import Document  # pyright: ignore[reportMissingImports]
 from docx.opc.exceptions import PackageNotFoundError  # pyright: ignore[reportMissingImports]
+from docx.opc.constants import RELATIONSHIP_TYPE as RT  # pyright: ignore[reportMissingImports]
+from docx.oxml.ns import qn  # pyright: ignore[reportMissingImports]
+from io import BytesIO
 import json
 
 
-def merge_docx_files(docx_files, output_path):
+# 元素上引用关系（图片、超链接等）的属性
+_REL_ATTRS = (qn('r:embed'), qn('r:id'), qn('r:link'))
+_DOC_PR = qn('wp:docPr')
+
+
+def merge_docx_files(docx_files, output_path, engine="stream"):
     """
-    合并多个 Word 文档，使用 docxcompose 保持样式一致性
+    合并多个 Word 文档，每页之间添加分页符
     
-    特点：
-    - 使用分节符（Section Break）而不是简单的分页符
-    - 保留所有格式（字体、颜色、表格样式、图片等）
-    - 自动处理样式冲突
-    - 每页独立成一节
+    合并方式:
+    - stream（默认）: 流式合并（见 docx_merge.py），样式、编号、图片按内容哈希去重，
+      耗时与页数成线性关系，内存占用与页数无关
+    - docxcompose: 使用 docxcompose 逐个追加，每次追加都会重新处理样式和关系，页数多时较慢
+    
+    失败时依次回退到 docxcompose 和基础合并方法。
     """
     if not docx_files:
         return False
     
+    if engine == "stream":
+        try:
+            from docx_merge import stream_merge_docx
+            return stream_merge_docx(docx_files, output_path)
+        except Exception as e:
+            print(f"流式合并失败: {e}，尝试 docxcompose")
+    
+    return _merge_docx_compose(docx_files, output_path)
+
+
+def _merge_docx_compose(docx_files, output_path):
+    """
+    使用 docxcompose 合并，保持样式一致性
+    
+    特点：
+    - 保留所有格式（字体、颜色、表格样式、图片等）
+    - 自动处理样式冲突
+    """
     try:
         from docxcompose.composer import Composer  # pyright: ignore[reportMissingImports]
         
@@ -61,28 +91,44 @@ def merge_docx_files(docx_files, output_path):
 def _merge_docx_basic(docx_files, output_path):
     """
     基础合并方法（备用）
-    使用 XML 元素复制
+    
+    直接把各页解析后的正文元素移动到主文档（不做深拷贝），每页的图片、超链接等关系
+    一次性重新映射；相同图片（重复的 logo、印章）按内容哈希只保存一份。
     """
     if not docx_files:
         return False
     
-    from copy import deepcopy
-    
     # 创建主文档
     merged_doc = Document(docx_files[0])
+    body = merged_doc.element.body
+    docpr_ids = [int(x) for x in body.xpath('.//wp:docPr/@id') if str(x).isdigit()]
+    next_docpr_id = max(docpr_ids, default=0) + 1
     
     # 添加其他文档
     for docx_file in docx_files[1:]:
         try:
             doc = Document(docx_file)
+            rel_map = _map_relationships(doc.part, merged_doc.part)
             
             # 添加分页符
             merged_doc.add_page_break()
             
-            # 复制 XML 元素
-            for element in doc.element.body:
-                element_copy = deepcopy(element)
-                merged_doc.element.body.append(element_copy)
+            # 移动 XML 元素（插入到文档末节属性之前）
+            for element in list(doc.element.body):
+                if element.tag == qn('w:sectPr'):
+                    continue
+                for node in element.iter():
+                    for attr in _REL_ATTRS:
+                        rid = node.get(attr)
+                        if rid in rel_map:
+                            node.set(attr, rel_map[rid])
+                    if node.tag == _DOC_PR:
+                        node.set('id', str(next_docpr_id))
+                        next_docpr_id += 1
+                if body.sectPr is not None:
+                    body.sectPr.addprevious(element)
+                else:
+                    body.append(element)
                         
         except Exception as e:
             print(f"警告: 无法合并 {docx_file}: {e}")
@@ -91,26 +137,326 @@ def _merge_docx_basic(docx_files, output_path):
     return True
 
 
-def merge_markdown_files(md_files, output_path):
-    """合并多个 Markdown 文件"""
+def _map_relationships(src_part, dst_part):
+    """
+    将 src_part 的图片、超链接等关系一次性映射到 dst_part
+    
+    Returns:
+        {原 rId: 新 rId}
+    """
+    rel_map = {}
+    for rid, rel in src_part.rels.items():
+        if rel.is_external:
+            rel_map[rid] = dst_part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+        elif rel.reltype == RT.IMAGE:
+            # get_or_add_image 按 SHA1 去重
+            rel_map[rid], _ = dst_part.get_or_add_image(BytesIO(rel.target_part.blob))
+        elif rel.reltype in (RT.HYPERLINK, RT.CHART, RT.OLE_OBJECT, RT.DIAGRAM_DATA):
+            rel_map[rid] = dst_part.relate_to(rel.target_part, rel.reltype)
+    return rel_map
+
+
+# Markdown 中指向 PaddleOCR imgs/ 目录的相对路径（src="imgs/..."、](imgs/...)、'./imgs/...'）
+_MD_IMG_LINK = re.compile(rb'(["\'(])(?:\./)?imgs/')
+_MD_IMG_LINK_MAX = len(b'"./imgs/')
+_COPY_CHUNK = 1024 * 1024
+
+
+def merge_markdown_files(md_files, output_path, image_prefix=None):
+    """
+    合并多个 Markdown 文件
+    
+    按块流式复制各页内容，内存占用与文件大小无关。
+    
+    Args:
+        md_files: 按页码排序的分页 Markdown 文件
+        output_path: 合并后的文件
+        image_prefix: 将 imgs/ 开头的图片链接改写为该前缀（如 "../images/extracted/"），
+            None 则原样复制（Linux 上使用 os.sendfile）
+    """
     if not md_files:
         return False
     
-    with open(output_path, 'w', encoding='utf-8') as outfile:
+    replacement = None
+    if image_prefix is not None:
+        prefix = image_prefix.encode('utf-8')
+        
+        def replacement(match):
+            return match.group(1) + prefix
+    
+    with open(output_path, 'wb') as outfile:
         for i, md_file in enumerate(md_files):
             try:
-                with open(md_file, 'r', encoding='utf-8') as infile:
-                    content = infile.read()
+                with open(md_file, 'rb') as infile:
                     if i > 0:
-                        outfile.write(f"\n\n---\n\n# 第 {i+1} 页\n\n")
-                    outfile.write(content)
+                        outfile.write(f"\n\n---\n\n# 第 {i+1} 页\n\n".encode('utf-8'))
+                    if replacement is None:
+                        _copy_into(infile, outfile)
+                    else:
+                        _copy_rewriting(infile, outfile, replacement)
             except Exception as e:
                 print(f"警告: 无法读取 {md_file}: {e}")
     
     return True
 
 
-def organize_output_directory(output_dir):
+def _copy_into(infile, outfile):
+    """把 infile 剩余内容追加到 outfile，优先使用 os.sendfile（零拷贝）"""
+    outfile.flush()
+    if hasattr(os, 'sendfile'):
+        try:
+            in_fd, out_fd = infile.fileno(), outfile.fileno()
+            offset = 0
+            while True:
+                sent = os.sendfile(out_fd, in_fd, offset, _COPY_CHUNK)
+                if sent == 0:
+                    break
+                offset += sent
+            outfile.seek(0, os.SEEK_END)
+            return
+        except OSError:
+            # 部分文件系统不支持 sendfile，从已复制位置继续
+            infile.seek(offset)
+            outfile.seek(0, os.SEEK_END)
+    shutil.copyfileobj(infile, outfile, _COPY_CHUNK)
+
+
+def _copy_rewriting(infile, outfile, replacement):
+    """
+    按块复制并改写图片链接
+    
+    块末尾可能被截断的链接留到下一块再处理，避免跨块的链接漏改。
+    """
+    carry = b''
+    while True:
+        chunk = infile.read(_COPY_CHUNK)
+        buf = carry + chunk
+        if not chunk:
+            outfile.write(_MD_IMG_LINK.sub(replacement, buf))
+            return
+        cut = max(0, len(buf) - _MD_IMG_LINK_MAX + 1)
+        # 可能跨过截断点的链接从其起始字符处截断
+        for j in range(max(0, cut - _MD_IMG_LINK_MAX + 1), cut):
+            if buf[j] in b'"\'(':
+                cut = j
+                break
+        outfile.write(_MD_IMG_LINK.sub(replacement, buf[:cut]))
+        carry = buf[cut:]
+
+
+# 中断恢复用的日志文件和暂存目录（与输出目录在同一文件系统，保证 rename 原子性）
+_JOURNAL_NAME = ".organize_journal.json"
+_STAGING_NAME = ".final.tmp"
+_BACKUP_NAME = ".final.old"
+
+
+def _move_file(src, dst):
+    """移动文件或目录：同一文件系统内直接 rename，跨文件系统时回退到 shutil.move"""
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(str(src), str(dst))
+
+
+class _OrganizeJournal:
+    """
+    整理进度日志
+    
+    记录本次整理的分页文件清单和已完成的步骤，每次更新都先写临时文件再 rename，
+    中断后重新运行时跳过已完成的合并。
+    """
+    
+    def __init__(self, output_path):
+        self.path = Path(output_path) / _JOURNAL_NAME
+        self.data = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError):
+                self.data = {}
+    
+    @property
+    def resumed(self):
+        return bool(self.data)
+    
+    def done(self, step):
+        return step in self.data.get("steps", [])
+    
+    def mark(self, step):
+        steps = self.data.setdefault("steps", [])
+        if step not in steps:
+            steps.append(step)
+        self.save()
+    
+    def save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+    
+    def clear(self):
+        if self.path.exists():
+            self.path.unlink()
+
+
+class _OutputIndex:
+    """
+    输出目录的文件索引
+    
+    用一次 os.scandir 遍历把目录下的文件分类（分页 docx/md、图片、调试文件等），
+    批量检测和整理共用同一份索引，避免对同一目录反复 glob（网络文件系统上元数据调用很慢）。
+    """
+    
+    def __init__(self, output_path):
+        self.path = Path(output_path)
+        self.docx_pages = []    # [(页码, 文件名)]，按页码排序
+        self.md_pages = []
+        self.images = []        # *.png
+        self.json_files = []
+        self.tex_files = []
+        self.split_docx = 0     # 文件名含下划线的 docx 数量
+        self.has_imgs = False
+        self.has_final = False
+        self.has_staging = False
+        self.has_journal = False
+        
+        prefix = self.path.name + "_"
+        with os.scandir(self.path) as it:
+            for entry in it:
+                name = entry.name
+                if entry.is_dir():
+                    if name == "imgs":
+                        self.has_imgs = True
+                    elif name == "final":
+                        self.has_final = True
+                    elif name in (_STAGING_NAME, _BACKUP_NAME):
+                        self.has_staging = True
+                    continue
+                if name == _JOURNAL_NAME:
+                    self.has_journal = True
+                    continue
+                if name.startswith(".") or not entry.is_file():
+                    continue
+                
+                stem, ext = os.path.splitext(name)
+                if ext == ".docx":
+                    if "_" in stem:
+                        self.split_docx += 1
+                    page_num = _page_number(stem, prefix)
+                    if page_num is not None:
+                        self.docx_pages.append((page_num, name))
+                elif ext == ".md":
+                    page_num = _page_number(stem, prefix)
+                    if page_num is not None:
+                        self.md_pages.append((page_num, name))
+                elif ext == ".png":
+                    self.images.append(name)
+                elif ext == ".json":
+                    self.json_files.append(name)
+                elif ext == ".tex":
+                    self.tex_files.append(name)
+        
+        self.docx_pages.sort(key=lambda x: x[0])
+        self.md_pages.sort(key=lambda x: x[0])
+    
+    def final_has_docx(self):
+        """final/ 中是否已有合并后的 docx"""
+        if not self.has_final:
+            return False
+        with os.scandir(self.path / "final") as it:
+            return any(entry.name.endswith(".docx") for entry in it)
+    
+    def needs_organize(self):
+        """有分页文件且未合并，或上次整理被中断"""
+        if self.has_journal or self.has_staging:
+            return True
+        return self.split_docx > 0 and not self.final_has_docx()
+
+
+def _page_number(stem, prefix):
+    """从 文件名_页码 形式的文件名中取出页码，不匹配时返回 None"""
+    if not stem.startswith(prefix):
+        return None
+    page_num = stem.rsplit('_', 1)[-1]
+    return int(page_num) if page_num.isdigit() else None
+
+
+def _link_into(src, dst):
+    """把 src 以硬链接（失败时复制）放到 dst，不改动 src"""
+    if src.is_dir():
+        shutil.copytree(str(src), str(dst), copy_function=_link_or_copy)
+    else:
+        _link_or_copy(str(src), str(dst))
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+
+def _commit_staging(staging_dir, final_dir, journal=None):
+    """
+    将暂存目录提交为 final/
+    
+    旧 final/ 中暂存目录没有的文件以硬链接带入暂存目录（旧 final/ 保持不变），然后
+    旧 final/ 改名为备份目录 -> 暂存目录改名为 final/ -> 删除备份。两次 rename 之间
+    final/ 短暂不存在，但旧版本完整保留在备份目录中；备份路径先写入日志，
+    中断后由 _recover_commit 回滚或完成提交。
+    """
+    if not staging_dir.exists():
+        return
+    backup_dir = final_dir.with_name(_BACKUP_NAME)
+    if backup_dir.exists() and not final_dir.exists():
+        # 上次提交在两次 rename 之间中断（未经日志恢复）：先回滚
+        os.replace(backup_dir, final_dir)
+    if final_dir.exists():
+        for item in list(final_dir.iterdir()):
+            if not (staging_dir / item.name).exists():
+                _link_into(item, staging_dir / item.name)
+    
+    if journal is not None:
+        journal.data["commit"] = {"backup": backup_dir.name}
+        journal.save()
+    if final_dir.exists():
+        if backup_dir.exists():
+            shutil.rmtree(backup_dir)
+        os.replace(final_dir, backup_dir)
+    os.replace(staging_dir, final_dir)
+    if backup_dir.exists():
+        shutil.rmtree(backup_dir)
+
+
+def _recover_commit(output_path, journal):
+    """
+    根据日志中记录的备份目录恢复被中断的提交
+    
+    - 备份存在、final/ 不存在：第一次 rename 之后中断，备份改回 final/（回滚），稍后重新提交
+    - 备份存在、final/ 也存在：提交已完成，只差删除备份
+    """
+    commit = journal.data.get("commit")
+    if not commit:
+        return
+    backup_dir = output_path / commit["backup"]
+    final_dir = output_path / "final"
+    if backup_dir.exists():
+        if final_dir.exists():
+            shutil.rmtree(backup_dir)
+        else:
+            print("检测到未完成的提交，恢复原 final/ 目录")
+            os.replace(backup_dir, final_dir)
+    journal.data.pop("commit")
+    journal.save()
+
+
+def organize_output_directory(output_dir, index=None):
     """
     整理输出目录结构
     
@@ -128,6 +474,14 @@ def organize_output_directory(output_dir):
         └── debug/              # 调试信息
             ├── json/
             └── tex/
+    
+    合并结果先写入暂存目录 .final.tmp/，全部完成后与 final/ 交换（旧版本先改名为备份 .final.old/）；
+    分页文件和图片等用 rename 移动。进度和备份路径记录在 .organize_journal.json 中，
+    中断后重新运行会先恢复未完成的提交，再从上次完成的步骤继续。
+    
+    Args:
+        output_dir: 输出目录
+        index: 已有的目录索引（批量整理时由检测阶段传入，避免重复扫描）
     """
     output_path = Path(output_dir)
     
@@ -139,11 +493,18 @@ def organize_output_directory(output_dir):
     
     # 创建子目录
     final_dir = output_path / "final"
+    staging_dir = output_path / _STAGING_NAME
     pages_dir = output_path / "pages"
     images_dir = output_path / "images"
     debug_dir = output_path / "debug"
     
-    final_dir.mkdir(exist_ok=True)
+    # 分页文件清单：续跑时以日志为准（分页文件可能已被移入 pages/）
+    journal = _OrganizeJournal(output_path)
+    if journal.resumed:
+        print("检测到未完成的整理，继续上次进度")
+        _recover_commit(output_path, journal)
+    
+    staging_dir.mkdir(exist_ok=True)
     pages_dir.mkdir(exist_ok=True)
     images_dir.mkdir(exist_ok=True)
     (debug_dir / "json").mkdir(parents=True, exist_ok=True)
@@ -152,83 +513,74 @@ def organize_output_directory(output_dir):
     # 获取基础文件名
     base_name = output_path.name
     
-    # 收集所有文件
-    docx_files = []
-    md_files = []
-    
-    # 扫描并分类文件
-    for file in sorted(output_path.glob(f"{base_name}_*.docx")):
-        page_num = file.stem.split('_')[-1]
-        if page_num.isdigit():
-            docx_files.append((int(page_num), file))
+    if index is None:
+        index = _OutputIndex(output_path)
     
-    for file in sorted(output_path.glob(f"{base_name}_*.md")):
-        page_num = file.stem.split('_')[-1]
-        if page_num.isdigit():
-            md_files.append((int(page_num), file))
-    
-    # 按页码排序
-    docx_files.sort(key=lambda x: x[0])
-    md_files.sort(key=lambda x: x[0])
+    if not journal.resumed:
+        journal.data = {
+            "docx": index.docx_pages,
+            "md": index.md_pages,
+            "steps": [],
+        }
+        journal.save()
+    docx_files = [(n, output_path / name) for n, name in journal.data.get("docx", [])]
+    md_files = [(n, output_path / name) for n, name in journal.data.get("md", [])]
     
     print(f"找到 {len(docx_files)} 个 Word 文档")
     print(f"找到 {len(md_files)} 个 Markdown 文档")
     
     # 合并 Word 文档
-    if docx_files:
+    if docx_files and not journal.done("docx_merged"):
         print("正在合并 Word 文档...")
         docx_paths = [f[1] for f in docx_files]
-        final_docx = final_dir / f"{base_name}.docx"
+        final_docx = staging_dir / f"{base_name}.docx"
         
         if merge_docx_files(docx_paths, final_docx):
-            print(f"✓ Word 文档已合并: {final_docx}")
-            
-            # 移动分页文档
-            for i, (page_num, file) in enumerate(docx_files):
-                target = pages_dir / f"page_{page_num}.docx"
-                shutil.copy2(file, target)
-                file.unlink()  # 删除原文件
+            print(f"✓ Word 文档已合并: {final_dir / final_docx.name}")
+            journal.mark("docx_merged")
+    
+    # 移动分页文档（仅在合并成功后）
+    if journal.done("docx_merged"):
+        for page_num, file in docx_files:
+            if file.exists():
+                _move_file(file, pages_dir / f"page_{page_num}.docx")
     
     # 合并 Markdown 文档
-    if md_files:
+    if md_files and not journal.done("md_merged"):
         print("正在合并 Markdown 文档...")
         md_paths = [f[1] for f in md_files]
-        final_md = final_dir / f"{base_name}.md"
+        final_md = staging_dir / f"{base_name}.md"
         
-        if merge_markdown_files(md_paths, final_md):
-            print(f"✓ Markdown 文档已合并: {final_md}")
-            
-            # 移动分页文档
-            for i, (page_num, file) in enumerate(md_files):
-                target = pages_dir / f"page_{page_num}.md"
-                shutil.copy2(file, target)
-                file.unlink()  # 删除原文件
+        if merge_markdown_files(md_paths, final_md, image_prefix="../images/extracted/"):
+            print(f"✓ Markdown 文档已合并: {final_dir / final_md.name}")
+            journal.mark("md_merged")
+    
+    if journal.done("md_merged"):
+        for page_num, file in md_files:
+            if file.exists():
+                _move_file(file, pages_dir / f"page_{page_num}.md")
     
     # 整理图片文件
-    for img_file in output_path.glob("*.png"):
-        if img_file.is_file():
-            shutil.move(str(img_file), str(images_dir / img_file.name))
+    for name in index.images:
+        _move_file(output_path / name, images_dir / name)
     
     # 整理 JSON 文件
-    for json_file in output_path.glob("*.json"):
-        if json_file.is_file():
-            shutil.move(str(json_file), str(debug_dir / "json" / json_file.name))
+    for name in index.json_files:
+        _move_file(output_path / name, debug_dir / "json" / name)
     
     # 整理 TEX 文件
-    for tex_file in output_path.glob("*.tex"):
-        if tex_file.is_file():
-            shutil.move(str(tex_file), str(debug_dir / "tex" / tex_file.name))
+    for name in index.tex_files:
+        _move_file(output_path / name, debug_dir / "tex" / name)
     
     # 移动 imgs 目录
-    imgs_src = output_path / "imgs"
-    if imgs_src.exists():
+    if index.has_imgs:
         imgs_target = images_dir / "extracted"
         if imgs_target.exists():
             shutil.rmtree(imgs_target)
-        shutil.move(str(imgs_src), str(imgs_target))
+        _move_file(output_path / "imgs", imgs_target)
     
     # 创建 README
-    readme_path = final_dir / "README.txt"
+    readme_path = staging_dir / "README.txt"
     with open(readme_path, 'w', encoding='utf-8') as f:
         f.write(f"""
 ==============================================
@@ -267,6 +619,10 @@ debug/
 ==============================================
 """)
     
+    # 提交 final/ 并清除日志
+    _commit_staging(staging_dir, final_dir, journal)
+    journal.clear()
+    
     print(f"\n✓ 整理完成！")
     print(f"  最终文档: {final_dir}")
     print(f"  - Word: {final_dir / f'{base_name}.docx'}")
@@ -275,26 +631,39 @@ debug/
     return True
 
 
-def organize_all_outputs(base_dir="output"):
-    """批量整理指定目录下的所有输出"""
+def _organize_one(output_dir, index=None):
+    """工作线程/进程入口，返回 (成功与否, 错误信息)"""
+    try:
+        organize_output_directory(output_dir, index)
+        return True, None
+    except Exception as e:
+        return False, str(e)
+
+
+def organize_all_outputs(base_dir="output", workers=1, use_processes=False):
+    """
+    批量整理指定目录下的所有输出
+    
+    Args:
+        base_dir: 包含多个输出目录的根目录
+        workers: 并发数（<= 0 则使用 CPU 核数，1 为逐个整理）
+        use_processes: 使用进程池而不是线程池（合并页数很多时可绕开 GIL）
+    """
     base_path = Path(base_dir)
     
     if not base_path.exists():
         print(f"目录不存在: {base_dir}")
         return
     
-    # 找到所有需要整理的目录
-    dirs_to_organize = []
-    
-    for item in base_path.iterdir():
-        if item.is_dir():
-            # 检查是否有分页的 docx 文件
-            docx_files = list(item.glob("*_*.docx"))
-            final_dir = item / "final"
-            
-            # 如果有分页文件，且 final 目录不存在或为空
-            if docx_files and (not final_dir.exists() or not list(final_dir.glob("*.docx"))):
-                dirs_to_organize.append(item)
+    # 找到所有需要整理的目录（每个子目录只扫描一次，索引直接交给整理步骤）
+    indexes = {}
+    with os.scandir(base_path) as it:
+        for entry in it:
+            if entry.is_dir():
+                index = _OutputIndex(entry.path)
+                if index.needs_organize():
+                    indexes[entry.name] = index
+    dirs_to_organize = [base_path / name for name in sorted(indexes)]
     
     if not dirs_to_organize:
         print("✓ 所有输出目录已整理完成，无需处理")
@@ -304,21 +673,44 @@ def organize_all_outputs(base_dir="output"):
     for d in dirs_to_organize:
         print(f"  - {d.name}")
     
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(dirs_to_organize))
+    
     print(f"\n开始整理...\n")
     print("=" * 60)
     
     success_count = 0
-    for i, output_dir in enumerate(dirs_to_organize, 1):
-        print(f"\n[{i}/{len(dirs_to_organize)}] {output_dir.name}")
-        print("-" * 60)
-        
-        try:
-            organize_output_directory(str(output_dir))
-            success_count += 1
-        except Exception as e:
-            print(f"✗ 整理失败: {e}")
-        
-        print("-" * 60)
+    if workers == 1:
+        for i, output_dir in enumerate(dirs_to_organize, 1):
+            print(f"\n[{i}/{len(dirs_to_organize)}] {output_dir.name}")
+            print("-" * 60)
+            
+            ok, error = _organize_one(str(output_dir), indexes[output_dir.name])
+            if ok:
+                success_count += 1
+            else:
+                print(f"✗ 整理失败: {error}")
+            
+            print("-" * 60)
+    else:
+        mode = "进程" if use_processes else "线程"
+        print(f"并发整理: {workers} 个{mode}")
+        executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_cls(max_workers=workers) as executor:
+            futures = {executor.submit(_organize_one, str(d), indexes[d.name]): d
+                       for d in dirs_to_organize}
+            for i, future in enumerate(as_completed(futures), 1):
+                name = futures[future].name
+                try:
+                    ok, error = future.result()
+                except Exception as e:
+                    ok, error = False, str(e)
+                if ok:
+                    success_count += 1
+                    print(f"[{i}/{len(dirs_to_organize)}] ✓ {name}")
+                else:
+                    print(f"[{i}/{len(dirs_to_organize)}] ✗ {name} 整理失败: {error}")
     
     print("=" * 60)
     print(f"\n整理完成！")
@@ -335,12 +727,16 @@ def main():
                         help='输出目录路径（单个目录或包含多个输出的根目录，默认: output）')
     parser.add_argument('--batch', action='store_true',
                         help='批量整理模式：整理指定目录下的所有输出子目录')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='批量模式下的并发数（0 表示使用 CPU 核数，默认: 1）')
+    parser.add_argument('--processes', action='store_true',
+                        help='批量模式下使用进程池（默认使用线程池）')
     
     args = parser.parse_args()
     
     if args.batch:
         # 批量整理
-        organize_all_outputs(args.output_dir)
+        organize_all_outputs(args.output_dir, workers=args.workers, use_processes=args.processes)
     else:
         # 单个目录整理
         organize_output_directory(args.output_dir)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量转换结果日志
+每个文件完成时立即追加一行 JSONL（耗时、页数、PDF 哈希、参数哈希），
+中断后以 --resume 重新运行时跳过已成功且哈希一致的文件
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """流式计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_hash(settings: dict) -> str:
+    """识别参数的规范化哈希（键排序，与书写顺序无关）"""
+    canonical = json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResultsLog:
+    """
+    追加写入的转换结果日志（与 V2 的 ResultsLog 接口相同）
+    
+    每行一条记录: {"time", "input", "status", "error", "outputs", "duration", "pages",
+    "pdf_hash", "settings_hash", "fallback"}
+    
+    续跑检查时计算过的 PDF 哈希会被记住，追加记录时不再重复计算。
+    """
+    
+    def __init__(self, log_file, settings_digest: str):
+        """
+        Args:
+            log_file: 日志文件路径
+            settings_digest: 本次批量转换的参数哈希
+        """
+        self.path = Path(log_file)
+        self.settings_digest = settings_digest
+        self._hashes = {}
+    
+    def latest(self) -> dict:
+        """
+        每个文件的最后一条记录（成功或失败），用于汇总整个批次（包括续跑前已完成的文件）
+        
+        Returns:
+            {输入文件绝对路径: 记录}
+        """
+        records = {}
+        if not self.path.exists():
+            return records
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 中断时可能留下半行
+                    continue
+                if record.get('input'):
+                    records[record['input']] = record
+        return records
+    
+    def completed(self) -> dict:
+        """
+        读取已成功的记录（同一文件以最后一条为准，失败记录会覆盖之前的成功记录）
+        
+        Returns:
+            {输入文件绝对路径: 记录}
+        """
+        return {path: record for path, record in self.latest().items() if record.get('status') == 'success'}
+    
+    def is_done(self, record, pdf_path: Path, pdf_hash=None) -> bool:
+        """
+        记录是否表明该文件已用相同参数成功转换（PDF 内容未变、Word 文档仍在）
+        
+        Args:
+            record: completed() 中该文件的记录
+            pdf_path: PDF 文件路径
+            pdf_hash: 已计算的 PDF 内容哈希（None 则现场计算）
+        """
+        if not record or record.get('settings_hash') != self.settings_digest:
+            return False
+        docx = (record.get('outputs') or {}).get('docx')
+        if not docx or not Path(docx).exists():
+            return False
+        return record.get('pdf_hash') == self._pdf_hash(Path(pdf_path), pdf_hash)
+    
+    def append(self, result: dict, pdf_hash=None):
+        """
+        追加一条 convert_pdf 结果并立即落盘
+        
+        Args:
+            result: convert_pdf 的返回值
+            pdf_hash: 已计算的 PDF 内容哈希（None 则使用结果中的 pdf_hash、续跑检查时的哈希或现场计算）
+        """
+        pdf_path = Path(result['input'])
+        record = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'input': str(pdf_path.resolve()),
+            'status': result['status'],
+            'error': result.get('error'),
+            'outputs': {k: str(Path(v).resolve()) for k, v in result.get('outputs', {}).items()},
+            'duration': round(result.get('duration', 0), 3),
+            'pages': result.get('pages'),
+            'pdf_hash': self._pdf_hash(pdf_path, pdf_hash or result.get('pdf_hash')),
+            'settings_hash': self.settings_digest,
+            # V1 流水线没有 fallback 配置，保留字段便于与 V2 日志统一处理
+            'fallback': False,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _pdf_hash(self, pdf_path: Path, pdf_hash=None):
+        key = str(pdf_path.resolve())
+        if pdf_hash:
+            self._hashes[key] = pdf_hash
+        elif key not in self._hashes:
+            if not pdf_path.exists():
+                return None
+            self._hashes[key] = file_sha256(pdf_path)
+        return self._hashes[key]
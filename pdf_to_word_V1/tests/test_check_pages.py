@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""check_pages 的流式统计与 python-docx 的统计结果一致"""
+
+import copy
+
+import pytest
+
+pytest.importorskip('docx')
+
+from docx import Document  # noqa: E402
+from docx.enum.section import WD_SECTION  # noqa: E402
+from docx.enum.text import WD_BREAK  # noqa: E402
+from docx.oxml import parse_xml  # noqa: E402
+from docx.oxml.ns import nsdecls  # noqa: E402
+
+from check_pages import _TextLength, compare_docx_files, count_docx_content  # noqa: E402
+
+
+def docx_stats(path):
+    """原 python-docx 实现的统计口径"""
+    doc = Document(str(path))
+    return {
+        'paragraphs': len(doc.paragraphs),
+        'tables': len(doc.tables),
+        'text_length': len('\n'.join(p.text for p in doc.paragraphs).strip()),
+        'section_breaks': len(doc.sections) - 1,
+    }
+
+
+def _make_docx(path):
+    doc = Document()
+    doc.add_paragraph("")
+    doc.add_paragraph("  　 ")
+    p = doc.add_paragraph("  首段  ")
+    p.add_run("\t制表\t").add_break()
+    p.add_run("换行后").add_break(WD_BREAK.PAGE)
+    p.add_run(" 分页后 ")
+
+    # 超链接中的 run 计入段落文本；修订（w:ins）和字段中的 run 不计入
+    p = doc.add_paragraph("链接：")
+    p._p.append(parse_xml(
+        f'<w:hyperlink {nsdecls("w", "r")} r:id="rId99">'
+        f'<w:r><w:t xml:space="preserve"> 链接文本 </w:t></w:r><w:r><w:tab/><w:t>B</w:t></w:r>'
+        f'</w:hyperlink>'))
+    p._p.append(parse_xml(f'<w:ins {nsdecls("w")} w:id="1" w:author="a"><w:r><w:t>修订</w:t></w:r></w:ins>'))
+    p._p.append(parse_xml(f'<w:fldSimple {nsdecls("w")} w:instr="PAGE"><w:r><w:t>1</w:t></w:r></w:fldSimple>'))
+    p.add_run().add_text("x\ny")
+
+    table = doc.add_table(rows=2, cols=2)
+    table.cell(0, 0).text = "表格文本不计入"
+    nested = table.cell(1, 1).add_table(rows=1, cols=1)
+    nested.cell(0, 0).text = "嵌套表格"
+
+    doc.add_paragraph("第一节末尾")
+    doc.add_section(WD_SECTION.NEW_PAGE)
+    doc.add_paragraph("第二节　")
+    doc.add_section(WD_SECTION.CONTINUOUS)
+
+    # 正文中的内容控件（w:sdt）不属于顶层段落
+    sdt = parse_xml(f'<w:sdt {nsdecls("w")}><w:sdtContent><w:p><w:r><w:t>控件</w:t></w:r></w:p>'
+                    f'</w:sdtContent></w:sdt>')
+    doc.element.body.insert(len(doc.element.body) - 1, sdt)
+    doc.add_paragraph("   ")
+    doc.add_paragraph("")
+    doc.save(str(path))
+    return path
+
+
+def test_streaming_stats_match_python_docx(tmp_path):
+    path = _make_docx(tmp_path / "mixed.docx")
+    stats = count_docx_content(path)
+    expected = docx_stats(path)
+    assert {k: stats[k] for k in expected} == expected
+    assert expected['tables'] == 1 and expected['section_breaks'] == 2
+    assert stats['page_breaks'] == 1
+
+
+def test_streaming_stats_match_on_whitespace_only_document(tmp_path):
+    doc = Document()
+    for text in ("", " ", "\t"):
+        doc.add_paragraph(text)
+    path = tmp_path / "blank.docx"
+    doc.save(str(path))
+    expected = docx_stats(path)
+    assert {k: count_docx_content(path)[k] for k in expected} == expected
+
+
+@pytest.mark.parametrize('pieces', [
+    [],
+    ["", "  ", "\n"],
+    ["  a", " ", "\n", "b  ", "　"],
+    ["\n", "\t", "x", "\n", "\n", "y", " ", ""],
+    ["中文", "  ", "　", "文本"],
+])
+def test_text_length_matches_strip(pieces):
+    text = _TextLength()
+    for piece in pieces:
+        text.feed(piece)
+    assert text.length == len(''.join(pieces).strip())
+
+
+def test_compare_docx_files_reports_each_document(tmp_path, capsys):
+    path = _make_docx(tmp_path / "a.docx")
+    doc = Document(str(path))
+    body = doc.element.body
+    body.insert(0, copy.deepcopy(body[2]))
+    doc.save(str(tmp_path / "b.docx"))
+
+    compare_docx_files(tmp_path, workers=1)
+    out = capsys.readouterr().out
+    for name in ("a.docx", "b.docx"):
+        stats = docx_stats(tmp_path / name)
+        row = next(line for line in out.splitlines() if line.startswith(name))
+        assert row.split()[2:5] == [str(stats['paragraphs']), str(stats['tables']), str(stats['text_length'])]
+        assert row.split()[6] == str(stats['section_breaks'])
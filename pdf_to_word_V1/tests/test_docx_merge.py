@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""流式 DOCX 合并：样式、编号、图片、页眉页脚在合并后保持有效"""
+
+import io
+import posixpath
+import zipfile
+from copy import deepcopy
+
+import pytest
+
+pytest.importorskip('docx')
+
+from docx import Document  # noqa: E402
+from docx.opc.constants import RELATIONSHIP_TYPE as RT  # noqa: E402
+from docx.oxml.ns import qn  # noqa: E402
+from docx.shared import Pt  # noqa: E402
+from lxml import etree  # noqa: E402
+
+from docx_merge import PKG_REL_NS, R_NS, stream_merge_docx  # noqa: E402
+
+
+def _png(shade=200) -> bytes:
+    fitz = pytest.importorskip('fitz')
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 4, 4), False)
+    pix.clear_with(shade)
+    return pix.tobytes('png')
+
+
+def _numbering(doc):
+    return doc.part.part_related_by(RT.NUMBERING).element
+
+
+def _add_list(doc, fmt: str):
+    """新增一个编号定义并用于一个段落"""
+    numbering = _numbering(doc)
+    abstract = deepcopy(numbering.find(qn('w:abstractNum')))
+    abstract.set(qn('w:abstractNumId'), '40')
+    abstract.find(f"{qn('w:lvl')}/{qn('w:numFmt')}").set(qn('w:val'), fmt)
+    numbering.findall(qn('w:abstractNum'))[-1].addnext(abstract)
+    num = etree.SubElement(numbering, qn('w:num'), {qn('w:numId'): '30'})
+    etree.SubElement(num, qn('w:abstractNumId'), {qn('w:val'): '40'})
+
+    p = doc.add_paragraph(f"list item {fmt}")
+    num_pr = p._p.get_or_add_pPr().get_or_add_numPr()
+    num_pr.get_or_add_ilvl().val = 0
+    num_pr.get_or_add_numId().val = 30
+
+
+def _make(path, text, image=None, normal_size=None, list_fmt=None, header=None, header_image=None,
+          header_link=None):
+    doc = Document()
+    if normal_size:
+        doc.styles['Normal'].font.size = Pt(normal_size)
+    doc.add_paragraph(text)
+    doc.add_paragraph(text, style='Heading 1')
+    if image:
+        doc.add_picture(io.BytesIO(image))
+    if list_fmt:
+        _add_list(doc, list_fmt)
+    if header:
+        paragraph = doc.sections[0].header.paragraphs[0]
+        paragraph.text = header
+        if header_image:
+            paragraph.add_run().add_picture(io.BytesIO(header_image))
+        if header_link:
+            part = doc.sections[0].header.part
+            rid = part.relate_to(header_link, RT.HYPERLINK, is_external=True)
+            link = etree.SubElement(paragraph._p, qn('w:hyperlink'), {qn('r:id'): rid})
+            etree.SubElement(etree.SubElement(link, qn('w:r')), qn('w:t')).text = header_link
+    doc.save(str(path))
+    return path
+
+
+def _rels(zf, part):
+    folder, name = posixpath.split(part)
+    rels_name = posixpath.join(folder, '_rels', name + '.rels') if part else '_rels/.rels'
+    if rels_name not in zf.namelist():
+        return {}
+    rels = {}
+    for rel in etree.fromstring(zf.read(rels_name)).iter('{%s}Relationship' % PKG_REL_NS):
+        target = rel.get('Target')
+        if rel.get('TargetMode') != 'External':
+            target = posixpath.normpath(posixpath.join(folder, target))
+        rels[rel.get('Id')] = (rel.get('TargetMode'), target)
+    return rels
+
+
+def _check_package(path):
+    """每个部件的关系目标都存在、引用的关系都有定义，且没有未被引用的部件"""
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        names = set(zf.namelist())
+        reachable = set()
+        stack = ['']
+        while stack:
+            part = stack.pop()
+            rels = _rels(zf, part)
+            if part.endswith('.xml'):
+                root = etree.fromstring(zf.read(part))
+                for node in root.iter():
+                    for attr in ('embed', 'id', 'link'):
+                        rid = node.get('{%s}%s' % (R_NS, attr))
+                        if rid:
+                            assert rid in rels, (part, rid)
+            for mode, target in rels.values():
+                if mode == 'External':
+                    continue
+                assert target in names, (part, target)
+                if target not in reachable:
+                    reachable.add(target)
+                    stack.append(target)
+        parts = {n for n in names if not n.endswith('.rels') and n != '[Content_Types].xml'}
+        assert parts == reachable, parts - reachable
+
+    doc = Document(str(path))
+    body = doc.element.body
+    ids = body.xpath('.//wp:docPr/@id')
+    assert len(ids) == len(set(ids))
+    styles = doc.styles.element
+    style_ids = {s.get(qn('w:styleId')) for s in styles.findall(qn('w:style'))}
+    for tag in ('w:pStyle', 'w:rStyle', 'w:tblStyle'):
+        for node in body.iter(qn(tag)):
+            assert node.get(qn('w:val')) in style_ids
+    for style in styles.findall(qn('w:style')):
+        for tag in ('w:basedOn', 'w:next', 'w:link'):
+            link = style.find(qn(tag))
+            if link is not None:
+                assert link.get(qn('w:val')) in style_ids
+    defaults = [s for s in styles.findall(qn('w:style'))
+                if s.get(qn('w:type')) == 'paragraph' and s.get(qn('w:default')) == '1']
+    assert len(defaults) == 1
+    return doc
+
+
+def _list_format(doc, paragraph):
+    numbering = _numbering(doc)
+    num_id = paragraph._p.pPr.numPr.numId.val
+    num = next(n for n in numbering.findall(qn('w:num')) if n.get(qn('w:numId')) == str(num_id))
+    abstract_id = num.find(qn('w:abstractNumId')).get(qn('w:val'))
+    abstract = next(a for a in numbering.findall(qn('w:abstractNum')) if a.get(qn('w:abstractNumId')) == abstract_id)
+    return abstract.find(f"{qn('w:lvl')}/{qn('w:numFmt')}").get(qn('w:val'))
+
+
+def test_same_template_pages_share_styles_and_images(tmp_path):
+    png = _png()
+    a = _make(tmp_path / "a.docx", "first", image=png)
+    b = _make(tmp_path / "b.docx", "second", image=png)
+    out = tmp_path / "out.docx"
+    assert stream_merge_docx([a, b], out)
+
+    doc = _check_package(out)
+    assert len(doc.styles.element.findall(qn('w:style'))) == len(Document(str(a)).styles.element.findall(qn('w:style')))
+    assert [p.text for p in doc.paragraphs if p.text] == ['first', 'first', 'second', 'second']
+    with zipfile.ZipFile(out) as zf:
+        assert len([n for n in zf.namelist() if n.startswith('word/media/')]) == 1
+
+
+def test_conflicting_styles_are_renamed_with_derived_styles(tmp_path):
+    a = _make(tmp_path / "a.docx", "page one", normal_size=10)
+    b = _make(tmp_path / "b.docx", "page two", normal_size=16)
+    out = tmp_path / "out.docx"
+    stream_merge_docx([a, b], out)
+
+    doc = _check_package(out)
+    first = next(p for p in doc.paragraphs if p.text == 'page one')
+    second = next(p for p in doc.paragraphs if p.text == 'page two')
+    assert first.style.style_id == 'Normal' and first.style.font.size == Pt(10)
+    assert second.style.style_id == 'Normal2' and second.style.font.size == Pt(16)
+    # Heading1 基于 Normal：第二页的 Heading1 一并重命名并指向 Normal2
+    headings = [p for p in doc.paragraphs if p.style.name.lower().startswith('heading 1')]
+    assert headings[0].style.style_id == 'Heading1'
+    assert headings[1].style.style_id == 'Heading12'
+    assert headings[1].style.base_style.style_id == 'Normal2'
+
+
+def test_numbering_is_merged_and_remapped(tmp_path):
+    a = _make(tmp_path / "a.docx", "a", list_fmt='decimal')
+    b = _make(tmp_path / "b.docx", "b", list_fmt='upperRoman')
+    c = _make(tmp_path / "c.docx", "c", list_fmt='decimal')
+    out = tmp_path / "out.docx"
+    stream_merge_docx([a, b, c], out)
+
+    doc = _check_package(out)
+    items = [p for p in doc.paragraphs if p.text.startswith('list item')]
+    assert [_list_format(doc, p) for p in items] == ['decimal', 'upperRoman', 'decimal']
+    assert items[0]._p.pPr.numPr.numId.val == items[2]._p.pPr.numPr.numId.val
+    assert items[0]._p.pPr.numPr.numId.val != items[1]._p.pPr.numPr.numId.val
+
+
+def test_header_parts_keep_their_relationships(tmp_path):
+    a = _make(tmp_path / "a.docx", "a", header="header a", header_image=_png(100),
+              header_link="https://example.com/a")
+    b = _make(tmp_path / "b.docx", "b", header="header b", header_image=_png(50))
+    out = tmp_path / "out.docx"
+    stream_merge_docx([a, b], out)
+
+    # 页眉的图片和超链接关系随页眉复制；只保留第一页的节属性，第二页的页眉不复制
+    doc = _check_package(out)
+    header = doc.sections[0].header
+    assert header.paragraphs[0].text.startswith('header a')
+    assert header.part.rels[header._element.xpath('.//a:blip/@r:embed')[0]].target_part.blob == _png(100)
+    with zipfile.ZipFile(out) as zf:
+        assert len([n for n in zf.namelist() if posixpath.basename(n).startswith('header')
+                    and n.endswith('.xml')]) == 1
+        assert len([n for n in zf.namelist() if n.startswith('word/media/')]) == 1
+
+
+def test_relationships_to_missing_parts_are_dropped(tmp_path):
+    a = _make(tmp_path / "a.docx", "a")
+    b = _make(tmp_path / "b.docx", "b", image=_png())
+    broken = tmp_path / "broken.docx"
+    with zipfile.ZipFile(b) as src, zipfile.ZipFile(broken, 'w') as dst:
+        for item in src.infolist():
+            if not item.filename.startswith('word/media/'):
+                dst.writestr(item, src.read(item.filename))
+    out = tmp_path / "out.docx"
+    stream_merge_docx([a, broken], out)
+
+    doc = _check_package(out)
+    assert not doc.element.body.xpath('.//a:blip/@r:embed')
+    assert [p.text for p in doc.paragraphs if p.text] == ['a', 'a', 'b', 'b']
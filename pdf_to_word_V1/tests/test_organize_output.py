@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""输出目录整理：暂存目录提交与中断恢复"""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip('docx')
+
+from docx import Document  # noqa: E402
+
+import organize_output  # noqa: E402
+from organize_output import (  # noqa: E402
+    _BACKUP_NAME, _JOURNAL_NAME, _STAGING_NAME, _OutputIndex, organize_output_directory,
+)
+
+
+def _make_output(tmp_path, name="合同", pages=3):
+    out = tmp_path / name
+    out.mkdir()
+    for i in range(pages):
+        doc = Document()
+        doc.add_paragraph(f"page {i}")
+        doc.save(str(out / f"{name}_{i}.docx"))
+        (out / f"{name}_{i}.md").write_text(f"page {i}\n", encoding='utf-8')
+    return out
+
+
+def _final_text(out):
+    doc = Document(str(out / "final" / f"{out.name}.docx"))
+    return [p.text for p in doc.paragraphs if p.text]
+
+
+def _old_final(out):
+    """模拟上一次整理留下的 final/（含一个暂存目录中不会有的文件）"""
+    final = out / "final"
+    final.mkdir()
+    (final / f"{out.name}.docx").write_bytes(b"old docx")
+    (final / "notes.txt").write_text("keep me", encoding='utf-8')
+    return final
+
+
+def test_organize_merges_and_commits(tmp_path):
+    out = _make_output(tmp_path)
+    assert organize_output_directory(out)
+
+    assert _final_text(out) == ['page 0', 'page 1', 'page 2']
+    assert (out / "final" / f"{out.name}.md").exists()
+    assert sorted(p.name for p in (out / "pages").iterdir())[:2] == ['page_0.docx', 'page_0.md']
+    for leftover in (_STAGING_NAME, _BACKUP_NAME, _JOURNAL_NAME):
+        assert not (out / leftover).exists()
+    assert not _OutputIndex(out).needs_organize()
+
+
+def test_commit_keeps_files_only_in_old_final(tmp_path):
+    out = _make_output(tmp_path)
+    _old_final(out)
+    organize_output_directory(out)
+    assert _final_text(out) == ['page 0', 'page 1', 'page 2']
+    assert (out / "final" / "notes.txt").read_text(encoding='utf-8') == "keep me"
+
+
+def _crash_on_replace(monkeypatch, target_name):
+    """让 staging -> target_name 的 rename 抛出异常，模拟在两次 rename 之间中断"""
+    real_replace = os.replace
+
+    def replace(src, dst):
+        if os.path.basename(str(src)) == _STAGING_NAME and os.path.basename(str(dst)) == target_name:
+            raise KeyboardInterrupt("crash")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(organize_output.os, 'replace', replace)
+
+
+def test_crash_between_renames_keeps_old_final_and_recovers(tmp_path, monkeypatch):
+    out = _make_output(tmp_path)
+    _old_final(out)
+
+    _crash_on_replace(monkeypatch, "final")
+    with pytest.raises(KeyboardInterrupt):
+        organize_output_directory(out)
+
+    # 旧 final/ 完整保留在备份目录中，日志记录了备份路径
+    assert not (out / "final").exists()
+    assert (out / _BACKUP_NAME / f"{out.name}.docx").read_bytes() == b"old docx"
+    journal = json.loads((out / _JOURNAL_NAME).read_text(encoding='utf-8'))
+    assert journal["commit"] == {"backup": _BACKUP_NAME}
+    assert _OutputIndex(out).needs_organize()
+
+    monkeypatch.undo()
+    organize_output_directory(out)
+    assert _final_text(out) == ['page 0', 'page 1', 'page 2']
+    assert (out / "final" / "notes.txt").exists()
+    for leftover in (_STAGING_NAME, _BACKUP_NAME, _JOURNAL_NAME):
+        assert not (out / leftover).exists()
+
+
+def test_crash_before_backup_removed(tmp_path, monkeypatch):
+    out = _make_output(tmp_path)
+    _old_final(out)
+
+    real_rmtree = organize_output.shutil.rmtree
+
+    def rmtree(path, *args, **kwargs):
+        if os.path.basename(str(path)) == _BACKUP_NAME:
+            raise KeyboardInterrupt("crash")
+        return real_rmtree(path, *args, **kwargs)
+
+    monkeypatch.setattr(organize_output.shutil, 'rmtree', rmtree)
+    with pytest.raises(KeyboardInterrupt):
+        organize_output_directory(out)
+    assert _final_text(out) == ['page 0', 'page 1', 'page 2']
+    assert (out / _BACKUP_NAME).exists()
+
+    monkeypatch.undo()
+    organize_output_directory(out)
+    assert _final_text(out) == ['page 0', 'page 1', 'page 2']
+    assert not (out / _BACKUP_NAME).exists()
+    assert not (out / _JOURNAL_NAME).exists()
+
+
+def test_rollback_without_journal(tmp_path):
+    out = tmp_path / "doc"
+    (out / _BACKUP_NAME).mkdir(parents=True)
+    (out / _BACKUP_NAME / "a.txt").write_text("old", encoding='utf-8')
+    (out / _STAGING_NAME).mkdir()
+    (out / _STAGING_NAME / "b.txt").write_text("new", encoding='utf-8')
+
+    organize_output._commit_staging(out / _STAGING_NAME, out / "final")
+    assert sorted(p.name for p in (out / "final").iterdir()) == ['a.txt', 'b.txt']
+    assert not (out / _BACKUP_NAME).exists()
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 5, 7, 8, 9, 13])
+def test_merge_markdown_rewrites_links_across_chunks(tmp_path, monkeypatch, chunk_size):
+    # 块很小时各种写法的链接都会在不同位置被块边界截断
+    page = ('<img src="imgs/a.png"> ![x](imgs/b.png) ![y](./imgs/c.png) '
+            "<img src='./imgs/d.png'> (imgsx/e.png) \"./img/f.png\" 中文 imgs/g.png\n")
+    md_files = []
+    for i in range(2):
+        md = tmp_path / f"page_{i}.md"
+        md.write_text(page * 3, encoding='utf-8')
+        md_files.append(md)
+    expected = tmp_path / "expected.md"
+    assert organize_output.merge_markdown_files(md_files, expected, "../images/")
+
+    monkeypatch.setattr(organize_output, '_COPY_CHUNK', chunk_size)
+    merged = tmp_path / "merged.md"
+    assert organize_output.merge_markdown_files(md_files, merged, "../images/")
+    assert merged.read_bytes() == expected.read_bytes()
+
+    text = merged.read_text(encoding='utf-8')
+    assert text.count('../images/') == 4 * 6
+    assert 'imgs/' not in text.replace('(imgsx/', '').replace(' imgs/g.png', '')
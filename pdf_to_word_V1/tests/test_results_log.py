@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""结果日志：续跑后按日志汇总整个批次"""
+
+import pytest
+
+from results_log import ResultsLog
+
+
+def make_result(pdf, status='success', error=None):
+    return {'input': str(pdf), 'status': status, 'error': error, 'outputs': {}, 'duration': 1.0}
+
+
+def test_latest_keeps_last_record_per_file(tmp_path):
+    a, b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+    for pdf in (a, b):
+        pdf.write_bytes(b'%PDF-1.4')
+    log = ResultsLog(tmp_path / "results.jsonl", 'settings')
+    log.append(make_result(a, 'failed', '超时'))
+    log.append(make_result(a))
+    log.append(make_result(b))
+    log.append(make_result(b, 'failed', '崩溃'))
+    with open(log.path, 'a', encoding='utf-8') as f:
+        f.write('{"input": "半行')
+
+    latest = log.latest()
+    assert latest[str(a.resolve())]['status'] == 'success'
+    assert latest[str(b.resolve())]['error'] == '崩溃'
+    assert list(log.completed()) == [str(a.resolve())]
+
+
+def test_batch_summary_includes_files_from_earlier_runs(tmp_path):
+    pytest.importorskip('tqdm')
+    import convert
+
+    pdfs = [tmp_path / "in" / f"{name}.pdf" for name in ("a", "b", "c")]
+    pdfs[0].parent.mkdir()
+    for pdf in pdfs:
+        pdf.write_bytes(b'%PDF-1.4')
+    log = ResultsLog(tmp_path / "results.jsonl", 'settings')
+    # 第一次运行：a 成功，b 失败；续跑只转换了 b 和 c
+    log.append(make_result(pdfs[0]))
+    log.append(make_result(pdfs[1], 'failed', '超时'))
+    results = [make_result(pdfs[1]), make_result(pdfs[2], 'failed', '崩溃')]
+    for result in results:
+        log.append(result)
+
+    records = convert.batch_records(str(tmp_path / "in"), results, log)
+    assert [(r['input'], r['status']) for r in records] == [
+        (str(pdfs[0].resolve()), 'success'),
+        (str(pdfs[1].resolve()), 'success'),
+        (str(pdfs[2].resolve()), 'failed'),
+    ]
+    summary = tmp_path / "summary.txt"
+    convert.write_summary(summary, records)
+    text = summary.read_text(encoding='utf-8')
+    assert text.count("状态: success") == 2 and "错误: 崩溃" in text
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+金标准样本回归与性能基准
+对 pdf_data（V2）和 V1 的 pdf_sample_data 中的 PDF 逐个运行 PDFConverter.convert_single
+和 V1 流水线，记录耗时、CPU 时间、峰值内存、页/秒、fallback 使用情况和输出文档结构，
+与 JSON 基线对比：吞吐下降或结构偏差超过阈值时以非零状态退出
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import yaml
+
+
+CURRENT_DIR = Path(__file__).parent.absolute()
+V1_DIR = (CURRENT_DIR / '..' / 'pdf_to_word_V1').resolve()
+
+# 样本集：名称 -> 目录
+GOLDEN_SETS = {
+    'pdf_data': CURRENT_DIR / 'pdf_data',
+    'pdf_sample_data': V1_DIR / 'pdf_sample_data',
+}
+PIPELINES = ('v2', 'v1')
+
+# 参与结构对比的指标（check_pages 统计）
+STRUCTURE_METRICS = ('paragraphs', 'tables', 'text_length')
+
+
+def _peak_rss_kb() -> int:
+    """
+    当前进程与已结束子进程中较大的峰值内存（KB）
+
+    Linux 读取 VmHWM（ru_maxrss 会继承父进程的值）；V1 命令行方式的识别在子进程中进行
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    own = int(line.split()[1])
+                    break
+    except OSError:
+        pass
+    return max(own, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+
+def _cpu_time() -> float:
+    """当前进程及已结束子进程的用户态 + 内核态 CPU 时间"""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def _v2_config() -> Dict[str, Any]:
+    """基准使用的 V2 配置：关闭缓存、调试文件和历史预测，测量的是实际转换"""
+    with open(CURRENT_DIR / 'config.yaml', 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    config['debug'] = {'enable': False, 'verbose': False}
+    config['cache'] = dict(config.get('cache', {}), enable=False)
+    config['page_cache'] = dict(config.get('page_cache', {}), enable=False)
+    config['error_handling'] = dict(config['error_handling'], history_file='')
+    config['sharding'] = dict(config.get('sharding', {}), enable=False)
+    return config
+
+
+def _convert_v2(pdf_path: Path, output_dir: Path) -> Dict[str, Any]:
+    from convert import PDFConverter
+
+    converter = PDFConverter(config=_v2_config())
+    t0, c0 = time.perf_counter(), _cpu_time()
+    result = converter.convert_single(pdf_path, output_dir)
+    return {
+        'wall_time': time.perf_counter() - t0,
+        'cpu_time': _cpu_time() - c0,
+        'success': result['success'],
+        'error': None if result['success'] else result['message'],
+        'fallback': result['use_fallback'],
+        'output': result['output_path'],
+    }
+
+
+def _convert_v1(pdf_path: Path, output_dir: Path) -> Dict[str, Any]:
+    sys.path.insert(0, str(V1_DIR))
+    from convert import convert_pdf, load_config, pipeline_options
+
+    options = pipeline_options(load_config())
+    t0, c0 = time.perf_counter(), _cpu_time()
+    result = convert_pdf(str(pdf_path), str(output_dir), options=options)
+    success = result.get('status') == 'success' and 'docx' in result.get('outputs', {})
+    return {
+        'wall_time': time.perf_counter() - t0,
+        'cpu_time': _cpu_time() - c0,
+        'success': success,
+        'error': None if success else result.get('error', '未生成 Word 文档'),
+        'fallback': None,
+        'output': result.get('outputs', {}).get('docx'),
+    }
+
+
+def _run_one(pipeline: str, pdf_path: str, output_dir: str, queue):
+    """在子进程中运行，导入和模型加载互不影响，峰值内存单独统计"""
+    os.chdir(CURRENT_DIR if pipeline == 'v2' else V1_DIR)
+    convert = _convert_v2 if pipeline == 'v2' else _convert_v1
+    try:
+        measured = convert(Path(pdf_path), Path(output_dir))
+    except Exception as e:
+        measured = {'success': False, 'error': f'{type(e).__name__}: {e}'}
+    measured['peak_rss_mb'] = _peak_rss_kb() / 1024
+    queue.put(measured)
+
+
+def _page_count(pdf_path: Path) -> Optional[int]:
+    try:
+        import fitz  # pyright: ignore[reportMissingImports]
+    except ImportError:
+        return None
+    with fitz.open(str(pdf_path)) as doc:
+        return doc.page_count
+
+
+def _structure(docx_path: Optional[str]) -> Optional[Dict[str, int]]:
+    """用 V1 check_pages 的统计逻辑分析输出文档"""
+    if not docx_path or not Path(docx_path).exists():
+        return None
+    if str(V1_DIR) not in sys.path:
+        sys.path.append(str(V1_DIR))
+    from check_pages import count_docx_content
+    return count_docx_content(docx_path)
+
+
+def collect_pdfs(sets: List[str]) -> List[tuple]:
+    """返回 [(样本名, PDF 路径)]，样本名形如 pdf_sample_data/picture_type/常规2.pdf"""
+    pdfs = []
+    for name in sets:
+        root = GOLDEN_SETS[name]
+        for pdf in sorted(root.rglob('*.pdf')):
+            pdfs.append((f"{name}/{pdf.relative_to(root).as_posix()}", pdf))
+    return pdfs
+
+
+def run_benchmark(pipelines: List[str], sets: List[str], repeat: int = 1) -> Dict[str, Dict[str, Any]]:
+    """
+    逐个样本运行各流水线
+
+    Args:
+        pipelines: 'v2' / 'v1'
+        sets: GOLDEN_SETS 中的样本集名称
+        repeat: 每个样本重复次数，耗时取最小值
+
+    Returns:
+        {"流水线:样本名": 指标}
+    """
+    ctx = multiprocessing.get_context('spawn')
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='golden_bench_') as tmp:
+        for pipeline in pipelines:
+            for sample, pdf_path in collect_pdfs(sets):
+                key = f"{pipeline}:{sample}"
+                print(f"  {key}", flush=True)
+                best = None
+                for i in range(repeat):
+                    output_dir = Path(tmp) / pipeline / str(len(results)) / str(i)
+                    output_dir.mkdir(parents=True)
+                    queue = ctx.Queue()
+                    proc = ctx.Process(target=_run_one, args=(pipeline, str(pdf_path), str(output_dir), queue))
+                    proc.start()
+                    proc.join()
+                    if proc.exitcode != 0 or queue.empty():
+                        measured = {'success': False, 'error': f'子进程异常退出 ({proc.exitcode})'}
+                    else:
+                        measured = queue.get()
+                    measured['structure'] = _structure(measured.pop('output', None)) if measured['success'] else None
+                    if best is None or (measured['success'] and measured['wall_time'] < best.get('wall_time', float('inf'))):
+                        best = measured
+
+                pages = _page_count(pdf_path)
+                best['pages'] = pages
+                if best['success'] and pages:
+                    best['pages_per_sec'] = pages / best['wall_time'] if best['wall_time'] > 0 else None
+                results[key] = best
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    max_slowdown: float = 0.2,
+    max_drift: float = 0.02
+) -> List[str]:
+    """
+    与基线对比
+
+    Args:
+        max_slowdown: 页/秒允许的最大下降比例
+        max_drift: 结构指标（段落、表格、文本长度）允许的最大相对偏差
+
+    Returns:
+        回归问题列表（为空表示通过）；基线中没有的样本不参与对比
+    """
+    problems = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if base is None or not base.get('success'):
+            continue
+        if not cur.get('success'):
+            problems.append(f"{key}: 转换失败 ({cur.get('error')})")
+            continue
+
+        base_rate, cur_rate = base.get('pages_per_sec'), cur.get('pages_per_sec')
+        if base_rate and cur_rate and cur_rate < base_rate * (1 - max_slowdown):
+            problems.append(f"{key}: 吞吐下降 {base_rate:.2f} -> {cur_rate:.2f} 页/秒 "
+                            f"({(1 - cur_rate / base_rate) * 100:.0f}%)")
+        if base.get('fallback') is False and cur.get('fallback'):
+            problems.append(f"{key}: 新增使用 fallback 配置")
+
+        base_struct, cur_struct = base.get('structure') or {}, cur.get('structure') or {}
+        for metric in STRUCTURE_METRICS:
+            if metric not in base_struct:
+                continue
+            b, c = base_struct[metric], cur_struct.get(metric, 0)
+            drift = abs(c - b) / max(b, 1)
+            if drift > max_drift:
+                problems.append(f"{key}: {metric} {b} -> {c} (偏差 {drift * 100:.1f}%)")
+    return problems
+
+
+def print_results(results: Dict[str, Dict[str, Any]]):
+    print(f"\n{'样本':<60} {'耗时(s)':>8} {'CPU(s)':>8} {'内存(MB)':>9} {'页数':>5} {'页/秒':>7} "
+          f"{'fallback':>8} {'段落':>6} {'表格':>5} {'文本长度':>8}")
+    print("-" * 135)
+    for key, r in results.items():
+        if not r.get('success'):
+            print(f"{key:<60} 失败: {r.get('error')}")
+            continue
+        s = r.get('structure') or {}
+        fallback = '-' if r.get('fallback') is None else ('是' if r['fallback'] else '否')
+        rate = r.get('pages_per_sec')
+        print(f"{key:<60} {r['wall_time']:>8.2f} {r['cpu_time']:>8.2f} {r['peak_rss_mb']:>9.1f} "
+              f"{r.get('pages') or '-':>5} {rate if rate is None else round(rate, 2):>7} {fallback:>8} "
+              f"{s.get('paragraphs', '-'):>6} {s.get('tables', '-'):>5} {s.get('text_length', '-'):>8}")
+
+
+def _environment() -> Dict[str, Any]:
+    return {
+        'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='金标准样本回归与性能基准')
+    parser.add_argument('--pipelines', nargs='+', choices=PIPELINES, default=list(PIPELINES),
+                        help='运行的流水线（默认: v2 v1）')
+    parser.add_argument('--sets', nargs='+', choices=list(GOLDEN_SETS), default=list(GOLDEN_SETS),
+                        help='样本集（默认: 全部）')
+    parser.add_argument('--repeat', type=int, default=1,
+                        help='每个样本重复次数，耗时取最小值（默认: 1）')
+    parser.add_argument('--baseline', default=str(CURRENT_DIR / 'benchmarks' / 'baseline.json'),
+                        help='基线文件（默认: benchmarks/baseline.json）')
+    parser.add_argument('--output', default=str(CURRENT_DIR / 'benchmarks' / 'latest.json'),
+                        help='本次结果保存位置（默认: benchmarks/latest.json）')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='将本次结果写入基线（不做对比）')
+    parser.add_argument('--max-slowdown', type=float, default=0.2,
+                        help='页/秒允许的最大下降比例（默认: 0.2）')
+    parser.add_argument('--max-drift', type=float, default=0.02,
+                        help='段落、表格、文本长度允许的最大相对偏差（默认: 0.02）')
+    args = parser.parse_args()
+
+    print(f"运行基准: {' '.join(args.pipelines)} × {' '.join(args.sets)}")
+    results = run_benchmark(args.pipelines, args.sets, args.repeat)
+    print_results(results)
+
+    report = {'environment': _environment(), 'results': results}
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline = {}
+        if baseline_path.exists():
+            with open(baseline_path, 'r', encoding='utf-8') as f:
+                baseline = json.load(f).get('results', {})
+        baseline.update(results)
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump({'environment': _environment(), 'results': baseline}, f, ensure_ascii=False, indent=2)
+        print(f"基线已更新: {baseline_path}")
+        return
+
+    if not baseline_path.exists():
+        print(f"未找到基线 {baseline_path}，使用 --update-baseline 生成")
+        return
+
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f).get('results', {})
+    problems = compare(results, baseline, args.max_slowdown, args.max_drift)
+    if problems:
+        print(f"\n✗ 发现 {len(problems)} 处回归:")
+        for problem in problems:
+            print(f"  - {problem}")
+        sys.exit(1)
+    print("\n✓ 与基线一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+转换结果缓存
+- ConversionCache: 以 PDF 内容哈希 + 转换参数 + pdf2docx 版本为键，缓存生成的 DOCX
+- PageLayoutCache: 以单页内容哈希 + 转换参数为键，缓存 pdf2docx 的页面解析结果
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+
+def pdf2docx_version() -> str:
+    """返回已安装的 pdf2docx 版本（未知时返回 'unknown'）"""
+    try:
+        from importlib.metadata import version
+        return version('pdf2docx')
+    except Exception:
+        return 'unknown'
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """流式计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_hash(kwargs: Dict[str, Any]) -> str:
+    """转换参数的规范化哈希（键排序，与书写顺序无关）"""
+    canonical = json.dumps(kwargs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class _LRUStore:
+    """
+    缓存目录的容量管理
+
+    进程内维护条目总大小的估计值（首次写入时扫描一次目录），写入时累加；只有超过上限时
+    才扫描目录按修改时间淘汰，并淘汰到上限的 90%，避免每次写入都遍历整个缓存。
+    多个进程共享缓存目录时估计值可能偏低，淘汰时的扫描会重新校准。
+    """
+
+    pattern = ''
+    companion_suffix: Optional[str] = None
+
+    def __init__(self, root: Path, max_size_mb: int):
+        self.root = root
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._size: Optional[int] = None
+
+    def _track(self, entry: Path, old_size: int = 0):
+        """记录新写入的条目（old_size 为被替换条目的大小）"""
+        if not self.max_bytes:
+            return
+        if self._size is None:
+            self._size = _scan_size(self.root, self.pattern)
+        else:
+            try:
+                self._size += entry.stat().st_size - old_size
+            except FileNotFoundError:
+                pass
+
+    def evict(self):
+        """总大小超过上限时按 LRU 淘汰条目"""
+        if not self.max_bytes or self._size is None or self._size <= self.max_bytes:
+            return
+        self._size = _evict_lru(self.root, self.pattern, self.max_bytes, int(self.max_bytes * 0.9),
+                                companion_suffix=self.companion_suffix)
+
+
+class ConversionCache(_LRUStore):
+    """
+    基于内容寻址的 DOCX 缓存
+
+    目录结构:
+    cache_dir/
+        └── objects/
+            └── ab/
+                ├── ab12...ef.docx    # 缓存的转换结果
+                └── ab12...ef.json    # 元数据（是否使用 fallback 等）
+
+    命中时刷新文件的修改时间，超出容量上限时按修改时间淘汰最久未使用的条目（LRU）。
+    """
+
+    pattern = "*/*.docx"
+    companion_suffix = '.json'
+
+    def __init__(self, cache_dir: str, max_size_mb: int = 2048, hardlink: bool = False):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存容量上限（MB，0 表示不限制）
+            hardlink: 命中时是否以硬链接代替复制（同一文件系统下更快，但修改输出会影响缓存）
+        """
+        super().__init__(Path(cache_dir) / "objects", max_size_mb)
+        self.hardlink = hardlink
+
+    def make_key(self, pdf_path: Path, settings: Dict[str, Any], pdf_hash: Optional[str] = None) -> str:
+        """
+        计算缓存键：PDF 内容哈希 + 参数哈希 + pdf2docx 版本
+
+        Args:
+            settings: 影响输出的全部参数（pdf2docx 参数以及预检、逐页 fallback、分片、窗口等流水线配置）
+            pdf_hash: 已计算的 PDF 内容哈希（None 则现场计算）
+        """
+        parts = [pdf_hash or file_sha256(pdf_path), settings_hash(settings), pdf2docx_version()]
+        return hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.docx"
+
+    def get(self, key: str, target: Path) -> Optional[Dict[str, Any]]:
+        """
+        查找缓存并输出到 target
+
+        Returns:
+            命中时返回元数据字典，未命中返回 None
+        """
+        entry = self._entry(key)
+        if not entry.exists():
+            return None
+
+        if target.exists():
+            target.unlink()
+        try:
+            if not self.hardlink:
+                raise OSError
+            os.link(entry, target)
+        except OSError:
+            shutil.copy2(entry, target)
+
+        # 刷新使用时间，供 LRU 淘汰使用
+        now = time.time()
+        os.utime(entry, (now, now))
+
+        meta_file = entry.with_suffix('.json')
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def put(self, key: str, docx_path: Path, meta: Optional[Dict[str, Any]] = None):
+        """将转换结果写入缓存（原子替换），并在超出容量时淘汰旧条目"""
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        old_size = _file_size(entry)
+
+        fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(docx_path, tmp)
+            os.replace(tmp, entry)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+        with open(entry.with_suffix('.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta or {}, f, ensure_ascii=False)
+
+        self._track(entry, old_size)
+        self.evict()
+
+
+class PageLayoutCache(_LRUStore):
+    """
+    按页缓存 pdf2docx 的解析结果（Page.store() 的数据，gzip 压缩的 JSON）
+
+    缓存键由页面内容流、引用的字体 / 图片 / XObject 数据、页面尺寸和转换参数共同决定，
+    因此合同修订版中未改动的页面可以直接复用上一版的解析结果。
+
+    目录结构:
+    cache_dir/
+        └── pages/
+            └── ab/
+                └── ab12...ef.json.gz
+    """
+
+    pattern = "*/*.json.gz"
+
+    def __init__(self, cache_dir: str, max_size_mb: int = 1024):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_size_mb: 缓存容量上限（MB，0 表示不限制）
+        """
+        super().__init__(Path(cache_dir) / "pages", max_size_mb)
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取页面解析结果，未命中或条目损坏时返回 None"""
+        entry = self._entry(key)
+        try:
+            with gzip.open(entry, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        now = time.time()
+        os.utime(entry, (now, now))
+        return data
+
+    def put(self, key: str, data: Dict[str, Any]):
+        """写入页面解析结果（原子替换）"""
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        old_size = _file_size(entry)
+
+        fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, entry)
+        except OSError:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        self._track(entry, old_size)
+
+
+def page_fingerprints(fitz_doc, page_indexes) -> Dict[int, str]:
+    """
+    计算指定页面的内容指纹
+
+    指纹包含页面尺寸/旋转、内容流，以及页面引用的字体、图片、XObject 的原始数据。
+    子集字体在不同版本的导出中字形编号可能变化，因此字体按文件内容而非名称计入。
+
+    Args:
+        fitz_doc: PyMuPDF Document
+        page_indexes: 页码列表
+
+    Returns:
+        {页码: 指纹}
+    """
+    # 同一文档中字体、图片被多页共享，按 xref 缓存摘要
+    xref_digests = {}
+    font_digests = {}
+
+    def xref_digest(xref: int) -> str:
+        if xref not in xref_digests:
+            try:
+                raw = fitz_doc.xref_stream_raw(xref) or b''
+            except Exception:
+                raw = fitz_doc.xref_object(xref).encode('utf-8', 'replace')
+            xref_digests[xref] = hashlib.sha256(raw).hexdigest()
+        return xref_digests[xref]
+
+    def font_digest(xref: int) -> str:
+        if xref not in font_digests:
+            try:
+                buffer = fitz_doc.extract_font(xref)[3] or b''
+            except Exception:
+                buffer = b''
+            font_digests[xref] = hashlib.sha256(buffer).hexdigest()
+        return font_digests[xref]
+
+    fingerprints = {}
+    for i in page_indexes:
+        page = fitz_doc[i]
+        digest = hashlib.sha256()
+        digest.update(repr((tuple(page.rect), page.rotation)).encode('utf-8'))
+        digest.update(page.read_contents())
+
+        for font in page.get_fonts(full=True):
+            xref, ext, ftype, basefont = font[0], font[1], font[2], font[3]
+            file_digest = font_digest(xref) if xref else ''
+            digest.update(f"font:{ext}:{ftype}:{basefont}:{file_digest}".encode('utf-8'))
+
+        for img in page.get_images(full=True):
+            digest.update(f"img:{xref_digest(img[0])}".encode('utf-8'))
+
+        for xobj in page.get_xobjects():
+            digest.update(f"xobj:{xref_digest(xobj[0])}".encode('utf-8'))
+
+        fingerprints[i] = digest.hexdigest()
+    return fingerprints
+
+
+def _file_size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+def _scan_size(root: Path, pattern: str) -> int:
+    """root 下匹配 pattern 的文件总大小"""
+    total = 0
+    for entry in root.glob(pattern):
+        total += _file_size(entry)
+    return total
+
+
+def _evict_lru(
+    root: Path,
+    pattern: str,
+    max_bytes: int,
+    target_bytes: Optional[int] = None,
+    companion_suffix: Optional[str] = None
+) -> int:
+    """
+    总大小超过 max_bytes 时淘汰 root 下匹配 pattern 的最久未使用文件，直到不超过 target_bytes
+
+    Args:
+        root: 缓存根目录
+        pattern: 条目文件的 glob 模式
+        max_bytes: 容量上限（0 表示不限制）
+        target_bytes: 淘汰后的目标大小（None 表示 max_bytes）
+        companion_suffix: 随条目一起删除的伴随文件后缀（如元数据 .json）
+
+    Returns:
+        淘汰后的总大小
+    """
+    entries = []
+    total = 0
+    for entry in root.glob(pattern):
+        try:
+            st = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, entry))
+        total += st.st_size
+    if not max_bytes or total <= max_bytes:
+        return total
+
+    target = max_bytes if target_bytes is None else target_bytes
+    entries.sort()
+    for _, size, entry in entries:
+        if total <= target:
+            break
+        paths = [entry]
+        if companion_suffix:
+            paths.append(entry.with_suffix(companion_suffix))
+        for path in paths:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        total -= size
+    return total
@@ -3,35 +3,81 @@
 """
 PDF 转 DOCX 批量转换脚本
 基于 pdf2docx 库实现
+
+pdf2docx、PyMuPDF、python-docx 及依赖它们的模块在用到时才导入，
+命令行 --help 和 --check-config 不加载转换依赖。
 """
 
+from __future__ import annotations
+
 import argparse
+import io
 import logging
+import multiprocessing
+import os
+import sys
+import tempfile
 import time
+from contextlib import nullcontext
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Union, BinaryIO, TYPE_CHECKING
 import yaml
 
-try:
-    from pdf2docx import Converter  # pyright: ignore[reportMissingImports]
-except ImportError:
-    print("错误: 未安装 pdf2docx 库")
-    print("请运行: pip install -r requirements.txt")
-    exit(1)
+from conversion_cache import ConversionCache, PageLayoutCache, file_sha256, settings_hash
+from debug_artifacts import DebugWorker
+from metrics import ConversionMetrics
+from preflight import plan_page_settings, group_runs, estimate_saving
+from results_log import ResultsLog
+from profiling import ConversionProfiler, phase
+
+if TYPE_CHECKING:
+    from fallback_history import FallbackHistory
+    from hybrid_router import OCRBackend
+    from template_index import TemplateIndex
+
+
+# fallback 配置：关闭 lattice 表格解析（避免复杂线条被误判为表格导致页面出错）
+FALLBACK_SETTINGS = {'parse_lattice_table': False}
+
+# fork server 预先导入的模块（工作进程由其 fork 产生，写时复制共享已导入的转换依赖）
+PRELOAD_MODULES = ['fitz', 'pdf2docx', 'docx', 'pipeline', 'docx_stitch', 'fallback_history',
+                   'hybrid_router', 'template_index']
+
+
+def _check_dependencies():
+    """检查转换依赖是否已安装（未安装时提示并退出）"""
+    try:
+        import pdf2docx  # pyright: ignore[reportMissingImports]  # noqa: F401
+        import fitz  # pyright: ignore[reportMissingImports]  # noqa: F401
+    except ImportError:
+        print("错误: 未安装 pdf2docx 库")
+        print("请运行: pip install -r requirements.txt")
+        exit(1)
 
 
 class PDFConverter:
     """PDF 到 DOCX 转换器"""
     
-    def __init__(self, config_path: str = "config.yaml"):
+    def __init__(self, config_path: str = "config.yaml", config: Optional[Dict[str, Any]] = None):
         """
         初始化转换器
         
         Args:
             config_path: 配置文件路径
+            config: 已加载的配置字典（提供时不再读取 config_path，用于工作进程）
         """
-        self.config = self._load_config(config_path)
+        _check_dependencies()
+        self.config_path = config_path
+        self.config = config if config is not None else self._load_config(config_path)
         self._setup_logging()
+        self.cache = self._setup_cache()
+        self.page_cache = self._setup_page_cache()
+        self.fallback_history = self._setup_fallback_history()
+        self.templates = self._setup_templates()
+        self.ocr_backend = self._setup_ocr_backend()
+        self.metrics = self._setup_metrics()
+        self.debug_worker = self._setup_debug_worker()
         
     def _load_config(self, config_path: str) -> Dict[str, Any]:
         """加载配置文件"""
@@ -43,22 +89,100 @@ class PDFConverter:
         with open(config_file, 'r', encoding='utf-8') as f:
             return yaml.safe_load(f)
     
-    def _default_config(self) -> Dict[str, Any]:
+    @staticmethod
+    def _default_config() -> Dict[str, Any]:
         """返回默认配置"""
         return {
             'input_dir': 'pdf_data',
             'output_dir': 'output',
+            'results_log': 'results.jsonl',
             'conversion': {
                 'parse_lattice_table': True,
                 'multi_processing': False
             },
             'debug': {
                 'enable': False,
-                'verbose': True
+                'verbose': True,
+                'max_pages': 5,
+                'giant_table_chars': 500
             },
             'error_handling': {
                 'enable_fallback': True,
-                'continue_on_error': True
+                'continue_on_error': True,
+                'page_fallback': True,
+                'history_file': None,
+                'predict_threshold': 0.5,
+                'predict_min_samples': 2,
+                'probe_pages': 3
+            },
+            'parallel': {
+                'enable': False,
+                'workers': 0,
+                'max_memory_mb': 0,
+                'start_method': '',
+                'max_tasks_per_child': 0
+            },
+            'sharding': {
+                'enable': False,
+                'min_pages': 20,
+                'workers': 0
+            },
+            'windowed': {
+                'enable': False,
+                'min_pages': 100,
+                'window_pages': 20,
+                'min_window_pages': 2,
+                'max_rss_mb': 0
+            },
+            'cache': {
+                'enable': False,
+                'dir': '.cache',
+                'max_size_mb': 2048,
+                'hardlink': False
+            },
+            'page_cache': {
+                'enable': False,
+                'dir': '.cache',
+                'max_size_mb': 1024
+            },
+            'preflight': {
+                'enable': False,
+                'min_ruling_lines': 2,
+                'disable_stream_without_paths': False
+            },
+            'templates': {
+                'enable': False,
+                'index_file': 'templates/index.json',
+                'threshold': 0.6
+            },
+            'profiling': {
+                'enable': False,
+                'trace_file': 'trace.json',
+                'slow_page_seconds': 0,
+                'profiler': 'cProfile'
+            },
+            'metrics': {
+                'enable': False,
+                'host': '127.0.0.1',
+                'port': 0,
+                'textfile': ''
+            },
+            'service': {
+                'host': '127.0.0.1',
+                'port': 8080,
+                'workers': 2,
+                'max_queued_pages': 2000,
+                'max_upload_mb': 200,
+                'spool_dir': '.service',
+                'result_ttl': 3600
+            },
+            'hybrid': {
+                'enable': False,
+                'min_text_chars': 20,
+                'min_image_coverage': 0.5,
+                'v1_dir': '../pdf_to_word_V1',
+                'use_gpu': False,
+                'enable_table': True
             }
         }
     
@@ -72,6 +196,91 @@ class PDFConverter:
         )
         self.logger = logging.getLogger(__name__)
     
+    def _setup_cache(self) -> Optional[ConversionCache]:
+        """根据配置创建转换结果缓存（未启用时返回 None）"""
+        cache_cfg = self.config.get('cache', {})
+        if not cache_cfg.get('enable', False):
+            return None
+        return ConversionCache(
+            cache_dir=cache_cfg.get('dir', '.cache'),
+            max_size_mb=cache_cfg.get('max_size_mb', 2048),
+            hardlink=cache_cfg.get('hardlink', False)
+        )
+    
+    def _setup_fallback_history(self) -> Optional[FallbackHistory]:
+        """根据配置创建 fallback 历史记录（未配置 history_file 时返回 None）"""
+        from fallback_history import FallbackHistory
+        error_cfg = self.config['error_handling']
+        history_file = error_cfg.get('history_file')
+        if not history_file or not error_cfg.get('enable_fallback', True):
+            return None
+        return FallbackHistory(
+            history_file,
+            threshold=error_cfg.get('predict_threshold', 0.5),
+            min_samples=error_cfg.get('predict_min_samples', 2)
+        )
+    
+    def _setup_page_cache(self) -> Optional[PageLayoutCache]:
+        """根据配置创建页面解析结果缓存（未启用时返回 None）"""
+        cache_cfg = self.config.get('page_cache', {})
+        if not cache_cfg.get('enable', False):
+            return None
+        return PageLayoutCache(
+            cache_dir=cache_cfg.get('dir', '.cache'),
+            max_size_mb=cache_cfg.get('max_size_mb', 1024)
+        )
+    
+    def _setup_templates(self) -> Optional[TemplateIndex]:
+        """根据配置加载模板指纹索引（未启用时返回 None）"""
+        from template_index import TemplateIndex
+        template_cfg = self.config.get('templates', {})
+        if not template_cfg.get('enable', False):
+            return None
+        return TemplateIndex(
+            template_cfg.get('index_file', 'templates/index.json'),
+            threshold=template_cfg.get('threshold', 0.6)
+        )
+    
+    def _setup_ocr_backend(self) -> Optional[OCRBackend]:
+        """根据配置创建扫描页 OCR 后端（未启用混合路由时返回 None，模型在首次需要时加载）"""
+        from hybrid_router import OCRBackend
+        hybrid_cfg = self.config.get('hybrid', {})
+        if not hybrid_cfg.get('enable', False):
+            return None
+        v1_dir = Path(hybrid_cfg.get('v1_dir', '../pdf_to_word_V1'))
+        if not v1_dir.is_absolute():
+            v1_dir = Path(__file__).parent / v1_dir
+        return OCRBackend(
+            str(v1_dir),
+            use_gpu=hybrid_cfg.get('use_gpu', False),
+            enable_table=hybrid_cfg.get('enable_table', True)
+        )
+    
+    def _setup_metrics(self) -> Optional[ConversionMetrics]:
+        """根据配置创建转换指标，并启动 HTTP 端点（未启用时返回 None）"""
+        metrics_cfg = self.config.get('metrics', {})
+        if not metrics_cfg.get('enable', False):
+            return None
+        metrics = ConversionMetrics(textfile=metrics_cfg.get('textfile') or None)
+        if metrics_cfg.get('port'):
+            host = metrics_cfg.get('host', '127.0.0.1')
+            try:
+                port = metrics.serve(metrics_cfg['port'], host)
+                self.logger.info(f"指标端点: http://{host}:{port}/metrics")
+            except OSError as e:
+                self.logger.warning(f"无法启动指标端点: {e}")
+        return metrics
+    
+    def _setup_debug_worker(self) -> DebugWorker:
+        """创建低优先级调试进程（首次提交调试任务时才启动，--debug 可临时开启调试）"""
+        debug_cfg = self.config['debug']
+        method = self.config.get('parallel', {}).get('start_method') or None
+        return DebugWorker(
+            max_pages=debug_cfg.get('max_pages', 5),
+            giant_table_chars=debug_cfg.get('giant_table_chars', 500),
+            mp_context=self._mp_context(method)
+        )
+    
     def convert_single(
         self,
         pdf_path: Path,
@@ -85,19 +294,14 @@ class PDFConverter:
         Args:
             pdf_path: PDF 文件路径
             output_dir: 输出目录
-            enable_debug: 是否启用调试模式
+            enable_debug: 是否启用调试模式（转换完成后在后台为可疑页面生成调试文件）
             settings_override: 覆盖配置参数
             
         Returns:
-            转换结果字典，包含 success, message, output_path, use_fallback 等信息
+            转换结果字典，包含 success, message, output_path, use_fallback, pages 等信息；
+            启用调试时附带 debug（调试任务参数，见 _submit_debug）
         """
-        result = {
-            'success': False,
-            'message': '',
-            'output_path': None,
-            'use_fallback': False,
-            'duration': 0
-        }
+        result = _new_result(pdf_path)
         
         start_time = time.time()
         
@@ -109,110 +313,780 @@ class PDFConverter:
         docx_path = file_output_dir / f"{pdf_path.stem}.docx"
         log_path = file_output_dir / "conversion.log"
         
-        # 设置文件日志
+        # 设置文件日志：每个文件使用独立的 logger，避免多个文件（或多个工作进程）的日志写入同一个 conversion.log；
+        # 不经 getLogger 注册（与 convert_bytes 相同），长期运行的服务不会为每个上传文件留下一个 logger
+        logger = logging.Logger(f"{self.logger.name}.{pdf_path.stem}")
+        logger.parent = self.logger
         file_handler = logging.FileHandler(log_path, encoding='utf-8')
         file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-        self.logger.addHandler(file_handler)
+        logger.addHandler(file_handler)
+        
+        # 准备转换参数
+        kwargs = settings_override or self.config['conversion'].copy()
+        fallback_pages: List[int] = []
         
         try:
-            self.logger.info(f"开始转换: {pdf_path.name}")
+            logger.info(f"开始转换: {pdf_path.name}")
+            result['pages'] = _page_count(pdf_path)
             
-            # 准备转换参数
-            kwargs = settings_override or self.config['conversion'].copy()
+            # 识别已知合同模板，套用该模板调优过的转换参数（在计算缓存键之前）
+            if self.templates and not settings_override:
+                t0 = time.perf_counter()
+                match = self.templates.match(pdf_path)
+                if match:
+                    name, score, template_settings = match
+                    kwargs = dict(kwargs, **template_settings)
+                    result['template'] = name
+                    logger.info(f"  匹配模板: {name} (相似度 {score:.2f}, "
+                                f"{(time.perf_counter() - t0) * 1000:.1f}ms) {template_settings}")
+            
+            # 查找转换缓存（PDF、转换参数与流水线配置均未变化时直接复用结果）
+            cache_key = None
+            if self.cache:
+                # 哈希随结果返回，写入结果日志时不再重复计算
+                result['pdf_hash'] = file_sha256(pdf_path)
+                cache_key = self.cache.make_key(pdf_path, self._effective_settings(kwargs), result['pdf_hash'])
+                meta = self.cache.get(cache_key, docx_path)
+                result['cache_hit'] = meta is not None
+                if meta is not None:
+                    result['success'] = True
+                    result['output_path'] = str(docx_path)
+                    result['use_fallback'] = meta.get('use_fallback', False)
+                    result['message'] = '转换成功 (缓存命中)'
+                    logger.info(f"✓ 缓存命中: {pdf_path.name} -> {docx_path.name}")
+                    return result
+                # 输出文件可能与缓存条目共享硬链接，先删除再写入
+                if docx_path.exists():
+                    docx_path.unlink()
             
-            # 首次尝试转换
-            success = self._do_convert(pdf_path, docx_path, kwargs, enable_debug, file_output_dir)
+            # 根据历史记录预测：与以往需要 fallback 的文档相似时，先用标准配置抽样转换前几页，
+            # 抽样失败才直接使用 fallback 配置（抽样结果计入历史，预测可以随新证据反转）
+            features = None
+            predicted = False
+            probed = False
+            if self.fallback_history:
+                from fallback_history import document_features
+                features = document_features(pdf_path)
+                if result['template']:
+                    # 已登记的模板以模板名作为指纹，比首页文本哈希更稳定
+                    features['template'] = f"template:{result['template']}"
+                if self.fallback_history.predict(features):
+                    probe_pages = self.config['error_handling'].get('probe_pages', 3)
+                    probed = bool(probe_pages)
+                    if probed and self._probe_primary(pdf_path, kwargs, probe_pages, logger):
+                        logger.info(f"  相似文档历史上需要 fallback，但抽样页面使用标准配置转换成功，仍使用标准配置")
+                    else:
+                        predicted = True
+                        kwargs = dict(kwargs, **FALLBACK_SETTINGS)
+                        logger.info(f"  相似文档历史上需要 fallback，直接使用 fallback 配置"
+                                    + ("（抽样页面使用标准配置转换失败）" if probed else ""))
             
-            if not success and self.config['error_handling']['enable_fallback']:
-                # 使用 fallback 配置重试
-                self.logger.warning(f"标准配置转换失败，尝试 fallback 模式（关闭 lattice 表格解析）")
-                kwargs['parse_lattice_table'] = False
-                success = self._do_convert(pdf_path, docx_path, kwargs, enable_debug, file_output_dir)
-                if success:
+            # 分阶段性能记录
+            profiler = self._create_profiler(file_output_dir)
+            
+            # 首次尝试转换（失败页面会单独使用 fallback 配置重试）；
+            # OCR 的结果记录在 ocr_state 中，fallback 重试时不再重复识别
+            ocr_state = {}
+            stats = self._convert_document(pdf_path, docx_path, kwargs, logger, profiler, ocr_state)
+            fallback_pages = stats.get('fallback_pages', []) if stats else []
+            
+            document_fallback = predicted
+            if stats is None and self.config['error_handling']['enable_fallback'] and not predicted:
+                # 整份文档使用 fallback 配置重试
+                logger.warning(f"标准配置转换失败，尝试 fallback 模式（关闭 lattice 表格解析）")
+                kwargs = dict(kwargs, **FALLBACK_SETTINGS)
+                stats = self._convert_document(pdf_path, docx_path, kwargs, logger, profiler, ocr_state)
+                if stats is not None:
                     result['use_fallback'] = True
+                    document_fallback = True
+            
+            if profiler is not None:
+                self._save_profile(profiler, file_output_dir, logger)
             
-            if success:
+            if stats is not None:
                 result['success'] = True
                 result['output_path'] = str(docx_path)
                 result['message'] = '转换成功'
-                if result['use_fallback']:
+                result['use_fallback'] = result['use_fallback'] or predicted or bool(fallback_pages)
+                if predicted:
+                    result['message'] += ' (根据历史预测使用 fallback 配置)'
+                elif fallback_pages:
+                    pages = ", ".join(str(i + 1) for i in fallback_pages)
+                    result['message'] += f' (第 {pages} 页使用 fallback 配置)'
+                elif result['use_fallback']:
                     result['message'] += ' (使用 fallback 配置)'
-                self.logger.info(f"✓ 转换成功: {pdf_path.name} -> {docx_path.name}")
+                if stats.get('ocr_pages'):
+                    pages = ", ".join(str(i + 1) for i in stats['ocr_pages'])
+                    result['message'] += f' (第 {pages} 页 OCR)'
+                if stats.get('missing_pages'):
+                    result['missing_pages'] = stats['missing_pages']
+                    pages = ", ".join(str(i + 1) for i in stats['missing_pages'])
+                    result['message'] += f' (第 {pages} 页 OCR 未生成内容，输出中缺失)'
+                    logger.warning(f"  输出缺失第 {pages} 页")
+                if stats.get('ocr_failed_pages'):
+                    result['ocr_failed_pages'] = stats['ocr_failed_pages']
+                    pages = ", ".join(str(i + 1) for i in stats['ocr_failed_pages'])
+                    result['message'] += f' (第 {pages} 页 OCR 未生成内容，改用 pdf2docx 转换)'
+                logger.info(f"✓ 转换成功: {pdf_path.name} -> {docx_path.name}")
+                if features is not None:
+                    # 只有整份文档需要 fallback 才计为 fallback，逐页 fallback 只记录页码
+                    self.fallback_history.record(
+                        pdf_path.name, features,
+                        fallback=document_fallback,
+                        fallback_pages=fallback_pages,
+                        predicted=predicted,
+                        probed=probed
+                    )
+                # OCR 未生成内容（缺页或改用 pdf2docx）的结果不写入缓存，下次重新转换
+                if cache_key and not result['missing_pages'] and not result['ocr_failed_pages']:
+                    self.cache.put(cache_key, docx_path, {
+                        'source': pdf_path.name,
+                        'use_fallback': result['use_fallback']
+                    })
             else:
                 result['message'] = '转换失败'
-                self.logger.error(f"✗ 转换失败: {pdf_path.name}")
+                logger.error(f"✗ 转换失败: {pdf_path.name}")
                 
         except Exception as e:
             result['message'] = f'转换异常: {str(e)}'
-            self.logger.exception(f"转换异常: {pdf_path.name}: {e}")
+            logger.exception(f"转换异常: {pdf_path.name}: {e}")
         finally:
             result['duration'] = time.time() - start_time
-            self.logger.removeHandler(file_handler)
+            logger.removeHandler(file_handler)
             file_handler.close()
+            if self.metrics:
+                self.metrics.observe(result)
+            # 调试文件不在转换路径上生成，交给后台调试进程（缓存命中的结果不再调试）
+            if (enable_debug or self.config['debug']['enable']) and not result['cache_hit']:
+                result['debug'] = {
+                    'debug_dir': str(file_output_dir / "debug"),
+                    'settings': dict(kwargs),
+                    'fallback_pages': list(fallback_pages),
+                    'document_fallback': result['use_fallback'] and not fallback_pages,
+                    'failed': not result['success']
+                }
+                self._submit_debug(result)
         
         return result
     
-    def _do_convert(
+    def _submit_debug(self, result: Dict[str, Any]) -> Optional[Future]:
+        """
+        将转换结果中的调试任务提交给低优先级调试进程
+        
+        调试进程找出可疑页面（使用了 fallback、没有文本、超大单格表格），只为这些页面生成
+        调试文件，并写入 debug/suspicious.json；进程池模式下由主进程根据工作进程返回的结果提交。
+        
+        Returns:
+            调试任务的 Future（未提交时为 None），调用方可据此等待或取消写入输出目录的调试任务
+        """
+        debug = result.get('debug')
+        if not debug or self.debug_worker is None:
+            return None
+        try:
+            return self.debug_worker.submit(
+                Path(result['input']),
+                result.get('output_path'),
+                Path(debug['debug_dir']),
+                debug['settings'],
+                debug['fallback_pages'],
+                document_fallback=debug['document_fallback'],
+                failed=debug['failed']
+            )
+        except Exception as e:
+            self.logger.warning(f"提交调试任务失败: {e}")
+            return None
+    
+    def wait_debug(self) -> int:
+        """
+        等待后台调试任务完成
+        
+        Returns:
+            生成调试文件的页数
+        """
+        if self.debug_worker is None:
+            return 0
+        pending = self.debug_worker.pending()
+        if pending:
+            print(f"等待 {pending} 个调试任务完成...")
+        # 已完成的任务也要收集结果，并总是关闭调试进程
+        generated = self.debug_worker.wait()
+        self.debug_worker.close()
+        return generated
+    
+    def convert_bytes(
+        self,
+        pdf: Union[bytes, BinaryIO],
+        output: Optional[BinaryIO] = None,
+        settings_override: Optional[Dict[str, Any]] = None,
+        debug_dir: Optional[Path] = None
+    ) -> Dict[str, Any]:
+        """
+        在内存中转换 PDF，不创建输出目录和 conversion.log
+        
+        支持页面预检、页面缓存和 fallback；转换结果缓存、模板识别、fallback 历史、分片和混合路由
+        依赖源文件路径，内存转换时不使用。
+        
+        Args:
+            pdf: PDF 字节或可读的二进制流
+            output: DOCX 写入的二进制流（None 则在结果的 docx 中返回字节）
+            settings_override: 覆盖配置参数
+            debug_dir: 调试文件目录（None 表示不生成）
+            
+        Returns:
+            转换结果字典，包含 success, message, use_fallback, pages, duration，
+            docx（未提供 output 时的 DOCX 字节）和 log（本次转换的日志文本）
+        """
+        from pdf2docx import Converter  # pyright: ignore[reportMissingImports]
+        
+        result = {
+            'success': False,
+            'message': '',
+            'use_fallback': False,
+            'pages': None,
+            'duration': 0,
+            'docx': None,
+            'log': ''
+        }
+        start_time = time.time()
+        
+        # 日志写入内存；不经 getLogger 注册，避免每次转换在 logging 中留下一个 logger
+        log_buffer = io.StringIO()
+        handler = logging.StreamHandler(log_buffer)
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        logger = logging.Logger(f"{self.logger.name}.memory")
+        logger.parent = self.logger
+        logger.addHandler(handler)
+        
+        target = output if output is not None else io.BytesIO()
+        target_start = target.tell() if target.seekable() else None
+        cv = None
+        try:
+            data = pdf if isinstance(pdf, (bytes, bytearray)) else pdf.read()
+            cv = Converter(stream=bytes(data))
+            result['pages'] = cv.fitz_doc.page_count
+            logger.info(f"开始转换: 内存中的 PDF ({len(data)} 字节, {result['pages']} 页)")
+            kwargs = settings_override or self.config['conversion'].copy()
+            if debug_dir is not None:
+                self._write_debug(cv, Path(debug_dir), kwargs, logger)
+            
+            stats = None
+            try:
+                stats = self._convert_loaded(cv, target, kwargs, logger)
+            except Exception as e:
+                logger.error(f"  转换过程出错: {e}")
+            
+            if stats is None and self.config['error_handling']['enable_fallback']:
+                logger.warning(f"标准配置转换失败，尝试 fallback 模式（关闭 lattice 表格解析）")
+                if target_start is not None:
+                    target.seek(target_start)
+                    target.truncate()
+                # 解析状态保存在 Converter 中，重新打开后再转换
+                cv.close()
+                cv = Converter(stream=bytes(data))
+                try:
+                    stats = self._convert_loaded(cv, target, dict(kwargs, **FALLBACK_SETTINGS), logger)
+                    result['use_fallback'] = True
+                except Exception as e:
+                    logger.error(f"  转换过程出错: {e}")
+            
+            if stats is not None:
+                result['success'] = True
+                result['message'] = '转换成功'
+                result['use_fallback'] = result['use_fallback'] or bool(stats.get('fallback_pages'))
+                if output is None:
+                    result['docx'] = target.getvalue()
+                logger.info(f"✓ 转换成功 ({time.time() - start_time:.2f}s)")
+            else:
+                result['message'] = '转换失败'
+                logger.error(f"✗ 转换失败")
+        except Exception as e:
+            result['message'] = f'转换异常: {str(e)}'
+            logger.exception(f"转换异常: {e}")
+        finally:
+            if cv:
+                cv.close()
+            result['duration'] = time.time() - start_time
+            logger.removeHandler(handler)
+            result['log'] = log_buffer.getvalue()
+            if self.metrics:
+                self.metrics.observe(result)
+        
+        return result
+    
+    def _probe_primary(
         self,
         pdf_path: Path,
-        docx_path: Path,
         kwargs: Dict[str, Any],
-        enable_debug: bool,
-        output_dir: Path
+        probe_pages: int,
+        logger: logging.Logger
     ) -> bool:
         """
-        执行实际的转换操作
+        用标准配置抽样转换前 probe_pages 页（输出丢弃），检验 fallback 预测
         
         Returns:
-            是否转换成功
+            抽样页面是否转换成功
         """
+        from pdf2docx import Converter  # pyright: ignore[reportMissingImports]
+        from pipeline import convert_pages
+        
         cv = None
         try:
             cv = Converter(str(pdf_path))
+            end = min(probe_pages, len(cv.fitz_doc))
+            convert_pages(cv, io.BytesIO(), kwargs, 0, end,
+                          fallback_settings=self._page_fallback_settings(kwargs))
+            return True
+        except Exception as e:
+            logger.info(f"  抽样转换失败: {e}")
+            return False
+        finally:
+            if cv:
+                cv.close()
+    
+    def _create_profiler(self, output_dir: Path) -> Optional[ConversionProfiler]:
+        """根据配置创建分阶段性能记录器（未启用时返回 None）"""
+        profiling = self.config.get('profiling', {})
+        if not profiling.get('enable', False):
+            return None
+        return ConversionProfiler(
+            slow_page_seconds=profiling.get('slow_page_seconds', 0),
+            profile_dir=str(output_dir / "profile"),
+            profiler=profiling.get('profiler', 'cProfile')
+        )
+    
+    def _save_profile(self, profiler: ConversionProfiler, output_dir: Path, logger: logging.Logger):
+        """将阶段耗时汇总写入 conversion.log，并保存 Chrome trace 文件"""
+        profiler.log_summary(logger)
+        trace_path = output_dir / self.config['profiling'].get('trace_file', 'trace.json')
+        try:
+            profiler.save_trace(trace_path)
+            logger.info(f"  性能记录: {trace_path}")
+        except OSError as e:
+            logger.warning(f"  保存性能记录失败: {e}")
+    
+    def _convert_document(
+        self,
+        pdf_path: Path,
+        docx_path: Path,
+        kwargs: Dict[str, Any],
+        logger: logging.Logger,
+        profiler: Optional[ConversionProfiler] = None,
+        ocr_state: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        转换单个文档：启用混合路由且存在扫描页时，扫描页交给 OCR，其余页面走 _do_convert
+        
+        Args:
+            profiler: 分阶段性能记录器（None 表示不记录）
+            ocr_state: 同一文件多次转换（fallback 重试）之间共享的 OCR 状态；
+                OCR 已确认不生成任何页面时记录 ocr_failed_pages，重试时直接用 pdf2docx 转换
+        
+        Returns:
+            同 _do_convert
+        """
+        if ocr_state and ocr_state.get('ocr_failed_pages'):
+            return self._convert_without_ocr(pdf_path, docx_path, kwargs, logger, profiler,
+                                             ocr_state['ocr_failed_pages'])
+        if self.ocr_backend:
+            import fitz  # pyright: ignore[reportMissingImports]
+            from hybrid_router import OCR, classify_pages
             
-            # 如果启用调试模式，生成调试文件
-            if enable_debug or self.config['debug']['enable']:
-                debug_dir = output_dir / "debug"
-                debug_dir.mkdir(exist_ok=True)
+            hybrid_cfg = self.config['hybrid']
+            with fitz.open(str(pdf_path)) as doc:
+                kinds = classify_pages(
+                    doc,
+                    min_text_chars=hybrid_cfg.get('min_text_chars', 20),
+                    min_image_coverage=hybrid_cfg.get('min_image_coverage', 0.5)
+                )
+            if OCR in kinds and self.ocr_backend.available():
+                return self._convert_hybrid(pdf_path, docx_path, kwargs, logger, kinds, profiler, ocr_state)
+        return self._do_convert(pdf_path, docx_path, kwargs, logger, profiler)
+    
+    def _convert_without_ocr(
+        self,
+        pdf_path: Path,
+        docx_path: Path,
+        kwargs: Dict[str, Any],
+        logger: logging.Logger,
+        profiler: Optional[ConversionProfiler],
+        ocr_pages: List[int]
+    ) -> Optional[Dict[str, Any]]:
+        """OCR 未生成任何页面时整份文档用 pdf2docx 转换（扫描页保留为图片），统计信息中记录 ocr_failed_pages"""
+        stats = self._do_convert(pdf_path, docx_path, kwargs, logger, profiler)
+        if stats is None:
+            return None
+        return dict(stats, ocr_pages=[], missing_pages=[], ocr_failed_pages=list(ocr_pages))
+    
+    def _convert_hybrid(
+        self,
+        pdf_path: Path,
+        docx_path: Path,
+        kwargs: Dict[str, Any],
+        logger: logging.Logger,
+        kinds: List[str],
+        profiler: Optional[ConversionProfiler] = None,
+        ocr_state: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        混合转换：所有扫描页合并为一个 PDF 一次识别，连续的文本页区间分别用 _do_convert 转换，
+        再按页码顺序拼接
+        
+        OCR 出错或没有生成任何页面时不算转换失败（否则 fallback 重试会再识别一次）：
+        整份文档直接用 pdf2docx 转换，OCR 页码记录在 ocr_state 和统计信息的 ocr_failed_pages 中。
+        
+        Returns:
+            合并后的页面统计信息（页码为原文档页码），额外包含 ocr_pages（OCR 识别的页码）和
+            missing_pages（OCR 未生成内容、输出中缺失的页码）；pdf2docx 转换失败时返回 None
+        """
+        import fitz  # pyright: ignore[reportMissingImports]
+        from docx_stitch import stitch_docx
+        from hybrid_router import OCR, page_runs, extract_pages
+        from pipeline import merge_stats
+        
+        runs = page_runs(kinds)
+        ocr_pages = [i for i, kind in enumerate(kinds) if kind == OCR]
+        logger.info("  混合路由: " + ", ".join(
+            f"[{pages[0] + 1}-{pages[-1] + 1}] {'OCR' if kind == OCR else 'pdf2docx'}" for kind, pages in runs))
+        
+        stats_list = []
+        missing_pages = []
+        try:
+            with fitz.open(str(pdf_path)) as doc, \
+                    tempfile.TemporaryDirectory(prefix='.hybrid_', dir=docx_path.parent) as tmp_dir:
+                tmp_dir = Path(tmp_dir)
                 
-                # 对第一页生成调试信息（可扩展到所有页）
+                ocr_pdf = tmp_dir / "ocr_pages.pdf"
+                extract_pages(doc, ocr_pages, ocr_pdf)
+                t0 = time.time()
                 try:
-                    cv.debug_page(
-                        i=0,
-                        docx_filename=str(debug_dir / "debug_page_0.docx"),
-                        debug_pdf=str(debug_dir / "debug_page_0.pdf"),
-                        layout_file=str(debug_dir / "layout_page_0.json"),
-                        **kwargs
-                    )
-                    self.logger.info(f"  调试文件已生成: {debug_dir}")
+                    with phase(profiler, 'ocr'):
+                        ocr_docx = dict(zip(ocr_pages, self.ocr_backend.convert(ocr_pdf, tmp_dir / "ocr")))
                 except Exception as e:
-                    self.logger.warning(f"  生成调试文件失败: {e}")
-            
-            # 执行转换
-            cv.convert(str(docx_path), start=0, end=None, **kwargs)
-            
-            return True
+                    logger.error(f"  OCR 识别出错: {e}")
+                    ocr_docx = {}
+                logger.info(f"  OCR 识别 {len(ocr_pages)} 页，耗时 {time.time() - t0:.1f}s")
+                
+                if not any(ocr_docx.get(i) is not None for i in ocr_pages):
+                    logger.warning("  OCR 未生成任何页面，整份文档改用 pdf2docx 转换")
+                    if ocr_state is not None:
+                        ocr_state['ocr_failed_pages'] = list(ocr_pages)
+                    return self._convert_without_ocr(pdf_path, docx_path, kwargs, logger, profiler, ocr_pages)
+                
+                parts = []
+                for n, (kind, pages) in enumerate(runs):
+                    if kind == OCR:
+                        for i in pages:
+                            if ocr_docx.get(i) is None:
+                                logger.warning(f"  第 {i + 1} 页 OCR 未生成 DOCX，输出中缺失该页")
+                                missing_pages.append(i)
+                            else:
+                                parts.append(ocr_docx[i])
+                        continue
+                    
+                    sub_pdf = tmp_dir / f"text_{n}.pdf"
+                    sub_docx = tmp_dir / f"text_{n}.docx"
+                    extract_pages(doc, pages, sub_pdf)
+                    logger.info(f"  第 {pages[0] + 1}-{pages[-1] + 1} 页: pdf2docx")
+                    with profiler.offset(pages[0]) if profiler else nullcontext():
+                        stats = self._do_convert(sub_pdf, sub_docx, kwargs, logger, profiler)
+                    if stats is None:
+                        return None
+                    stats_list.append(_remap_page_stats(stats, pages))
+                    parts.append(sub_docx)
+                
+                # OCR 生成的 DOCX 与 pdf2docx 的样式、编号不同，拼接时按内容合并
+                with phase(profiler, 'stitch_docx'):
+                    stitch_docx(parts, docx_path)
+        except Exception as e:
+            logger.error(f"  混合转换出错: {e}")
+            return None
+        
+        merged = merge_stats(stats_list)
+        merged['ocr_pages'] = [i for i in ocr_pages if i not in missing_pages]
+        merged['missing_pages'] = missing_pages
+        return merged
+    
+    def _do_convert(
+        self,
+        pdf_path: Path,
+        docx_path: Path,
+        kwargs: Dict[str, Any],
+        logger: Optional[logging.Logger] = None,
+        profiler: Optional[ConversionProfiler] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        执行实际的转换操作
+        
+        Args:
+            logger: 当前文件的日志记录器（None 则使用 self.logger）
+            profiler: 分阶段性能记录器（启用时总是按阶段执行转换）
+        
+        Returns:
+            转换成功时返回页面统计信息（见 pipeline.convert_pages，直接调用 pdf2docx 时为空字典），
+            失败时返回 None
+        """
+        from pdf2docx import Converter  # pyright: ignore[reportMissingImports]
+        
+        logger = logger or self.logger
+        cv = None
+        try:
+            cv = Converter(str(pdf_path))
+            return self._convert_loaded(cv, docx_path, kwargs, logger, profiler, pdf_path)
             
         except Exception as e:
-            self.logger.error(f"  转换过程出错: {e}")
-            return False
+            logger.error(f"  转换过程出错: {e}")
+            return None
         finally:
             if cv:
                 cv.close()
     
+    def _write_debug(self, cv, debug_dir: Path, kwargs: Dict[str, Any], logger: logging.Logger):
+        """对第一页生成调试文件（内存转换显式指定 debug_dir 时使用），失败时只记录警告"""
+        debug_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            cv.debug_page(
+                i=0,
+                docx_filename=str(debug_dir / "debug_page_0.docx"),
+                debug_pdf=str(debug_dir / "debug_page_0.pdf"),
+                layout_file=str(debug_dir / "layout_page_0.json"),
+                **kwargs
+            )
+            logger.info(f"  调试文件已生成: {debug_dir}")
+        except Exception as e:
+            logger.warning(f"  生成调试文件失败: {e}")
+    
+    def _convert_loaded(
+        self,
+        cv,
+        target,
+        kwargs: Dict[str, Any],
+        logger: logging.Logger,
+        profiler: Optional[ConversionProfiler] = None,
+        pdf_path: Optional[Path] = None
+    ) -> Dict[str, Any]:
+        """
+        转换已打开的文档：页面预检、逐页 fallback，有源文件路径时大文件分片并行转换
+        
+        Args:
+            cv: pdf2docx Converter
+            target: 输出 DOCX 路径或可写的二进制流
+            pdf_path: 源 PDF 路径（内存转换时为 None，不分片）
+        
+        Returns:
+            同 _do_convert；出错时抛出异常
+        """
+        from pipeline import convert_pages, convert_windowed
+        
+        # 页面预检：按页决定是否启用表格解析
+        page_count = len(cv.fitz_doc)
+        page_settings, preflight_time = self._preflight(cv, kwargs, logger)
+        
+        # 失败页面单独使用 fallback 配置重试（已是 fallback 配置时不再重试）
+        fallback_settings = self._page_fallback_settings(kwargs)
+        
+        # 执行转换（大文件按页码区间分片并行转换）
+        shards = self._plan_shards(page_count) if pdf_path is not None else [(0, page_count)]
+        windowed = self.config.get('windowed', {})
+        if len(shards) > 1:
+            stats = self._convert_sharded(pdf_path, target, kwargs, shards, logger,
+                                          page_settings, fallback_settings, profiler)
+        elif windowed.get('enable', False) and page_count >= windowed.get('min_pages', 100):
+            # 大文件按页窗口逐段解析并追加到输出文档，内存峰值只取决于窗口大小
+            stats = convert_windowed(cv, target, kwargs,
+                                     window_pages=windowed.get('window_pages', 20),
+                                     min_window_pages=windowed.get('min_window_pages', 2),
+                                     max_rss_mb=windowed.get('max_rss_mb', 0),
+                                     page_cache=self.page_cache, page_settings=page_settings,
+                                     fallback_settings=fallback_settings, profiler=profiler, logger=logger)
+            logger.info(f"  窗口转换: {len(stats['windows'])} 个窗口")
+        elif (self.page_cache or page_settings or fallback_settings or profiler) \
+                and not kwargs.get('multi_processing'):
+            stats = convert_pages(cv, target, kwargs,
+                                  page_cache=self.page_cache, page_settings=page_settings,
+                                  fallback_settings=fallback_settings, profiler=profiler)
+        else:
+            cv.convert(target if hasattr(target, 'write') else str(target), start=0, end=None, **kwargs)
+            return {}
+        
+        self._log_page_stats(stats, page_settings, preflight_time, logger)
+        return stats
+    
+    def _preflight(
+        self,
+        cv,
+        kwargs: Dict[str, Any],
+        logger: logging.Logger
+    ) -> Tuple[Dict[int, Dict[str, Any]], float]:
+        """
+        页面预检：统计每页表格线，为没有网格线的页面关闭 lattice 表格解析
+        
+        Returns:
+            (按页覆盖的解析参数, 预检耗时)，未启用预检或无需覆盖时参数为空字典
+        """
+        preflight = self.config.get('preflight', {})
+        if not preflight.get('enable', False):
+            return {}, 0.0
+        if not kwargs.get('parse_lattice_table', True) and not preflight.get('disable_stream_without_paths', False):
+            return {}, 0.0
+        
+        page_indexes = range(len(cv.fitz_doc))
+        overrides, profiles, elapsed = plan_page_settings(
+            cv.fitz_doc,
+            page_indexes,
+            min_ruling_lines=preflight.get('min_ruling_lines', 2),
+            disable_stream_without_paths=preflight.get('disable_stream_without_paths', False)
+        )
+        
+        # 与全局配置相同的覆盖项无需记录
+        overrides = {
+            i: {k: v for k, v in o.items() if kwargs.get(k, True) != v}
+            for i, o in overrides.items()
+        }
+        overrides = {i: o for i, o in overrides.items() if o}
+        
+        logger.info(f"  页面预检: {len(profiles)} 页，耗时 {elapsed:.3f}s")
+        for first, last, override in group_runs(page_indexes, overrides):
+            pages = f"{first + 1}" if first == last else f"{first + 1}-{last + 1}"
+            lines = ", ".join(
+                f"{i + 1}:{profiles[i]['h_lines']}/{profiles[i]['v_lines']}"
+                for i in range(first, last + 1) if i in profiles
+            )
+            decision = "、".join(f"{k}={v}" for k, v in override.items()) or "保持配置"
+            logger.info(f"    第 {pages} 页: {decision}（横线/竖线 {lines}）")
+        return overrides, elapsed
+    
+    def _page_fallback_settings(self, kwargs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        返回逐页 fallback 重试使用的参数覆盖项
+        
+        未启用 fallback / 逐页 fallback，或当前参数已等同于 fallback 配置时返回 None。
+        """
+        error_cfg = self.config['error_handling']
+        if not error_cfg.get('enable_fallback', True) or not error_cfg.get('page_fallback', True):
+            return None
+        if all(kwargs.get(k, True) == v for k, v in FALLBACK_SETTINGS.items()):
+            return None
+        return dict(FALLBACK_SETTINGS)
+    
+    def _log_page_stats(
+        self,
+        stats: Dict[str, Any],
+        page_settings: Dict[int, Dict[str, Any]],
+        preflight_time: float,
+        logger: logging.Logger
+    ):
+        """记录分阶段转换的页面统计（缓存复用、预检节省时间、fallback 页面）"""
+        if stats['fallback_pages']:
+            pages = ", ".join(str(i + 1) for i in stats['fallback_pages'])
+            logger.warning(f"  第 {pages} 页使用 fallback 配置重新转换")
+        if self.page_cache:
+            logger.info(f"  页面缓存: 复用 {stats['reused']} 页，解析 {stats['parsed']} 页")
+        if page_settings:
+            page_times = stats['page_times']
+            off = [t for i, t in page_times.items() if page_settings.get(i, {}).get('parse_lattice_table') is False]
+            on = [t for i, t in page_times.items() if page_settings.get(i, {}).get('parse_lattice_table') is not False]
+            saved = estimate_saving(page_settings, page_times, preflight_time)
+            logger.info(f"  页面预检: 跳过 lattice 解析 {len(off)} 页（解析 {sum(off):.2f}s），"
+                        f"其余 {len(on)} 页（解析 {sum(on):.2f}s），预检 {preflight_time:.3f}s，"
+                        f"估算节省上限 {saved:.2f}s")
+    
+    def _plan_shards(self, page_count: int) -> List[Tuple[int, int]]:
+        """
+        按 sharding 配置将页码划分为连续区间
+        
+        Args:
+            page_count: PDF 总页数
+            
+        Returns:
+            [(start, end), ...] 页码区间列表（end 不含），未启用分片时只有一个区间
+        """
+        sharding = self.config.get('sharding', {})
+        if not sharding.get('enable', False) or page_count < sharding.get('min_pages', 20):
+            return [(0, page_count)]
+        
+        workers = sharding.get('workers', 0) or os.cpu_count() or 1
+        num = max(1, min(workers, page_count))
+        size, rest = divmod(page_count, num)
+        
+        shards = []
+        start = 0
+        for i in range(num):
+            end = start + size + (1 if i < rest else 0)
+            shards.append((start, end))
+            start = end
+        return shards
+    
+    def _convert_sharded(
+        self,
+        pdf_path: Path,
+        docx_path: Path,
+        kwargs: Dict[str, Any],
+        shards: List[Tuple[int, int]],
+        logger: logging.Logger,
+        page_settings: Optional[Dict[int, Dict[str, Any]]] = None,
+        fallback_settings: Optional[Dict[str, Any]] = None,
+        profiler: Optional[ConversionProfiler] = None
+    ) -> Dict[str, Any]:
+        """
+        分片并行转换单个 PDF，并将分片 DOCX 拼接为最终文档
+        
+        任一分片失败时抛出异常，由调用方按失败处理（进而触发 fallback）。
+        
+        Returns:
+            合并后的页面统计信息（见 pipeline.convert_pages）
+        """
+        from docx_stitch import stitch_docx
+        from pipeline import merge_stats
+        
+        page_settings = page_settings or {}
+        logger.info(f"  分片转换: {len(shards)} 个分片 "
+                    + ", ".join(f"[{s + 1}-{e}]" for s, e in shards))
+        
+        # 分片本身已并行，关闭 pdf2docx 内部的多进程
+        chunk_kwargs = dict(kwargs, multi_processing=False)
+        
+        with tempfile.TemporaryDirectory(prefix='.shards_', dir=docx_path.parent) as tmp_dir:
+            chunk_files = [Path(tmp_dir) / f"chunk_{i}.docx" for i in range(len(shards))]
+            with self._process_pool(len(shards), recycle=False) as executor:
+                futures = [
+                    executor.submit(
+                        _convert_chunk, str(pdf_path), str(chunk_file), start, end, chunk_kwargs,
+                        self.page_cache,
+                        {i: o for i, o in page_settings.items() if start <= i < end},
+                        fallback_settings,
+                        profiler
+                    )
+                    for chunk_file, (start, end) in zip(chunk_files, shards)
+                ]
+                chunk_stats = [future.result() for future in futures]
+            
+            if profiler is not None:
+                for stats in chunk_stats:
+                    profiler.merge(stats.pop('trace_events', []), stats.pop('slow_pages', []))
+            with phase(profiler, 'stitch_docx'):
+                stitch_docx(chunk_files, docx_path)
+        logger.info(f"  分片已拼接: {docx_path.name}")
+        return merge_stats(chunk_stats)
+    
     def batch_convert(
         self,
         input_dir: Optional[str] = None,
         output_dir: Optional[str] = None,
-        enable_debug: bool = False
+        enable_debug: bool = False,
+        workers: Optional[int] = None,
+        resume: bool = False
     ):
         """
         批量转换目录下的所有 PDF 文件
         
+        每个文件完成时结果立即追加到输出目录下的结果日志（配置 results_log）。
+        
         Args:
             input_dir: 输入目录路径（None 则使用配置文件中的路径）
             output_dir: 输出目录路径（None 则使用配置文件中的路径）
             enable_debug: 是否启用调试模式
+            workers: 并发工作进程数（None 则使用配置文件中的 parallel 配置）
+            resume: 跳过结果日志中已成功、PDF 内容和转换参数均未变化的文件
         """
         # 确定输入输出目录
         in_dir = Path(input_dir) if input_dir else Path(self.config['input_dir'])
@@ -234,6 +1108,20 @@ class PDFConverter:
         
         self.logger.info(f"找到 {len(pdf_files)} 个 PDF 文件")
         self.logger.info(f"输出目录: {out_dir}")
+        
+        # 结果日志（续跑时跳过已成功的文件）
+        results_log = None
+        if self.config.get('results_log', 'results.jsonl'):
+            results_log = ResultsLog(out_dir / self.config.get('results_log', 'results.jsonl'), self._settings_digest())
+            if resume:
+                done = results_log.completed()
+                remaining = [p for p in pdf_files if not results_log.is_done(done.get(str(p.resolve())), p)]
+                if len(remaining) < len(pdf_files):
+                    self.logger.info(f"续跑: 跳过已成功转换的 {len(pdf_files) - len(remaining)} 个文件")
+                pdf_files = remaining
+                if not pdf_files:
+                    self.logger.info("所有文件均已转换完成")
+                    return
         self.logger.info("-" * 60)
         
         # 统计信息
@@ -242,35 +1130,36 @@ class PDFConverter:
             'success': 0,
             'failed': 0,
             'fallback': 0,
+            'cache_hits': 0,
+            'cache_misses': 0,
             'total_time': 0
         }
         
-        # 逐个转换
-        for idx, pdf_path in enumerate(pdf_files, 1):
-            print(f"\n[{idx}/{stats['total']}] 正在处理: {pdf_path.name}")
-            
-            result = self.convert_single(
-                pdf_path=pdf_path,
-                output_dir=out_dir,
-                enable_debug=enable_debug
-            )
-            
-            stats['total_time'] += result['duration']
-            
-            if result['success']:
-                stats['success'] += 1
-                if result['use_fallback']:
-                    stats['fallback'] += 1
-                print(f"  ✓ 成功 ({result['duration']:.2f}s)")
-                if result['use_fallback']:
-                    print(f"    (使用 fallback 配置)")
-            else:
-                stats['failed'] += 1
-                print(f"  ✗ 失败: {result['message']}")
-                if not self.config['error_handling']['continue_on_error']:
-                    self.logger.error("遇到错误，停止批量转换")
+        batch_start = time.time()
+        workers = self._resolve_workers(workers)
+        if self.metrics:
+            self.metrics.start_batch(len(pdf_files))
+        
+        if workers > 1 and len(pdf_files) > 1:
+            # 进程池并发转换
+            self._pool_convert(pdf_files, out_dir, enable_debug, workers, stats, results_log)
+        else:
+            # 逐个转换
+            for idx, pdf_path in enumerate(pdf_files, 1):
+                print(f"\n[{idx}/{stats['total']}] 正在处理: {pdf_path.name}")
+                
+                result = self.convert_single(
+                    pdf_path=pdf_path,
+                    output_dir=out_dir,
+                    enable_debug=enable_debug
+                )
+                
+                if not self._record_result(stats, result, results_log):
                     break
         
+        wall_time = time.time() - batch_start
+        debug_pages = self.wait_debug()
+        
         # 输出统计信息
         print("\n" + "=" * 60)
         print("转换完成！统计信息：")
@@ -278,9 +1167,348 @@ class PDFConverter:
         print(f"  成功: {stats['success']}")
         print(f"  失败: {stats['failed']}")
         print(f"  使用 fallback: {stats['fallback']}")
+        if self.cache:
+            print(f"  缓存命中/未命中: {stats['cache_hits']}/{stats['cache_misses']}")
         print(f"  总耗时: {stats['total_time']:.2f}s")
         print(f"  平均耗时: {stats['total_time']/stats['total']:.2f}s/文件")
+        if workers > 1:
+            print(f"  实际耗时: {wall_time:.2f}s（{workers} 个工作进程）")
+        if results_log:
+            print(f"  结果日志: {results_log.path}")
+        if debug_pages:
+            print(f"  调试文件: {debug_pages} 个可疑页面")
         print("=" * 60)
+    
+    def _resolve_workers(self, workers: Optional[int] = None) -> int:
+        """
+        确定并发工作进程数
+        
+        Args:
+            workers: 命令行指定的进程数（None 则读取配置文件）
+            
+        Returns:
+            工作进程数，1 表示串行转换
+        """
+        parallel = self.config.get('parallel', {})
+        if workers is None:
+            if not parallel.get('enable', False):
+                return 1
+            workers = parallel.get('workers', 0)
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        return workers
+    
+    def _process_pool(
+        self,
+        workers: int,
+        initializer=None,
+        initargs: Tuple = (),
+        recycle: bool = True
+    ) -> ProcessPoolExecutor:
+        """
+        按 parallel 配置创建进程池
+        
+        start_method 为 forkserver 时，fork server 进程预先导入转换依赖，工作进程由它 fork 产生，
+        不再各自导入 pdf2docx / PyMuPDF；max_tasks_per_child 大于 0 时工作进程转换该数量的文档后
+        退出并由新进程替换，限制 PyMuPDF 的内存增长（需要 Python 3.11+，且不能使用 fork）。
+        
+        Args:
+            workers: 工作进程数
+            initializer: 工作进程初始化函数
+            initargs: 初始化函数参数
+            recycle: 是否按 max_tasks_per_child 回收工作进程（分片转换每个进程只处理一个分片，无需回收）
+        """
+        parallel = self.config.get('parallel', {})
+        method = parallel.get('start_method') or None
+        max_tasks = parallel.get('max_tasks_per_child', 0) if recycle else 0
+        if max_tasks and sys.version_info < (3, 11):
+            self.logger.warning("当前 Python 不支持 max_tasks_per_child（需要 3.11+），工作进程不回收")
+            max_tasks = 0
+        if max_tasks and (method or multiprocessing.get_start_method()) == 'fork':
+            self.logger.warning("fork 方式不支持回收工作进程，改用 forkserver")
+            method = 'forkserver'
+        
+        context = self._mp_context(method)
+        kwargs = {'max_tasks_per_child': max_tasks} if max_tasks else {}
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=initializer,
+            initargs=initargs,
+            **kwargs
+        )
+    
+    @staticmethod
+    def _mp_context(method: Optional[str]):
+        """进程池与调试进程共用的 multiprocessing 上下文（forkserver 时预先导入转换依赖）"""
+        context = multiprocessing.get_context(method)
+        if context.get_start_method() == 'forkserver':
+            # '__main__' 使 fork server 也预先导入入口脚本（convert.py / service.py）
+            context.set_forkserver_preload(['__main__', 'convert'] + PRELOAD_MODULES)
+        return context
+    
+    def _effective_settings(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        影响输出内容的全部参数：pdf2docx 参数加上页面预检、fallback、分片、窗口转换和混合路由配置
+        
+        未启用的功能只记为 {'enable': False}，其余参数的改动不影响结果；用于转换缓存键和续跑参数哈希。
+        """
+        def section(name: str, enabled: bool, keys: Tuple[str, ...]) -> Dict[str, Any]:
+            cfg = self.config.get(name, {})
+            if not enabled:
+                return {'enable': False}
+            return dict({k: cfg.get(k) for k in keys}, enable=True)
+        
+        error_cfg = self.config['error_handling']
+        sharding = section('sharding', self.config.get('sharding', {}).get('enable', False), ('min_pages',))
+        if sharding['enable']:
+            # 分片边界取决于实际分片数
+            sharding['workers'] = self.config['sharding'].get('workers', 0) or os.cpu_count() or 1
+        return {
+            'conversion': kwargs,
+            'fallback': {k: error_cfg.get(k, True) for k in ('enable_fallback', 'page_fallback')},
+            'preflight': section('preflight', self.config.get('preflight', {}).get('enable', False),
+                                 ('min_ruling_lines', 'disable_stream_without_paths')),
+            'sharding': sharding,
+            'windowed': section('windowed', self.config.get('windowed', {}).get('enable', False),
+                                ('min_pages', 'window_pages', 'min_window_pages', 'max_rss_mb')),
+            'hybrid': section('hybrid', bool(self.ocr_backend),
+                              ('min_text_chars', 'min_image_coverage', 'enable_table')),
+        }
+    
+    def _settings_digest(self) -> str:
+        """批量续跑比对用的参数哈希（含流水线配置）"""
+        return settings_hash(self._effective_settings(self.config['conversion']))
+    
+    def _record_result(
+        self,
+        stats: Dict[str, Any],
+        result: Dict[str, Any],
+        results_log: Optional[ResultsLog] = None
+    ) -> bool:
+        """
+        将单个文件的转换结果累计到统计信息中，追加到结果日志，并输出结果
+        
+        Returns:
+            是否继续处理后续文件
+        """
+        if results_log:
+            try:
+                results_log.append(result)
+            except OSError as e:
+                self.logger.warning(f"写入结果日志失败: {e}")
+        stats['total_time'] += result['duration']
+        if result.get('cache_hit') is True:
+            stats['cache_hits'] += 1
+        elif result.get('cache_hit') is False:
+            stats['cache_misses'] += 1
+        
+        if result['success']:
+            stats['success'] += 1
+            if result['use_fallback']:
+                stats['fallback'] += 1
+            print(f"  ✓ 成功 ({result['duration']:.2f}s)")
+            if result.get('cache_hit'):
+                print(f"    (缓存命中)")
+            if result['use_fallback']:
+                print(f"    (使用 fallback 配置)")
+        else:
+            stats['failed'] += 1
+            print(f"  ✗ 失败: {result['message']}")
+            if not self.config['error_handling']['continue_on_error']:
+                self.logger.error("遇到错误，停止批量转换")
+                return False
+        return True
+    
+    def _pool_convert(
+        self,
+        pdf_files: List[Path],
+        out_dir: Path,
+        enable_debug: bool,
+        workers: int,
+        stats: Dict[str, Any],
+        results_log: Optional[ResultsLog] = None
+    ):
+        """
+        使用进程池并发转换多个文件，结果按完成顺序汇总到 stats
+        
+        每个工作进程持有独立的 PDFConverter，各文件的 conversion.log 互不干扰。
+        """
+        max_memory_mb = self.config.get('parallel', {}).get('max_memory_mb', 0)
+        self.logger.info(f"进程池模式: {workers} 个工作进程"
+                         + (f"，每进程内存上限 {max_memory_mb}MB" if max_memory_mb else ""))
+        
+        executor = self._process_pool(workers, _init_worker, (self.config, max_memory_mb))
+        try:
+            futures = {
+                executor.submit(_convert_in_worker, pdf_path, out_dir, enable_debug): pdf_path
+                for pdf_path in pdf_files
+            }
+            for done, future in enumerate(as_completed(futures), 1):
+                pdf_path = futures[future]
+                print(f"\n[{done}/{stats['total']}] 已完成: {pdf_path.name}")
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 工作进程异常退出（如超出内存上限被终止）
+                    result = _new_result(pdf_path, message=f'工作进程异常: {e}')
+                # 工作进程不持有指标和调试进程，由主进程计入和提交
+                if self.metrics:
+                    self.metrics.observe(result)
+                self._submit_debug(result)
+                if not self._record_result(stats, result, results_log):
+                    break
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def check_config(config: Dict[str, Any]) -> List[str]:
+    """
+    对照默认配置检查配置项名称和类型（不加载转换依赖）
+    
+    Returns:
+        问题列表，空列表表示通过
+    """
+    def same_type(value, default) -> bool:
+        if value is None or default is None:
+            return True
+        if isinstance(default, bool):
+            return isinstance(value, bool)
+        if isinstance(default, (int, float)):
+            return isinstance(value, (int, float)) and not isinstance(value, bool)
+        return isinstance(value, type(default))
+    
+    problems = []
+    defaults = PDFConverter._default_config()
+    for section in ('conversion', 'debug', 'error_handling'):
+        if section not in config:
+            problems.append(f"{section}: 缺少该配置段")
+    for section, value in config.items():
+        if section not in defaults:
+            problems.append(f"{section}: 未知配置项")
+            continue
+        default = defaults[section]
+        if not isinstance(default, dict):
+            if not same_type(value, default):
+                problems.append(f"{section}: 应为 {type(default).__name__}，实际为 {value!r}")
+            continue
+        if not isinstance(value, dict):
+            problems.append(f"{section}: 应为映射，实际为 {value!r}")
+            continue
+        for key, item in value.items():
+            if key not in default:
+                # conversion 中的其他参数原样传给 pdf2docx
+                if section != 'conversion':
+                    problems.append(f"{section}.{key}: 未知配置项")
+            elif not same_type(item, default[key]):
+                problems.append(f"{section}.{key}: 应为 {type(default[key]).__name__}，实际为 {item!r}")
+    return problems
+
+
+# 工作进程内的转换器实例（由 _init_worker 在每个进程中创建一次）
+_worker_converter: Optional[PDFConverter] = None
+
+
+def _new_result(pdf_path: Path, **fields) -> Dict[str, Any]:
+    """convert_single 结果的默认字段（工作进程崩溃时也用它构造结果，保证下游读取的字段齐全）"""
+    result = {
+        'input': str(pdf_path),
+        'success': False,
+        'message': '',
+        'output_path': None,
+        'use_fallback': False,
+        'cache_hit': None,
+        'template': None,
+        'pages': None,
+        'missing_pages': [],
+        'ocr_failed_pages': [],
+        'duration': 0
+    }
+    result.update(fields)
+    return result
+
+
+def _page_count(pdf_path: Path) -> Optional[int]:
+    """PDF 页数（无法打开时返回 None）"""
+    import fitz  # pyright: ignore[reportMissingImports]
+    
+    try:
+        with fitz.open(str(pdf_path)) as doc:
+            return doc.page_count
+    except Exception:
+        return None
+
+
+def _remap_page_stats(stats: Dict[str, Any], pages: List[int]) -> Dict[str, Any]:
+    """将子文档的页面统计（页码从 0 开始）映射回原文档页码"""
+    return {
+        'reused': stats.get('reused', 0),
+        'parsed': stats.get('parsed', len(pages)),
+        'page_times': {pages[i]: t for i, t in stats.get('page_times', {}).items()},
+        'fallback_pages': [pages[i] for i in stats.get('fallback_pages', [])]
+    }
+
+
+def _init_worker(config: Dict[str, Any], max_memory_mb: int = 0):
+    """
+    进程池初始化函数：设置内存上限并创建进程内转换器
+    
+    Args:
+        config: 主进程中已加载的配置
+        max_memory_mb: 进程地址空间上限（MB，0 表示不限制，仅 POSIX 系统生效）
+    """
+    global _worker_converter
+    if max_memory_mb:
+        try:
+            import resource
+            limit = max_memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            logging.warning(f"无法设置工作进程内存上限: {e}")
+    _worker_converter = PDFConverter(config=dict(config, metrics={'enable': False}))
+    _worker_converter.debug_worker = None
+
+
+def _convert_chunk(
+    pdf_path: str,
+    chunk_path: str,
+    start: int,
+    end: int,
+    kwargs: Dict[str, Any],
+    page_cache: Optional[PageLayoutCache] = None,
+    page_settings: Optional[Dict[int, Dict[str, Any]]] = None,
+    fallback_settings: Optional[Dict[str, Any]] = None,
+    profiler: Optional[ConversionProfiler] = None
+) -> Dict[str, Any]:
+    """
+    在工作进程中转换一个页码区间 [start, end)
+    
+    Returns:
+        页面统计信息（见 pipeline.convert_pages）；传入 profiler 时附带 trace_events 和 slow_pages
+    """
+    from pdf2docx import Converter  # pyright: ignore[reportMissingImports]
+    from pipeline import convert_pages
+    
+    cv = Converter(pdf_path)
+    try:
+        stats = convert_pages(cv, chunk_path, kwargs, start, end,
+                              page_cache=page_cache, page_settings=page_settings,
+                              fallback_settings=fallback_settings, profiler=profiler)
+        if profiler is not None:
+            stats['trace_events'] = profiler.events
+            stats['slow_pages'] = profiler.slow_pages
+        return stats
+    finally:
+        cv.close()
+
+
+def _convert_in_worker(pdf_path: Path, output_dir: Path, enable_debug: bool) -> Dict[str, Any]:
+    """在工作进程中转换单个文件"""
+    return _worker_converter.convert_single(
+        pdf_path=pdf_path,
+        output_dir=output_dir,
+        enable_debug=enable_debug
+    )
 
 
 def main():
@@ -312,11 +1540,100 @@ def main():
         action='store_true',
         help='启用调试模式（生成布局分析文件）'
     )
+    parser.add_argument(
+        '--shards',
+        type=int,
+        help='将大文件按页码区间分成 N 片并行转换后拼接（默认: config.yaml 中的 sharding 配置）'
+    )
+    parser.add_argument(
+        '--window',
+        type=int,
+        metavar='PAGES',
+        help='大文件按每 PAGES 页一个窗口逐段转换，限制内存峰值（默认: config.yaml 中的 windowed 配置）'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='记录各阶段及每页的耗时与内存变化（写入 conversion.log 和 trace.json）'
+    )
+    parser.add_argument(
+        '--profile-slow-page',
+        type=float,
+        metavar='SECONDS',
+        help='单页耗时超过该秒数时保存 cProfile 结果（隐含 --profile）'
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        help='在本地端口暴露 Prometheus 指标（http://127.0.0.1:端口/metrics）'
+    )
+    parser.add_argument(
+        '--metrics-textfile',
+        type=str,
+        help='将 Prometheus 指标写入该文件（node_exporter textfile collector，每个文件完成后更新）'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='批量转换时跳过结果日志中已成功、内容和参数均未变化的文件（用于中断后续跑）'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='批量转换的并发工作进程数（默认: config.yaml 中的 parallel 配置，0 表示 CPU 核心数）'
+    )
+    parser.add_argument(
+        '--check-config',
+        action='store_true',
+        help='只检查配置文件的配置项名称和类型，不加载转换依赖'
+    )
     
     args = parser.parse_args()
     
+    if args.check_config:
+        try:
+            with open(args.config, 'r', encoding='utf-8') as f:
+                config = yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError) as e:
+            print(f"✗ 无法读取配置文件: {e}")
+            sys.exit(1)
+        problems = check_config(config)
+        for problem in problems:
+            print(f"  ✗ {problem}")
+        print(f"{'✗' if problems else '✓'} {args.config}: {len(problems)} 个问题")
+        sys.exit(1 if problems else 0)
+    
     # 初始化转换器
     converter = PDFConverter(config_path=args.config)
+    if args.shards:
+        converter.config['sharding'] = {
+            **converter.config.get('sharding', {}),
+            'enable': True,
+            'workers': args.shards
+        }
+    if args.window:
+        converter.config['windowed'] = {
+            **converter.config.get('windowed', {}),
+            'enable': True,
+            'window_pages': args.window
+        }
+    if args.metrics_port or args.metrics_textfile:
+        metrics_cfg = {**converter.config.get('metrics', {}), 'enable': True}
+        if args.metrics_port:
+            metrics_cfg['port'] = args.metrics_port
+        if args.metrics_textfile:
+            metrics_cfg['textfile'] = args.metrics_textfile
+        converter.config['metrics'] = metrics_cfg
+        if converter.metrics:
+            converter.metrics.close()
+        converter.metrics = converter._setup_metrics()
+    if args.profile or args.profile_slow_page:
+        converter.config['profiling'] = {
+            **converter.config.get('profiling', {}),
+            'enable': True
+        }
+        if args.profile_slow_page:
+            converter.config['profiling']['slow_page_seconds'] = args.profile_slow_page
     
     # 单文件转换模式
     if args.single:
@@ -341,13 +1658,18 @@ def main():
             print(f"  耗时: {result['duration']:.2f}s")
         else:
             print(f"✗ 转换失败: {result['message']}")
+        debug_pages = converter.wait_debug()
+        if debug_pages:
+            print(f"  调试文件: {Path(result['debug']['debug_dir'])}（{debug_pages} 个可疑页面）")
     
     # 批量转换模式
     else:
         converter.batch_convert(
             input_dir=args.input_dir,
             output_dir=args.output_dir,
-            enable_debug=args.debug
+            enable_debug=args.debug,
+            workers=args.workers,
+            resume=args.resume
         )
 
 
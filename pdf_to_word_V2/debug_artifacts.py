@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+延后生成调试文件
+转换完成后，在低优先级的后台进程中找出可疑页面（使用了 fallback、没有文本、超大单格表格），
+只为这些页面生成 debug PDF、layout JSON 和 DOCX，转换本身不再等待调试文件
+"""
+
+import json
+import logging
+import os
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Set
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# 以新页面开始的节类型（未设置 w:type 时默认为 nextPage）
+_PAGE_SECTION_TYPES = (None, 'nextPage', 'oddPage', 'evenPage')
+
+# 可疑原因的优先级（超过 max_pages 时优先保留靠前的原因）
+REASONS = ('conversion_failed', 'document_fallback', 'fallback', 'giant_table', 'empty_text')
+
+
+def _lower_priority():
+    """调试进程初始化：降低 CPU 调度优先级，不与转换争抢 CPU"""
+    try:
+        os.sched_setscheduler(0, os.SCHED_IDLE, os.sched_param(0))
+    except (AttributeError, OSError):
+        try:
+            os.nice(19)
+        except (AttributeError, OSError):
+            pass
+
+
+def empty_text_pages(pdf_path: Path) -> List[int]:
+    """没有可提取文本的页码（从 0 开始）"""
+    import fitz  # pyright: ignore[reportMissingImports]
+
+    with fitz.open(str(pdf_path)) as doc:
+        return [page.number for page in doc if not page.get_text().strip()]
+
+
+def giant_table_pages(docx_path: Path, min_chars: int = 500) -> List[int]:
+    """
+    包含超大单格表格（1 行 1 列且文本不少于 min_chars 字）的页码
+
+    pdf2docx 每页以一个新页面节开始，页内分栏为 continuous / nextColumn 节，
+    按节类型把正文中的表格映射回 PDF 页码（被忽略的出错页面没有对应的节，其后页码会偏移）。
+    """
+    with zipfile.ZipFile(docx_path) as zf:
+        body = ET.fromstring(zf.read('word/document.xml')).find(f'{_W}body')
+    if body is None:
+        return []
+
+    pages = set()
+    page = -1
+    pending = []
+    for child in body:
+        if child.tag == f'{_W}tbl':
+            rows = child.findall(f'{_W}tr')
+            if len(rows) == 1 and len(rows[0].findall(f'{_W}tc')) == 1:
+                text = sum(len(t.text or '') for t in child.iter(f'{_W}t'))
+                if text >= min_chars:
+                    pending.append(child)
+            continue
+        if child.tag == f'{_W}p':
+            sect = child.find(f'{_W}pPr/{_W}sectPr')
+        elif child.tag == f'{_W}sectPr':
+            sect = child
+        else:
+            continue
+        if sect is None:
+            continue
+        # 节属性位于节末尾，到这里才知道这一节是否从新页面开始
+        kind = sect.find(f'{_W}type')
+        if page < 0 or (kind.get(f'{_W}val') if kind is not None else None) in _PAGE_SECTION_TYPES:
+            page += 1
+        if pending:
+            pages.add(page)
+            pending = []
+    return sorted(pages)
+
+
+def generate_debug(
+    pdf_path: str,
+    docx_path: Optional[str],
+    debug_dir: str,
+    settings: Dict[str, Any],
+    fallback_pages: List[int],
+    document_fallback: bool = False,
+    failed: bool = False,
+    max_pages: int = 5,
+    giant_table_chars: int = 500
+) -> Dict[str, Any]:
+    """
+    找出可疑页面并生成调试文件（在调试进程中执行）
+
+    Returns:
+        {'pages': {页码: [原因]}, 'generated': [页码], 'errors': {页码: 错误}}，同时写入 debug_dir/suspicious.json
+    """
+    from pdf2docx import Converter  # pyright: ignore[reportMissingImports]
+
+    suspicious: Dict[int, List[str]] = {}
+
+    def flag(pages, reason):
+        for i in pages:
+            suspicious.setdefault(i, []).append(reason)
+
+    if failed:
+        flag([0], 'conversion_failed')
+    if document_fallback:
+        flag([0], 'document_fallback')
+    flag(fallback_pages, 'fallback')
+    if docx_path and Path(docx_path).exists():
+        try:
+            flag(giant_table_pages(Path(docx_path), giant_table_chars), 'giant_table')
+        except (zipfile.BadZipFile, KeyError, ET.ParseError) as e:
+            logging.warning(f"无法检查输出文档的表格: {e}")
+    flag(empty_text_pages(Path(pdf_path)), 'empty_text')
+
+    report = {'pages': {str(i): reasons for i, reasons in sorted(suspicious.items())}, 'generated': [], 'errors': {}}
+    if not suspicious:
+        return report
+
+    ordered = sorted(suspicious, key=lambda i: (min(REASONS.index(r) for r in suspicious[i]), i))
+    debug_dir = Path(debug_dir)
+    debug_dir.mkdir(parents=True, exist_ok=True)
+    for i in ordered[:max_pages]:
+        cv = Converter(pdf_path)
+        try:
+            cv.debug_page(
+                i=i,
+                docx_filename=str(debug_dir / f"debug_page_{i}.docx"),
+                debug_pdf=str(debug_dir / f"debug_page_{i}.pdf"),
+                layout_file=str(debug_dir / f"layout_page_{i}.json"),
+                **settings
+            )
+            report['generated'].append(i)
+        except Exception as e:
+            report['errors'][str(i)] = str(e)
+        finally:
+            cv.close()
+
+    with open(debug_dir / "suspicious.json", 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+class DebugWorker:
+    """
+    低优先级调试进程
+
+    单个后台进程（SCHED_IDLE / nice 19）按提交顺序生成调试文件；首次提交时才启动。
+    任务完成时在回调中累计计数并释放 Future，长期运行的服务不会积累已完成任务的结果。
+    """
+
+    def __init__(self, max_pages: int = 5, giant_table_chars: int = 500, mp_context=None):
+        """
+        Args:
+            max_pages: 每个文件最多为多少个可疑页面生成调试文件
+            giant_table_chars: 单格表格文本达到该字数时视为超大表格
+            mp_context: 调试进程的 multiprocessing 上下文（None 使用默认启动方式）
+        """
+        self.max_pages = max_pages
+        self.giant_table_chars = giant_table_chars
+        self.mp_context = mp_context
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: Set[Future] = set()
+        self._idle = threading.Condition()
+        # 累计成功 / 失败的任务数，generated 为上次 wait() 之后生成调试文件的页数
+        self.succeeded = 0
+        self.failed = 0
+        self.generated = 0
+
+    def submit(
+        self,
+        pdf_path: Path,
+        docx_path: Optional[str],
+        debug_dir: Path,
+        settings: Dict[str, Any],
+        fallback_pages: List[int],
+        document_fallback: bool = False,
+        failed: bool = False
+    ) -> Future:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=self.mp_context,
+                                                 initializer=_lower_priority)
+        future = self._executor.submit(
+            generate_debug, str(pdf_path), docx_path, str(debug_dir), settings, list(fallback_pages),
+            document_fallback, failed, self.max_pages, self.giant_table_chars
+        )
+        with self._idle:
+            self._futures.add(future)
+        # 已完成的任务会立即在当前线程回调
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future: Future):
+        """任务完成回调（在执行器的管理线程中调用）：累计计数并释放 Future"""
+        generated = None
+        if not future.cancelled():
+            try:
+                generated = len(future.result()['generated'])
+            except Exception as e:
+                logging.warning(f"生成调试文件失败: {e}")
+        with self._idle:
+            self._futures.discard(future)
+            if generated is not None:
+                self.succeeded += 1
+                self.generated += generated
+            elif not future.cancelled():
+                self.failed += 1
+            self._idle.notify_all()
+
+    def pending(self) -> int:
+        with self._idle:
+            return len(self._futures)
+
+    def wait(self) -> int:
+        """
+        等待尚未完成的任务
+
+        Returns:
+            上次 wait() 之后生成调试文件的页数
+        """
+        with self._idle:
+            # 回调在 Future 完成之后才执行，等到回调把任务移出集合，计数才完整
+            self._idle.wait_for(lambda: not self._futures)
+            generated, self.generated = self.generated, 0
+        return generated
+
+    def close(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
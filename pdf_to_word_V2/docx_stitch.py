@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DOCX 分片拼接
+将同一 PDF 按页码区间分片转换得到的多个 DOCX（以及混合路由中 OCR 生成的 DOCX）合并为一个文档
+"""
+
+import hashlib
+from copy import deepcopy
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from docx import Document  # pyright: ignore[reportMissingImports]
+from docx.opc.constants import RELATIONSHIP_TYPE as RT  # pyright: ignore[reportMissingImports]
+from docx.oxml.ns import qn  # pyright: ignore[reportMissingImports]
+from lxml import etree  # pyright: ignore[reportMissingImports]
+
+
+# 元素上引用关系（图片、超链接等）的属性
+_REL_ATTRS = (qn('r:embed'), qn('r:id'), qn('r:link'))
+# 引用样式的元素
+_STYLE_REFS = (qn('w:pStyle'), qn('w:rStyle'), qn('w:tblStyle'))
+# 样式之间的引用
+_STYLE_LINKS = (qn('w:basedOn'), qn('w:next'), qn('w:link'))
+# 编号定义中随机生成、不影响效果的元素（比较内容时忽略）
+_NUMBERING_NOISE = (qn('w:nsid'), qn('w:tmpl'))
+
+
+def stitch_docx(chunk_files: List[Union[str, Path]], output_path: Union[str, Path]) -> bool:
+    """
+    按顺序拼接 pdf2docx 生成的分片 DOCX
+
+    pdf2docx 为每个 PDF 页面创建一个新节（Section），拼接时在分片边界
+    同样只插入分节符，因此不会产生多余的分页符。样式和编号按内容合并（见 append_document），
+    同一模板生成的分片不会重复导入，其他来源的 DOCX（如 OCR 结果）保留各自的格式。
+
+    Args:
+        chunk_files: 分片 DOCX 文件路径（按页码顺序）
+        output_path: 输出 DOCX 路径或可写的二进制流
+
+    Returns:
+        是否拼接成功
+    """
+    if not chunk_files:
+        return False
+
+    master = Document(str(chunk_files[0]))
+    next_id = None
+    for chunk_file in chunk_files[1:]:
+        next_id = append_document(master, Document(str(chunk_file)), next_id)
+
+    master.save(output_path if hasattr(output_path, 'write') else str(output_path))
+    return True
+
+
+def append_document(master, doc, next_docpr_id: Optional[int] = None) -> int:
+    """
+    将 doc 的正文追加到 master 末尾，作为新的节
+
+    - master 原最后一节的属性移入分节段落，doc 最后一节的属性成为新的文档末节
+    - 图片按内容去重后重新关联，外部超链接重新建立关系
+    - 编号定义按内容去重（忽略随机的 nsid），numId 重新映射
+    - 样式按 styleId + 内容合并，同名不同内容的样式重命名后再引用；doc 的默认段落样式与 master
+      不同时，未指定样式的段落显式引用 doc 的默认样式
+    - 图形对象的 docPr id 重新编号，避免与 master 中已有对象冲突
+
+    Args:
+        master: 目标 python-docx Document
+        doc: 待追加的 python-docx Document
+        next_docpr_id: master 中下一个可用的 docPr id（None 时扫描 master 正文；连续追加时传入上次的返回值，
+            避免每次重新扫描整个正文）
+
+    Returns:
+        追加后下一个可用的 docPr id
+    """
+    body = master.element.body
+    src_body = doc.element.body
+
+    num_map = _merge_numbering(master, doc)
+    style_map, default_style = _merge_styles(master, doc, num_map)
+
+    # 原最后一节转为分节段落，保持与单次转换一致的分页效果
+    sentinel = body.add_section_break()
+
+    rel_map = {}
+    next_id = next_docpr_id if next_docpr_id is not None else _max_docpr_id(body) + 1
+    for element in list(src_body):
+        if element.tag == qn('w:sectPr'):
+            continue
+        _remap_relationships(element, doc.part, master.part, rel_map)
+        _remap_styles(element, style_map, num_map, default_style)
+        for docpr in element.iter(qn('wp:docPr')):
+            docpr.set('id', str(next_id))
+            next_id += 1
+        sentinel.addprevious(element)
+
+    # 文档末节使用追加文档最后一节的页面设置
+    src_sectPr = src_body.find(qn('w:sectPr'))
+    if src_sectPr is not None:
+        sentinel.getparent().replace(sentinel, deepcopy(src_sectPr))
+    return next_id
+
+
+def _digest(element, ignore=()) -> str:
+    """元素内容的哈希（忽略 ignore 中的属性和子元素）"""
+    element = deepcopy(element)
+    for attr in ignore:
+        element.attrib.pop(attr, None)
+        for child in element.findall(attr):
+            element.remove(child)
+    return hashlib.sha1(etree.tostring(element, method='c14n')).hexdigest()
+
+
+def _numbering_root(document, create: bool = False):
+    """文档的 numbering.xml 根元素（不存在且 create 为 False 时返回 None）"""
+    try:
+        return document.part.part_related_by(RT.NUMBERING).element
+    except KeyError:
+        # python-docx 访问 numbering_part 时按默认模板创建编号部件
+        return document.part.numbering_part.element if create else None
+
+
+def _merge_numbering(master, doc) -> Dict[str, str]:
+    """
+    把 doc 的编号定义合并到 master，返回 {doc 的 numId: master 的 numId}
+
+    内容相同的 abstractNum / num 复用 master 中已有的定义。
+    """
+    src = _numbering_root(doc)
+    if src is None or (src.find(qn('w:abstractNum')) is None and src.find(qn('w:num')) is None):
+        return {}
+    dst = _numbering_root(master, create=True)
+
+    abstract_id, num_id = qn('w:abstractNumId'), qn('w:numId')
+    abstract_noise = (abstract_id,) + _NUMBERING_NOISE
+    abstracts = {_digest(a, abstract_noise): a.get(abstract_id) for a in dst.findall(qn('w:abstractNum'))}
+    nums = {_digest(n, (num_id,)): n.get(num_id) for n in dst.findall(qn('w:num'))}
+    next_abstract = max((int(a) for a in abstracts.values() if str(a).isdigit()), default=-1) + 1
+    next_num = max((int(n) for n in nums.values() if str(n).isdigit()), default=0) + 1
+
+    abstract_map = {}
+    for abstract in src.findall(qn('w:abstractNum')):
+        digest = _digest(abstract, abstract_noise)
+        if digest not in abstracts:
+            new = deepcopy(abstract)
+            new.set(abstract_id, str(next_abstract))
+            abstracts[digest] = str(next_abstract)
+            next_abstract += 1
+            # abstractNum 必须位于所有 num 之前
+            last = dst.findall(qn('w:abstractNum'))
+            if last:
+                last[-1].addnext(new)
+            else:
+                dst.insert(0, new)
+        abstract_map[abstract.get(abstract_id)] = abstracts[digest]
+
+    num_map = {}
+    for num in src.findall(qn('w:num')):
+        new = deepcopy(num)
+        ref = new.find(qn('w:abstractNumId'))
+        if ref is not None:
+            ref.set(qn('w:val'), abstract_map.get(ref.get(qn('w:val')), ref.get(qn('w:val'))))
+        digest = _digest(new, (num_id,))
+        if digest not in nums:
+            new.set(num_id, str(next_num))
+            nums[digest] = str(next_num)
+            next_num += 1
+            last = dst.findall(qn('w:num')) or dst.findall(qn('w:abstractNum'))
+            if last:
+                last[-1].addnext(new)
+            else:
+                dst.append(new)
+        num_map[num.get(num_id)] = nums[digest]
+    return num_map
+
+
+def _merge_styles(master, doc, num_map: Dict[str, str]):
+    """
+    把 doc 的样式合并到 master
+
+    与 master 同名但内容不同的样式，以及（递归）基于这些样式的样式都需要重命名，
+    否则继承到的是 master 中同名基础样式的格式。
+
+    Returns:
+        ({doc 的 styleId: master 的 styleId}（仅包含被重命名的样式）,
+         doc 的默认段落样式在 master 中的 styleId（与 master 默认段落样式相同时为 None）)
+    """
+    style_id, val = qn('w:styleId'), qn('w:val')
+    dst = master.styles.element
+    existing = {s.get(style_id): s for s in dst.findall(qn('w:style'))}
+    hashes = {sid: _digest(s) for sid, s in existing.items()}
+
+    src_styles = {}
+    for style in doc.styles.element.findall(qn('w:style')):
+        style = deepcopy(style)
+        for element in style.iter(qn('w:numId')):
+            if element.get(val) in num_map:
+                element.set(val, num_map[element.get(val)])
+        src_styles[style.get(style_id)] = style
+    src_default = _default_paragraph_style(src_styles.values())
+    dst_default = _default_paragraph_style(existing.values())
+
+    def base_of(sid):
+        base = src_styles[sid].find(qn('w:basedOn'))
+        return base.get(val) if base is not None else None
+
+    conflicts = {sid for sid, style in src_styles.items() if sid in existing and hashes[sid] != _digest(style)}
+    changed = True
+    while changed:
+        changed = False
+        for sid in src_styles:
+            if sid in existing and sid not in conflicts and base_of(sid) in conflicts:
+                conflicts.add(sid)
+                changed = True
+
+    def depth(sid, seen=()):
+        base = base_of(sid)
+        if base not in src_styles or base in seen:
+            return 0
+        return depth(base, seen + (sid,)) + 1
+
+    style_map = {}
+    added = [style for sid, style in src_styles.items() if sid not in existing]
+    # 基础样式先确定新名称，派生样式的 basedOn 随之更新后再比较内容
+    for sid in sorted(conflicts, key=depth):
+        style = src_styles[sid]
+        _remap_style_links(style, style_map)
+        digest = _digest(style)
+        # 查找此前已重命名的相同样式，否则新建
+        n = 2
+        while f"{sid}{n}" in existing and hashes[f"{sid}{n}"] != digest:
+            n += 1
+        new_id = f"{sid}{n}"
+        style_map[sid] = new_id
+        if new_id not in existing:
+            style.set(style_id, new_id)
+            name = style.find(qn('w:name'))
+            if name is not None:
+                name.set(val, f"{name.get(val)} {n}")
+            existing[new_id] = style
+            hashes[new_id] = digest
+            added.append(style)
+
+    for style in added:
+        # master 已有默认样式
+        style.attrib.pop(qn('w:default'), None)
+        _remap_style_links(style, style_map)
+        dst.append(style)
+
+    default_style = None
+    if src_default and style_map.get(src_default, src_default) != dst_default:
+        default_style = style_map.get(src_default, src_default)
+    return style_map, default_style
+
+
+def _remap_style_links(style, style_map: Dict[str, str]):
+    for element in style:
+        if element.tag in _STYLE_LINKS and element.get(qn('w:val')) in style_map:
+            element.set(qn('w:val'), style_map[element.get(qn('w:val'))])
+
+
+def _default_paragraph_style(styles) -> Optional[str]:
+    for style in styles:
+        if style.get(qn('w:type')) == 'paragraph' and style.get(qn('w:default')) in ('1', 'true', 'on'):
+            return style.get(qn('w:styleId'))
+    return None
+
+
+def _remap_styles(element, style_map: Dict[str, str], num_map: Dict[str, str], default_style: Optional[str]):
+    """重写正文元素中的样式 id 和 numId"""
+    if default_style:
+        paragraphs = [element] if element.tag == qn('w:p') else list(element.iter(qn('w:p')))
+        for p in paragraphs:
+            if p.find(f"{qn('w:pPr')}/{qn('w:pStyle')}") is None:
+                p.get_or_add_pPr().get_or_add_pStyle().set(qn('w:val'), default_style)
+    if not style_map and not num_map:
+        return
+    for node in element.iter():
+        if node.tag in _STYLE_REFS and node.get(qn('w:val')) in style_map:
+            node.set(qn('w:val'), style_map[node.get(qn('w:val'))])
+        elif node.tag == qn('w:numId') and node.get(qn('w:val')) in num_map:
+            node.set(qn('w:val'), num_map[node.get(qn('w:val'))])
+
+
+def _remap_relationships(element, src_part, dst_part, rel_map: dict):
+    """将 element 中引用的关系从 src_part 迁移到 dst_part，并更新 rId"""
+    for node in element.iter():
+        for attr in _REL_ATTRS:
+            rId = node.get(attr)
+            if not rId:
+                continue
+            if rId not in rel_map:
+                rel_map[rId] = _copy_relationship(src_part.rels[rId], dst_part)
+            node.set(attr, rel_map[rId])
+
+
+def _copy_relationship(rel, dst_part) -> str:
+    """在 dst_part 中建立与 rel 等价的关系，返回新的 rId"""
+    if rel.is_external:
+        return dst_part.relate_to(rel.target_ref, rel.reltype, is_external=True)
+    if rel.reltype == RT.IMAGE:
+        # 按 SHA1 去重，重复的图片（logo、印章等）只保存一份
+        rId, _ = dst_part.get_or_add_image(BytesIO(rel.target_part.blob))
+        return rId
+    return dst_part.relate_to(rel.target_part, rel.reltype)
+
+
+def _max_docpr_id(body) -> int:
+    """返回正文中已使用的最大 docPr id"""
+    ids = [int(x) for x in body.xpath('.//wp:docPr/@id') if str(x).isdigit()]
+    return max(ids, default=0)
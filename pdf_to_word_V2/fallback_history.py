@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fallback 历史记录
+记录每个文档的特征以及是否需要 fallback 配置，用于预测相似文档是否应直接使用 fallback 配置
+"""
+
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+import fitz  # pyright: ignore[reportMissingImports]
+
+
+# 用于统计绘图密度的最大采样页数
+_DENSITY_SAMPLE_PAGES = 5
+
+
+def document_features(pdf_path: Path) -> Dict[str, Any]:
+    """
+    提取用于 fallback 预测的文档特征
+
+    - producer / creator: PDF 生成工具（WPS、Word 导出等）
+    - page_size: 首页尺寸（pt，取整）
+    - density: 前几页平均矢量路径数的分档（low / mid / high）
+    - template: 首页文本去除数字、空白后前 300 字的哈希（同一合同模板的不同合同相同）
+    """
+    with fitz.open(str(pdf_path)) as doc:
+        metadata = doc.metadata or {}
+        first = doc[0] if doc.page_count else None
+
+        page_size = ''
+        template = ''
+        if first is not None:
+            page_size = f"{round(first.rect.width)}x{round(first.rect.height)}"
+            text = re.sub(r'[\d\s]+', '', first.get_text())[:300]
+            template = hashlib.sha1(text.encode('utf-8')).hexdigest() if text else ''
+
+        sample = min(doc.page_count, _DENSITY_SAMPLE_PAGES)
+        paths = sum(len(doc[i].get_drawings()) for i in range(sample))
+        avg_paths = paths / sample if sample else 0
+
+    if avg_paths < 5:
+        density = 'low'
+    elif avg_paths < 50:
+        density = 'mid'
+    else:
+        density = 'high'
+
+    return {
+        'producer': (metadata.get('producer') or '').strip(),
+        'creator': (metadata.get('creator') or '').strip(),
+        'page_size': page_size,
+        'density': density,
+        'template': template
+    }
+
+
+def _feature_key(features: Dict[str, Any]) -> str:
+    """不含模板指纹的粗粒度特征键"""
+    return '|'.join([features.get('producer', ''), features.get('page_size', ''), features.get('density', '')])
+
+
+class FallbackHistory:
+    """
+    基于 JSONL 文件的 fallback 历史记录
+
+    每行一条记录: {"time", "source", "features", "fallback", "fallback_pages", "predicted", "probed"}
+    fallback 只表示整份文档需要 fallback 配置，逐页 fallback 的页码记录在 fallback_pages 中。
+    预测时先按模板指纹匹配，再按（生成工具、页面尺寸、绘图密度）匹配；
+    预测为 fallback 的文档先用标准配置抽样转换（probed），抽样结果作为新证据计入统计，
+    因此预测可以随新证据反转。未经抽样直接采用预测的记录不计入，避免预测结果自我强化。
+    """
+
+    def __init__(self, history_file: str, threshold: float = 0.5, min_samples: int = 2):
+        """
+        Args:
+            history_file: 历史记录文件路径
+            threshold: 相似文档中需要 fallback 的比例达到该值时预测为需要 fallback
+            min_samples: 参与预测的最少相似文档数
+        """
+        self.path = Path(history_file)
+        self.threshold = threshold
+        self.min_samples = min_samples
+        self._by_template: Dict[str, List[int]] = {}
+        self._by_key: Dict[str, List[int]] = {}
+        self._load()
+
+    def _load(self):
+        """读取历史记录并汇总为 [文档数, fallback 数]"""
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if not record.get('predicted') or record.get('probed'):
+                    self._count(record.get('features', {}), bool(record.get('fallback')))
+
+    def _count(self, features: Dict[str, Any], fallback: bool):
+        for index, key in ((self._by_template, features.get('template')),
+                           (self._by_key, _feature_key(features))):
+            if not key:
+                continue
+            counts = index.setdefault(key, [0, 0])
+            counts[0] += 1
+            counts[1] += int(fallback)
+
+    def predict(self, features: Dict[str, Any]) -> bool:
+        """根据相似文档的历史判断是否应直接使用 fallback 配置"""
+        for index, key in ((self._by_template, features.get('template')),
+                           (self._by_key, _feature_key(features))):
+            counts = index.get(key) if key else None
+            if counts and counts[0] >= self.min_samples:
+                return counts[1] / counts[0] >= self.threshold
+        return False
+
+    def record(
+        self,
+        source: str,
+        features: Dict[str, Any],
+        fallback: bool,
+        fallback_pages: Optional[List[int]] = None,
+        predicted: bool = False,
+        probed: bool = False
+    ):
+        """
+        追加一条记录（单行写入，多个工作进程同时追加也不会交错）
+
+        Args:
+            source: PDF 文件名
+            features: document_features 返回的特征
+            fallback: 整份文档是否需要 fallback 配置（只有部分页面使用 fallback 时为 False）
+            fallback_pages: 使用 fallback 配置的页码（从 0 开始）
+            predicted: 是否由预测直接选择了 fallback 配置
+            probed: 是否先用标准配置抽样转换检验了预测（检验过的记录计入统计）
+        """
+        record = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'source': source,
+            'features': features,
+            'fallback': fallback,
+            'fallback_pages': fallback_pages or [],
+            'predicted': predicted,
+            'probed': probed
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        if not predicted or probed:
+            self._count(features, fallback)
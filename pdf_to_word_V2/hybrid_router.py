@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本层 / OCR 混合路由
+按页检查文本层和图片覆盖率：有文本层的页面走 pdf2docx，只有图片的扫描页（签字页、盖章页等）
+交给 V1 的 PP-StructureV3 识别，最后按页码顺序拼接为一个 DOCX
+"""
+
+import logging
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import fitz  # pyright: ignore[reportMissingImports]
+
+
+TEXT = 'text'
+OCR = 'ocr'
+
+
+def image_coverage(page) -> float:
+    """页面中图片覆盖面积占页面面积的比例（重叠部分重复计算，最大为 1）"""
+    area = abs(page.rect)
+    if not area:
+        return 0.0
+    covered = 0.0
+    for info in page.get_image_info():
+        covered += abs(fitz.Rect(info['bbox']) & page.rect)
+    return min(covered / area, 1.0)
+
+
+def classify_pages(fitz_doc, min_text_chars: int = 20, min_image_coverage: float = 0.5) -> List[str]:
+    """
+    判断每页的转换方式
+
+    可提取文字少于 min_text_chars 且图片覆盖率不低于 min_image_coverage 的页面视为扫描页（OCR），
+    其余页面（包括空白页）走 pdf2docx。
+
+    Returns:
+        每页的转换方式 TEXT / OCR
+    """
+    kinds = []
+    for page in fitz_doc:
+        chars = len(''.join(page.get_text().split()))
+        if chars < min_text_chars and image_coverage(page) >= min_image_coverage:
+            kinds.append(OCR)
+        else:
+            kinds.append(TEXT)
+    return kinds
+
+
+def page_runs(kinds: List[str]) -> List[Tuple[str, List[int]]]:
+    """
+    将相同转换方式的连续页面合并为区间
+
+    Returns:
+        [(转换方式, [页码, ...]), ...]（按页码顺序）
+    """
+    runs = []
+    for i, kind in enumerate(kinds):
+        if runs and runs[-1][0] == kind:
+            runs[-1][1].append(i)
+        else:
+            runs.append((kind, [i]))
+    return runs
+
+
+def extract_pages(fitz_doc, pages: List[int], output_path: Path):
+    """将指定页面另存为新的 PDF"""
+    with fitz.open() as sub:
+        for i in pages:
+            sub.insert_pdf(fitz_doc, from_page=i, to_page=i)
+        sub.save(str(output_path))
+
+
+class OCRBackend:
+    """
+    V1 的常驻 PP-StructureV3 识别线程（首次需要 OCR 时才加载模型）
+
+    V1 的模块通过 v1_dir 加入 sys.path 后导入；未安装 PaddleOCR 时 available() 返回 False。
+    """
+
+    def __init__(self, v1_dir: str, use_gpu: bool = False, enable_table: bool = True,
+                 options: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            v1_dir: pdf_to_word_V1 目录
+            use_gpu: 是否使用 GPU
+            enable_table: 是否启用表格识别
+            options: 传给 PPStructureV3 的其他参数
+        """
+        self.v1_dir = Path(v1_dir)
+        self.use_gpu = use_gpu
+        self.enable_table = enable_table
+        self.options = options or {}
+        self.worker = None
+        self.error = None
+
+    def available(self) -> bool:
+        """加载识别模型，返回是否可用（只尝试一次）"""
+        if self.worker is not None:
+            return True
+        if self.error is not None:
+            return False
+        try:
+            v1_dir = str(self.v1_dir.resolve())
+            if v1_dir not in sys.path:
+                sys.path.append(v1_dir)
+            from ocr_worker import StructureWorker  # pyright: ignore[reportMissingImports]
+            worker = StructureWorker(self.use_gpu, self.enable_table, **self.options).start()
+            load_time = worker.wait_ready()
+        except Exception as e:
+            self.error = e
+            logging.warning(f"PP-StructureV3 不可用 ({e})，扫描页改用 pdf2docx 转换")
+            return False
+        logging.info(f"PP-StructureV3 模型加载完成，耗时 {load_time:.1f}s")
+        self.worker = worker
+        return True
+
+    def convert(self, pdf_path: Path, save_dir: Path) -> List[Optional[Path]]:
+        """
+        识别 PDF，返回每页生成的 DOCX（按页码顺序，某页没有生成 DOCX 时为 None）
+        """
+        save_dir.mkdir(parents=True, exist_ok=True)
+        ocr = self.worker.submit(pdf_path, save_dir).result()
+        files = []
+        for i in range(ocr['pages']):
+            docx_file = save_dir / f"{pdf_path.stem}_{i}.docx"
+            files.append(docx_file if docx_file.exists() else None)
+        return files
+
+    def close(self):
+        """停止识别线程"""
+        if self.worker is not None:
+            self.worker.close()
+            self.worker = None
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+转换指标（Prometheus 文本格式）
+统计文档数、页数、耗时分布、fallback、失败和缓存命中，可通过本地 HTTP 端点（/metrics）
+暴露，或写入 node_exporter textfile collector 目录下的 .prom 文件
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 单个文档转换耗时的分桶（秒）
+DURATION_BUCKETS = (0.5, 1, 2, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{k}="{_escape(v)}"' for k, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """指标基类：按标签值分组保存数据"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}' for key, value in items]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        if not self.labels:
+            self._values[()] = 0
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def _render_samples(self, items) -> List[str]:
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+class ConversionMetrics:
+    """
+    PDF 转换指标
+
+    convert_single 的每个结果通过 observe() 计入；进程池模式下由主进程根据工作进程返回的结果计入。
+    """
+
+    def __init__(self, textfile: Optional[str] = None):
+        """
+        Args:
+            textfile: textfile collector 文件路径（None 表示不写文件）
+        """
+        self.textfile = Path(textfile) if textfile else None
+        self.documents = Counter('pdf2docx_documents_total', '已处理的文档数', ('status',))
+        self.pages = Counter('pdf2docx_pages_total', '转换成功的页数')
+        self.fallbacks = Counter('pdf2docx_fallback_total', '使用 fallback 配置的文档数')
+        self.cache = Counter('pdf2docx_cache_requests_total', '转换结果缓存查询次数', ('result',))
+        self.duration = Histogram('pdf2docx_document_duration_seconds', '单个文档转换耗时（秒）', ('status',))
+        self.batch_documents = Gauge('pdf2docx_batch_documents', '当前批次的文档总数')
+        self.last_document = Gauge('pdf2docx_last_document_timestamp_seconds', '最近一个文档完成的时间')
+        self._metrics = [self.documents, self.pages, self.fallbacks, self.cache, self.duration,
+                         self.batch_documents, self.last_document]
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._write_lock = threading.Lock()
+
+    def observe(self, result: Dict[str, Any]):
+        """计入一个 convert_single 结果"""
+        status = 'success' if result.get('success') else 'failed'
+        self.documents.inc(status=status)
+        self.duration.observe(result.get('duration', 0), status=status)
+        if result.get('success'):
+            # 混合路由中 OCR 未生成内容的页面不计入
+            self.pages.inc((result.get('pages') or 0) - len(result.get('missing_pages') or []))
+            if result.get('use_fallback'):
+                self.fallbacks.inc()
+        if result.get('cache_hit') is not None:
+            self.cache.inc(result=('hit' if result['cache_hit'] else 'miss'))
+        self.last_document.set(time.time())
+        self.write_textfile()
+
+    def start_batch(self, total: int):
+        self.batch_documents.set(total)
+        self.write_textfile()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self):
+        """写入 textfile collector 文件（先写临时文件再 rename，避免采集到半个文件）"""
+        if self.textfile is None:
+            return
+        with self._write_lock:
+            try:
+                self.textfile.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.textfile.with_name(f".{self.textfile.name}.{os.getpid()}.tmp")
+                tmp.write_text(self.render(), encoding='utf-8')
+                os.replace(tmp, self.textfile)
+            except OSError as e:
+                logging.warning(f"写入指标文件失败: {e}")
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> int:
+        """
+        在后台线程启动 HTTP 端点（GET /metrics）
+
+        Returns:
+            实际监听的端口（port 为 0 时由系统分配）
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
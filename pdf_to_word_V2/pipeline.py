@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段转换流程
+按 pdf2docx 的 load_pages -> parse_document -> parse_pages -> make_docx 四个阶段执行转换，
+在页面级支持缓存复用、按页覆盖的解析参数，以及只对失败页面使用 fallback 参数重试；
+大文件可按页窗口逐段转换后拼接，限制内存峰值
+"""
+
+import gc
+import logging
+import tempfile
+import time
+from copy import deepcopy
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+from docx import Document  # pyright: ignore[reportMissingImports]
+from pdf2docx import Converter, Page  # pyright: ignore[reportMissingImports]
+from pdf2docx.converter import ConversionException, MakedocxException  # pyright: ignore[reportMissingImports]
+
+from conversion_cache import PageLayoutCache, page_fingerprints, settings_hash, pdf2docx_version
+from docx_stitch import stitch_docx
+from profiling import ConversionProfiler, phase, rss_bytes
+
+
+def convert_pages(
+    cv,
+    docx_path,
+    kwargs: Dict[str, Any],
+    start: int = 0,
+    end: Optional[int] = None,
+    page_cache: Optional[PageLayoutCache] = None,
+    page_settings: Optional[Dict[int, Dict[str, Any]]] = None,
+    fallback_settings: Optional[Dict[str, Any]] = None,
+    profiler: Optional[ConversionProfiler] = None
+) -> Dict[str, Any]:
+    """
+    分阶段执行转换，等价于 cv.convert(docx_path, start=start, end=end, **kwargs)
+
+    - page_cache: 内容未变化的页面直接从缓存恢复，不再解析
+    - page_settings: 按页覆盖的解析参数，如 {3: {'parse_lattice_table': False}}
+    - fallback_settings: 页面解析或生成失败时，只对该页用这些参数覆盖后单独重试
+    - profiler: 记录各阶段及每页的耗时与内存变化
+
+    不支持 pdf2docx 内部多进程（multi_processing 会被忽略）。
+
+    Args:
+        cv: pdf2docx Converter
+        docx_path: 输出 DOCX 路径或可写的二进制流
+        kwargs: 转换参数
+        start: 起始页（含）
+        end: 结束页（不含，None 表示到最后一页）
+        page_cache: 页面缓存（None 表示不使用）
+        page_settings: 按页覆盖的解析参数
+        fallback_settings: 失败页面重试时覆盖的参数（None 表示不重试）
+        profiler: 性能记录器（None 表示不记录）
+
+    Returns:
+        统计信息: reused（复用缓存页数）、parsed（解析页数）、page_times（{页码: 解析耗时}）、
+        fallback_pages（使用 fallback 参数的页码）
+    """
+    page_settings = page_settings or {}
+    settings = cv.default_settings
+    settings.update(kwargs)
+    settings['multi_processing'] = False
+
+    with phase(profiler, 'load_pages'):
+        cv.load_pages(start, end)
+    page_indexes = [page.id for page in cv.pages if not page.skip_parsing]
+
+    # 命中缓存的页面不再参与解析
+    cached = {}
+    page_keys = {}
+    if page_cache:
+        fingerprints = page_fingerprints(cv.fitz_doc, page_indexes)
+        version = pdf2docx_version()
+        for i in page_indexes:
+            page_digest = settings_hash(dict(settings, **page_settings.get(i, {})))
+            page_keys[i] = settings_hash({'page': fingerprints[i], 'settings': page_digest, 'version': version})
+            data = page_cache.get(page_keys[i])
+            if data is not None:
+                cached[i] = data
+                cv.pages[i].skip_parsing = True
+
+    todo = [i for i in page_indexes if i not in cached]
+    page_times = {}
+    fallback_pages = []
+    if todo:
+        with phase(profiler, 'parse_document'):
+            cv.parse_document(**settings)
+        with phase(profiler, 'parse_pages'):
+            page_times = parse_pages(cv, todo, settings, page_settings, fallback_settings, fallback_pages,
+                                     profiler)
+        if page_cache:
+            for i in todo:
+                page = cv.pages[i]
+                if page.finalized and i not in fallback_pages:
+                    page_cache.put(page_keys[i], page.store())
+
+    # 恢复缓存页面（页码以当前文档为准，修订版中页面位置可能变化）
+    for i, data in cached.items():
+        cv.pages[i].restore(dict(data, id=i))
+
+    with phase(profiler, 'make_docx'):
+        make_docx(cv, docx_path, settings, fallback_settings, fallback_pages, profiler)
+    if page_cache:
+        page_cache.evict()
+
+    return {
+        'reused': len(cached),
+        'parsed': len(todo),
+        'page_times': page_times,
+        'fallback_pages': sorted(set(fallback_pages))
+    }
+
+
+def parse_pages(
+    cv,
+    page_indexes: List[int],
+    settings: Dict[str, Any],
+    page_settings: Optional[Dict[int, Dict[str, Any]]] = None,
+    fallback_settings: Optional[Dict[str, Any]] = None,
+    fallback_pages: Optional[List[int]] = None,
+    profiler: Optional[ConversionProfiler] = None
+) -> Dict[int, float]:
+    """
+    逐页解析（对应 Converter.parse_pages），每页可使用单独覆盖的参数
+
+    解析失败的页面在提供 fallback_settings 时单独重试，成功的页码追加到 fallback_pages。
+
+    Returns:
+        {页码: 解析耗时（秒）}
+    """
+    page_settings = page_settings or {}
+    page_times = {}
+    for n, i in enumerate(page_indexes, start=1):
+        page = cv.pages[i]
+        pid = i + 1
+        logging.info('(%d/%d) Page %d', n, len(page_indexes), pid)
+        t0 = time.perf_counter()
+        page_kwargs = dict(settings, **page_settings.get(i, {}))
+        try:
+            with phase(profiler, 'parse_page', i):
+                page.parse(**page_kwargs)
+        except Exception as e:
+            data = None
+            if fallback_settings:
+                logging.warning('Retry page %d with fallback settings due to parsing page error: %s', pid, e)
+                data = parse_page_with_fallback(cv, i, page_kwargs, fallback_settings)
+            if data is not None:
+                page.restore(dict(data, id=i))
+                if fallback_pages is not None:
+                    fallback_pages.append(i)
+            elif settings['raw_exceptions']:
+                raise
+            elif not settings['debug'] and settings['ignore_page_error']:
+                logging.error('Ignore page %d due to parsing page error: %s', pid, e)
+            else:
+                raise ConversionException(f'Error when parsing page {pid}: {e}')
+        page_times[i] = time.perf_counter() - t0
+    return page_times
+
+
+def parse_page_with_fallback(
+    cv,
+    page_index: int,
+    settings: Dict[str, Any],
+    fallback_settings: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """
+    用 fallback 参数单独解析一页（新建 Converter，只分析这一页）
+
+    Returns:
+        解析成功时返回 Page.store() 数据，否则返回 None
+    """
+    if cv.filename_pdf:
+        fb = Converter(cv.filename_pdf, cv.password)
+    else:
+        fb = Converter(stream=cv.fitz_doc.tobytes(), password=cv.password)
+
+    fb_settings = dict(settings, **fallback_settings)
+    try:
+        fb.load_pages(pages=[page_index]).parse_document(**fb_settings)
+        fb.pages[page_index].parse(**fb_settings)
+        return fb.pages[page_index].store()
+    except Exception as e:
+        logging.error('Fallback settings failed for page %d: %s', page_index + 1, e)
+        return None
+    finally:
+        fb.close()
+
+
+def make_docx(
+    cv,
+    docx_path,
+    settings: Dict[str, Any],
+    fallback_settings: Optional[Dict[str, Any]] = None,
+    fallback_pages: Optional[List[int]] = None,
+    profiler: Optional[ConversionProfiler] = None
+):
+    """
+    逐页生成 DOCX（对应 Converter.make_docx）
+
+    某页生成失败时先撤销该页已写入的内容；提供 fallback_settings 时用 fallback 参数
+    重新解析该页后再生成，成功的页码追加到 fallback_pages。
+    """
+    parsed_pages = [page for page in cv.pages if page.finalized]
+    if not parsed_pages:
+        raise ConversionException('No parsed pages. Please parse page first.')
+
+    docx_file = Document()
+    for n, page in enumerate(parsed_pages, start=1):
+        pid = page.id + 1
+        logging.info('(%d/%d) Page %d', n, len(parsed_pages), pid)
+        snapshot = _snapshot_body(docx_file)
+        try:
+            with phase(profiler, 'make_page', page.id):
+                page.make_docx(docx_file)
+            continue
+        except Exception as e:
+            error = e
+        _rollback_body(docx_file, snapshot)
+
+        if fallback_settings:
+            logging.warning('Retry page %d with fallback settings due to making page error: %s', pid, error)
+            data = parse_page_with_fallback(cv, page.id, settings, fallback_settings)
+            if data is not None:
+                try:
+                    Page().restore(dict(data, id=page.id)).make_docx(docx_file)
+                    if fallback_pages is not None:
+                        fallback_pages.append(page.id)
+                    continue
+                except Exception as e:
+                    error = e
+                    _rollback_body(docx_file, snapshot)
+
+        if settings['raw_exceptions']:
+            raise error
+        if not settings['debug'] and settings['ignore_page_error']:
+            logging.error('Ignore page %d due to making page error: %s', pid, error)
+        else:
+            raise MakedocxException(f'Error when make page {pid}: {error}')
+
+    docx_file.save(docx_path if hasattr(docx_path, 'write') else str(docx_path))
+
+
+def _snapshot_body(docx_file):
+    """记录正文当前的元素数量和文档末节属性，用于撤销失败页面写入的内容"""
+    body = docx_file.element.body
+    sectPr = body.sectPr
+    return len(body), deepcopy(sectPr) if sectPr is not None else None
+
+
+def _rollback_body(docx_file, snapshot):
+    """撤销快照之后追加到正文的元素，并恢复文档末节属性"""
+    count, sectPr = snapshot
+    body = docx_file.element.body
+    current = body.sectPr
+    for element in list(body)[count - (1 if current is not None else 0):]:
+        if element is not current:
+            body.remove(element)
+    if sectPr is not None and current is not None:
+        body.replace(current, sectPr)
+
+
+def convert_windowed(
+    cv,
+    docx_path,
+    kwargs: Dict[str, Any],
+    window_pages: int,
+    min_window_pages: int = 1,
+    max_rss_mb: int = 0,
+    page_cache: Optional[PageLayoutCache] = None,
+    page_settings: Optional[Dict[int, Dict[str, Any]]] = None,
+    fallback_settings: Optional[Dict[str, Any]] = None,
+    profiler: Optional[ConversionProfiler] = None,
+    logger: Optional[logging.Logger] = None
+) -> Dict[str, Any]:
+    """
+    按页窗口逐段转换：每次只解析 window_pages 页，窗口 DOCX 写入临时文件后释放解析结果，全部窗口完成后再拼接
+
+    pdf2docx 在 make_docx 之前保留所有已解析页面，内存峰值随页数增长；逐段转换时解析阶段的
+    峰值只取决于窗口大小，转换过程中也不在内存中保留不断增长的输出文档，最后拼接时只加载各窗口的 DOCX。
+    窗口转换后常驻内存超过 max_rss_mb 时，后续窗口减半（不小于 min_window_pages）。
+    文档级解析（Pages._parse_document）在 pdf2docx 中尚未实现，各窗口单独解析与整体转换结果一致。
+
+    Args:
+        cv: pdf2docx Converter
+        docx_path: 输出 DOCX 路径或可写的二进制流
+        kwargs: 转换参数
+        window_pages: 每个窗口的页数
+        min_window_pages: 自动缩小时的最小窗口页数
+        max_rss_mb: 常驻内存上限（MB，0 表示不根据内存调整窗口）
+        其余参数同 convert_pages
+
+    Returns:
+        合并后的统计信息（见 convert_pages），额外包含 windows（各窗口的 (start, end)）
+    """
+    import fitz  # pyright: ignore[reportMissingImports]
+
+    logger = logger or logging.getLogger(__name__)
+    page_settings = page_settings or {}
+    page_count = len(cv.fitz_doc)
+    window = max(1, window_pages)
+    stats_list = []
+    windows = []
+    # 窗口文件放在输出文件旁边（输出为流时使用系统临时目录）
+    tmp_parent = None if hasattr(docx_path, 'write') else Path(docx_path).parent
+    with tempfile.TemporaryDirectory(prefix='.windows_', dir=tmp_parent) as tmp_dir:
+        window_files = []
+        start = 0
+        while start < page_count:
+            end = min(start + window, page_count)
+            window_file = Path(tmp_dir) / f"window_{len(windows):04d}.docx"
+            stats = convert_pages(cv, window_file, kwargs, start, end,
+                                  page_cache=page_cache,
+                                  page_settings={i: o for i, o in page_settings.items() if start <= i < end},
+                                  fallback_settings=fallback_settings, profiler=profiler)
+            rss_mb = rss_bytes() / 1048576
+            stats_list.append(stats)
+            windows.append((start, end))
+            window_files.append(window_file)
+
+            # 释放已解析页面与 MuPDF 缓存，再开始下一个窗口
+            cv.pages.reset()
+            fitz.TOOLS.store_shrink(100)
+            gc.collect()
+
+            logger.info(f"  窗口 [{start + 1}-{end}]: 常驻内存 {rss_mb:.0f}MB")
+            if max_rss_mb and rss_mb > max_rss_mb and window > min_window_pages:
+                window = max(min_window_pages, window // 2)
+                logger.warning(f"  常驻内存 {rss_mb:.0f}MB 超过上限 {max_rss_mb}MB，窗口缩小为 {window} 页")
+            start = end
+
+        # 所有窗口的解析结果都已释放，再一次性拼接
+        with phase(profiler, 'stitch_windows'):
+            stitch_docx(window_files, docx_path)
+    merged = merge_stats(stats_list)
+    merged['windows'] = windows
+    return merged
+
+
+def merge_stats(stats_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """合并多个 convert_pages 的统计信息（分片转换时使用）"""
+    merged = {'reused': 0, 'parsed': 0, 'page_times': {}, 'fallback_pages': []}
+    for stats in stats_list:
+        merged['reused'] += stats['reused']
+        merged['parsed'] += stats['parsed']
+        merged['page_times'].update(stats['page_times'])
+        merged['fallback_pages'].extend(stats['fallback_pages'])
+    return merged
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+转换前页面预检
+用 PyMuPDF 快速统计每页的矢量路径与表格线，按页决定是否启用 lattice / stream 表格解析
+"""
+
+import time
+from typing import Dict, Any, List, Tuple
+
+
+def analyze_page(page, max_border_width: float = 6.0, tolerance: float = 1.0) -> Dict[str, int]:
+    """
+    统计单页的矢量路径
+
+    - 水平/竖直线段计为表格线
+    - 细长矩形（宽或高不超过 max_border_width）按方向计为表格线
+    - 带描边的普通矩形计为两条横线和两条竖线（边框）
+
+    Args:
+        page: PyMuPDF Page
+        max_border_width: 视为边框线的最大宽度
+        tolerance: 判断水平/竖直的容差（pt）
+
+    Returns:
+        {'paths': 路径数, 'rects': 矩形数, 'h_lines': 横线数, 'v_lines': 竖线数}
+    """
+    profile = {'paths': 0, 'rects': 0, 'h_lines': 0, 'v_lines': 0}
+    for path in page.get_drawings():
+        profile['paths'] += 1
+        stroked = 's' in (path.get('type') or '')
+        for item in path['items']:
+            if item[0] == 'l':
+                p1, p2 = item[1], item[2]
+                if abs(p1.y - p2.y) <= tolerance and abs(p1.x - p2.x) > tolerance:
+                    profile['h_lines'] += 1
+                elif abs(p1.x - p2.x) <= tolerance and abs(p1.y - p2.y) > tolerance:
+                    profile['v_lines'] += 1
+            elif item[0] == 're':
+                profile['rects'] += 1
+                rect = item[1]
+                if rect.height <= max_border_width < rect.width:
+                    profile['h_lines'] += 1
+                elif rect.width <= max_border_width < rect.height:
+                    profile['v_lines'] += 1
+                elif stroked:
+                    profile['h_lines'] += 2
+                    profile['v_lines'] += 2
+    return profile
+
+
+def plan_page_settings(
+    fitz_doc,
+    page_indexes,
+    min_ruling_lines: int = 2,
+    disable_stream_without_paths: bool = False,
+    max_border_width: float = 6.0
+) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, Dict[str, int]], float]:
+    """
+    为每页生成表格解析参数的覆盖项
+
+    横线、竖线都不少于 min_ruling_lines 条的页面才可能存在网格表格，其余页面关闭 lattice 解析；
+    可选地，对没有任何矢量路径的页面同时关闭 stream 解析（无框表格可能因此被识别为普通段落）。
+
+    Args:
+        fitz_doc: PyMuPDF Document
+        page_indexes: 页码列表
+        min_ruling_lines: 启用 lattice 解析所需的横线 / 竖线最少数量
+        disable_stream_without_paths: 无矢量路径的页面是否关闭 stream 解析
+        max_border_width: 视为边框线的最大宽度
+
+    Returns:
+        (按页覆盖的参数 {页码: {...}}, 每页统计 {页码: profile}, 预检耗时)
+    """
+    t0 = time.perf_counter()
+    overrides = {}
+    profiles = {}
+    for i in page_indexes:
+        try:
+            profile = analyze_page(fitz_doc[i], max_border_width)
+        except Exception:
+            # 无法分析的页面保持原配置
+            continue
+        profiles[i] = profile
+
+        page_override = {}
+        if profile['h_lines'] < min_ruling_lines or profile['v_lines'] < min_ruling_lines:
+            page_override['parse_lattice_table'] = False
+        if disable_stream_without_paths and profile['paths'] == 0:
+            page_override['parse_stream_table'] = False
+        if page_override:
+            overrides[i] = page_override
+
+    return overrides, profiles, time.perf_counter() - t0
+
+
+def group_runs(page_indexes, overrides: Dict[int, Dict[str, Any]]) -> List[Tuple[int, int, Dict[str, Any]]]:
+    """
+    将页码按相同的参数覆盖项合并为连续区间，便于记录日志
+
+    Returns:
+        [(起始页码, 结束页码（含）, 覆盖项), ...]
+    """
+    runs = []
+    for i in sorted(page_indexes):
+        override = overrides.get(i, {})
+        if runs and runs[-1][1] == i - 1 and runs[-1][2] == override:
+            runs[-1] = (runs[-1][0], i, override)
+        else:
+            runs.append((i, i, override))
+    return runs
+
+
+def estimate_saving(overrides: Dict[int, Dict[str, Any]], page_times: Dict[int, float], preflight_time: float) -> float:
+    """
+    估算预检节省时间的上限
+
+    以启用 lattice 与关闭 lattice 页面的平均解析耗时之差，乘以关闭 lattice 的页数，再扣除预检耗时。
+    启用 lattice 的页面通常本身更复杂，因此结果偏大，只作为上限参考。
+    没有可对比的页面时只返回 -preflight_time。
+    """
+    off = [t for i, t in page_times.items() if overrides.get(i, {}).get('parse_lattice_table') is False]
+    on = [t for i, t in page_times.items() if overrides.get(i, {}).get('parse_lattice_table') is not False]
+    if not off or not on:
+        return -preflight_time
+    delta = sum(on) / len(on) - sum(off) / len(off)
+    return max(delta, 0.0) * len(off) - preflight_time
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+转换过程分阶段性能记录
+记录 load_pages / parse_document / parse_pages / make_docx 各阶段及每页的耗时与内存变化，
+输出 Chrome trace JSON（chrome://tracing 或 Perfetto 打开），并可对慢页面保存 cProfile / pyinstrument 结果
+"""
+
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+PHASES = ('load_pages', 'parse_document', 'parse_pages', 'make_docx')
+
+
+def rss_bytes() -> int:
+    """当前进程的常驻内存（字节）。Linux 读取 /proc/self/statm，其他系统返回峰值内存"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+
+class ConversionProfiler:
+    """
+    转换过程性能记录器
+
+    每个阶段、每页的解析和生成记录为一个 Chrome trace 完整事件（ph=X），
+    args 中附带页码与内存变化。分片转换时在工作进程中使用副本，事件随统计信息返回后合并。
+    """
+
+    def __init__(
+        self,
+        slow_page_seconds: float = 0.0,
+        profile_dir: Optional[str] = None,
+        profiler: str = 'cProfile'
+    ):
+        """
+        Args:
+            slow_page_seconds: 单页解析/生成耗时超过该值时保存 profile（0 表示不采集）
+            profile_dir: 慢页面 profile 保存目录
+            profiler: 'cProfile' 或 'pyinstrument'（未安装时回退到 cProfile）
+        """
+        self.slow_page_seconds = slow_page_seconds
+        self.profile_dir = profile_dir
+        self.profiler = profiler
+        self.page_offset = 0
+        self.events: List[Dict[str, Any]] = []
+        self.slow_pages: List[str] = []
+
+    def __getstate__(self):
+        # 传给工作进程时只携带配置
+        state = dict(self.__dict__)
+        state['events'] = []
+        state['slow_pages'] = []
+        return state
+
+    @contextmanager
+    def offset(self, first_page: int):
+        """转换子文档（混合路由的文本页区间）时，将页码映射回原文档"""
+        previous, self.page_offset = self.page_offset, first_page
+        try:
+            yield
+        finally:
+            self.page_offset = previous
+
+    @contextmanager
+    def phase(self, name: str, page: Optional[int] = None):
+        """
+        记录一个阶段（page 不为 None 时为单页步骤，超过阈值时保存 profile）
+
+        Args:
+            name: 阶段名称，如 load_pages、parse_page
+            page: 页码（从 0 开始）
+        """
+        if page is not None:
+            page += self.page_offset
+        capture = self._start_capture() if page is not None and self.slow_page_seconds > 0 else None
+        rss0 = rss_bytes()
+        start = time.time()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            args = {'rss_delta_mb': round((rss_bytes() - rss0) / 1048576, 2)}
+            if page is not None:
+                args['page'] = page + 1
+            if capture is not None:
+                saved = self._stop_capture(capture, name, page, elapsed)
+                if saved:
+                    args['profile'] = saved
+            self.events.append({
+                'name': name,
+                'cat': 'page' if page is not None else 'phase',
+                'ph': 'X',
+                'ts': round(start * 1e6, 1),
+                'dur': round(elapsed * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'args': args,
+            })
+
+    def _start_capture(self):
+        if self.profiler == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler  # pyright: ignore[reportMissingImports]
+                capture = Profiler()
+                capture.start()
+                return capture
+            except ImportError:
+                self.profiler = 'cProfile'
+        capture = cProfile.Profile()
+        try:
+            capture.enable()
+        except ValueError:
+            # 已有其他 profiler 在运行（如外层 cProfile），不再嵌套采集
+            return None
+        return capture
+
+    def _stop_capture(self, capture, name: str, page: int, elapsed: float) -> Optional[str]:
+        """停止采集，超过阈值时保存结果并返回文件路径"""
+        if isinstance(capture, cProfile.Profile):
+            capture.disable()
+        else:
+            capture.stop()
+        if elapsed < self.slow_page_seconds or not self.profile_dir:
+            return None
+
+        Path(self.profile_dir).mkdir(parents=True, exist_ok=True)
+        stem = Path(self.profile_dir) / f"{name}_{page + 1}"
+        if isinstance(capture, cProfile.Profile):
+            path = f"{stem}.prof"
+            capture.dump_stats(path)
+        else:
+            path = f"{stem}.html"
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(capture.output_html())
+        self.slow_pages.append(path)
+        return path
+
+    def merge(self, events: List[Dict[str, Any]], slow_pages: Optional[List[str]] = None):
+        """合并工作进程返回的事件（按 pid 区分进程）"""
+        self.events.extend(events)
+        self.slow_pages.extend(slow_pages or [])
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        按阶段和页面汇总
+
+        Returns:
+            phases: {阶段: {'seconds', 'rss_delta_mb'}}；
+            pages: {页码(从 1 开始): {'parse_page': 秒, 'make_page': 秒}}
+        """
+        phases: Dict[str, Dict[str, float]] = {}
+        pages: Dict[int, Dict[str, float]] = {}
+        for event in self.events:
+            seconds = event['dur'] / 1e6
+            if event['cat'] == 'phase':
+                item = phases.setdefault(event['name'], {'seconds': 0.0, 'rss_delta_mb': 0.0})
+                item['seconds'] += seconds
+                item['rss_delta_mb'] += event['args']['rss_delta_mb']
+            else:
+                page = pages.setdefault(event['args']['page'], {})
+                page[event['name']] = page.get(event['name'], 0.0) + seconds
+        return {'phases': phases, 'pages': pages}
+
+    def log_summary(self, logger: logging.Logger, top: int = 5):
+        """将各阶段耗时、内存变化和最慢的页面写入日志"""
+        summary = self.summary()
+        ordered = [p for p in PHASES if p in summary['phases']] + \
+                  [p for p in summary['phases'] if p not in PHASES]
+        if ordered:
+            logger.info("  阶段耗时: " + ", ".join(
+                f"{p} {summary['phases'][p]['seconds']:.2f}s ({summary['phases'][p]['rss_delta_mb']:+.1f}MB)"
+                for p in ordered))
+        slowest = sorted(summary['pages'].items(), key=lambda kv: -sum(kv[1].values()))[:top]
+        if slowest:
+            logger.info("  最慢页面: " + ", ".join(
+                f"第 {page} 页 " + "/".join(f"{k} {v:.2f}s" for k, v in sorted(steps.items()))
+                for page, steps in slowest))
+        for path in self.slow_pages:
+            logger.info(f"  慢页面 profile: {path}")
+
+    def save_trace(self, path: Path):
+        """保存 Chrome trace JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+
+def phase(profiler: Optional[ConversionProfiler], name: str, page: Optional[int] = None):
+    """profiler 为 None 时不做记录"""
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name, page)
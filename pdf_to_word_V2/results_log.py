@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量转换结果日志
+每个文件完成时立即追加一行 JSONL（耗时、页数、PDF 哈希、参数哈希、是否 fallback），
+中断后以 --resume 重新运行时跳过已成功且哈希一致的文件
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any
+
+from conversion_cache import file_sha256
+
+
+class ResultsLog:
+    """
+    追加写入的转换结果日志（与 V1 的 ResultsLog 接口相同）
+
+    每行一条记录: {"time", "input", "status", "message", "output", "duration", "pages",
+    "missing_pages", "ocr_failed_pages", "pdf_hash", "settings_hash", "fallback", "cache_hit"}
+
+    续跑检查时计算过的 PDF 哈希会被记住，追加记录时不再重复计算。
+    """
+
+    def __init__(self, log_file: str, settings_digest: str):
+        """
+        Args:
+            log_file: 日志文件路径
+            settings_digest: 本次批量转换的参数哈希
+        """
+        self.path = Path(log_file)
+        self.settings_digest = settings_digest
+        self._hashes: Dict[str, str] = {}
+
+    def completed(self) -> Dict[str, Dict[str, Any]]:
+        """
+        读取已成功的记录（同一文件以最后一条为准，失败记录会覆盖之前的成功记录）
+
+        Returns:
+            {输入文件绝对路径: 记录}
+        """
+        done: Dict[str, Dict[str, Any]] = {}
+        if not self.path.exists():
+            return done
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 中断时可能留下半行
+                    continue
+                if record.get('status') == 'success':
+                    done[record['input']] = record
+                else:
+                    done.pop(record.get('input'), None)
+        return done
+
+    def is_done(self, record: Optional[Dict[str, Any]], pdf_path: Path, pdf_hash: Optional[str] = None) -> bool:
+        """
+        记录是否表明该文件已用相同参数成功转换（PDF 内容未变、输出文件仍在、没有缺页或 OCR 失败的页面）
+
+        Args:
+            record: completed() 中该文件的记录
+            pdf_path: PDF 文件路径
+            pdf_hash: 已计算的 PDF 内容哈希（None 则现场计算）
+        """
+        if not record or record.get('settings_hash') != self.settings_digest:
+            return False
+        if record.get('missing_pages') or record.get('ocr_failed_pages'):
+            return False
+        if not record.get('output') or not Path(record['output']).exists():
+            return False
+        return record.get('pdf_hash') == self._pdf_hash(Path(pdf_path), pdf_hash)
+
+    def append(self, result: Dict[str, Any], pdf_hash: Optional[str] = None):
+        """
+        追加一条 convert_single 结果并立即落盘
+
+        Args:
+            result: convert_single 的返回值
+            pdf_hash: 已计算的 PDF 内容哈希（None 则使用结果中的 pdf_hash、续跑检查时的哈希或现场计算）
+        """
+        pdf_path = Path(result['input'])
+        output = result.get('output_path')
+        record = {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'input': str(pdf_path.resolve()),
+            'status': 'success' if result['success'] else 'failed',
+            'message': result.get('message', ''),
+            'output': str(Path(output).resolve()) if output else None,
+            'duration': round(result.get('duration', 0), 3),
+            'pages': result.get('pages'),
+            'missing_pages': result.get('missing_pages') or [],
+            'ocr_failed_pages': result.get('ocr_failed_pages') or [],
+            'pdf_hash': self._pdf_hash(pdf_path, pdf_hash or result.get('pdf_hash')),
+            'settings_hash': self.settings_digest,
+            'fallback': result.get('use_fallback', False),
+            'cache_hit': result.get('cache_hit'),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _pdf_hash(self, pdf_path: Path, pdf_hash: Optional[str] = None) -> Optional[str]:
+        key = str(pdf_path.resolve())
+        if pdf_hash:
+            self._hashes[key] = pdf_hash
+        elif key not in self._hashes:
+            if not pdf_path.exists():
+                return None
+            self._hashes[key] = file_sha256(pdf_path)
+        return self._hashes[key]
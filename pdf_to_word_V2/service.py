@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PDF 转 DOCX HTTP 服务
+基于 asyncio 的本地转换服务：上传的 PDF 进入队列，由固定数量的工作进程（各持有一个 PDFConverter）转换，
+客户端凭任务 ID 查询状态并下载 DOCX。按排队页数做准入控制，饱和时返回 429；不依赖外部消息队列。
+
+接口:
+    POST   /convert?filename=合同.pdf   请求体为 PDF 原始字节，返回 202 与任务 ID
+    GET    /jobs/<id>                   任务状态
+    GET    /jobs/<id>/result            下载 DOCX（未完成时返回 409）
+    DELETE /jobs/<id>                   取消排队中的任务，或丢弃已完成任务的文件
+    GET    /health                      队列状态
+    GET    /metrics                     Prometheus 指标（配置 metrics.enable 时）
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import shutil
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+from urllib.parse import urlsplit, parse_qs, quote
+
+from convert import PDFConverter, _init_worker, _convert_in_worker, _new_result, _page_count
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+
+logger = logging.getLogger(__name__)
+
+REASONS = {
+    200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+    408: 'Request Timeout', 409: 'Conflict', 411: 'Length Required', 413: 'Payload Too Large',
+    429: 'Too Many Requests', 500: 'Internal Server Error', 503: 'Service Unavailable',
+}
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# 上传与下载的分块大小
+CHUNK_SIZE = 1024 * 1024
+# 读取请求头的超时（秒），防止慢速连接长期占用
+HEADER_TIMEOUT = 30
+
+
+class Job:
+    """一个转换任务（状态: queued / running / done / failed / cancelled）"""
+
+    def __init__(self, job_id: str, filename: str, pdf_path: Path, pages: int):
+        self.id = job_id
+        self.filename = filename
+        self.pdf_path = pdf_path
+        self.pages = pages
+        self.status = 'queued'
+        self.message = ''
+        self.output_path: Optional[Path] = None
+        self.use_fallback = False
+        self.created = time.time()
+        self.started: Optional[float] = None
+        # 转换结束（或排队中被取消）的时间；转换中的任务被取消时仍为 None，直到工作进程返回
+        self.finished: Optional[float] = None
+        # 工作进程中的转换
+        self.future: Optional[asyncio.Future] = None
+        # 调试进程中写入工作目录的调试任务
+        self.debug_future: Optional[Future] = None
+
+    @property
+    def workdir(self) -> Path:
+        return self.pdf_path.parent.parent
+
+    @property
+    def in_progress(self) -> bool:
+        """工作进程是否仍在使用工作目录（转换结束且调度协程处理完结果后才可删除）"""
+        return self.future is not None and (not self.future.done() or self.finished is None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'pages': self.pages,
+            'message': self.message,
+            'use_fallback': self.use_fallback,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'status_url': f'/jobs/{self.id}',
+            'result_url': f'/jobs/{self.id}/result',
+        }
+
+
+class ConversionService:
+    """
+    转换服务
+
+    workers 个调度协程从 asyncio 队列取任务，交给同样大小的进程池执行，
+    因此等待中的任务都留在队列里，可以直接取消；已在工作进程中转换的任务无法中断，
+    取消后在完成时丢弃结果。排队和转换中任务的总页数超过 max_queued_pages 时拒绝新上传。
+    """
+
+    def __init__(
+        self,
+        converter: PDFConverter,
+        workers: int = 1,
+        max_queued_pages: int = 2000,
+        max_upload_mb: int = 200,
+        spool_dir: str = '.service',
+        result_ttl: int = 3600
+    ):
+        """
+        Args:
+            converter: 主进程中的转换器（提供配置和指标，转换在工作进程中进行）
+            workers: 工作进程数
+            max_queued_pages: 排队与转换中任务的总页数上限（超过时返回 429）
+            max_upload_mb: 单个上传文件大小上限（MB）
+            spool_dir: 上传文件与转换结果的存放目录
+            result_ttl: 已结束任务的保留时间（秒），到期后删除文件
+        """
+        self.converter = converter
+        self.workers = workers
+        self.max_queued_pages = max_queued_pages
+        self.max_upload_bytes = max_upload_mb * 1024 * 1024
+        self.spool_dir = Path(spool_dir)
+        self.result_ttl = result_ttl
+        self.jobs: Dict[str, Job] = {}
+        self.pending_pages = 0
+        # 每页平均耗时（秒），用于估算 Retry-After
+        self.seconds_per_page = 1.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks = []
+
+    # ---- 生命周期 ----
+
+    async def start(self):
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        config = self.converter.config
+        self._executor = self.converter._process_pool(
+            self.workers, _init_worker, (config, config.get('parallel', {}).get('max_memory_mb', 0))
+        )
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+        if self.converter.debug_worker is not None:
+            self.converter.debug_worker.close(wait=False)
+
+    # ---- 任务调度 ----
+
+    def admit(self, pages: int) -> bool:
+        """准入控制：空闲时总是接受（避免超大文档永远无法提交），否则按总页数上限判断"""
+        return self.pending_pages == 0 or self.pending_pages + pages <= self.max_queued_pages
+
+    def retry_after(self) -> int:
+        """按当前积压页数和每页平均耗时估算的重试等待秒数"""
+        return max(1, int(self.pending_pages * self.seconds_per_page / self.workers))
+
+    def submit(self, filename: str, pdf_path: Path, pages: int, job_id: str) -> Job:
+        job = Job(job_id, filename, pdf_path, pages)
+        self.jobs[job.id] = job
+        self.pending_pages += pages
+        self._queue.put_nowait(job)
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        """
+        取消任务
+
+        Returns:
+            True 表示任务已取消或文件已删除；任务在工作进程中转换时标记为 cancelled，完成后丢弃结果
+        """
+        if job.status == 'queued':
+            # 排队中的任务由调度协程取出时跳过
+            self.pending_pages -= job.pages
+            self._remove(job)
+            job.status = 'cancelled'
+            job.finished = time.time()
+            return True
+        if job.in_progress:
+            # 转换中的任务完成后由调度协程丢弃结果、删除工作目录并记录结束时间
+            job.status = 'cancelled'
+            return True
+        self._remove(job)
+        self.jobs.pop(job.id, None)
+        return True
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        enable_debug = self.converter.config['debug']['enable']
+        while True:
+            job = await self._queue.get()
+            if job.status != 'queued':
+                continue
+            job.status = 'running'
+            job.started = time.time()
+            job.future = loop.run_in_executor(
+                self._executor, _convert_in_worker, job.pdf_path, job.workdir / 'output', enable_debug
+            )
+            try:
+                result = await job.future
+            except Exception as e:
+                # 工作进程异常退出（如超出内存上限被终止）
+                result = _new_result(job.pdf_path, message=f'工作进程异常: {e}', duration=time.time() - job.started)
+            self.pending_pages -= job.pages
+            if job.pages and result.get('duration'):
+                self.seconds_per_page = 0.8 * self.seconds_per_page + 0.2 * result['duration'] / job.pages
+            if self.converter.metrics:
+                self.converter.metrics.observe(result)
+            job.finished = time.time()
+            if job.status == 'cancelled':
+                self._remove(job)
+                continue
+            # 调试文件由主进程的低优先级调试进程在后台生成，不占用转换工作进程
+            job.debug_future = self.converter._submit_debug(result)
+            job.status = 'done' if result['success'] else 'failed'
+            job.message = result['message']
+            job.use_fallback = result.get('use_fallback', False)
+            if result['output_path']:
+                job.output_path = Path(result['output_path'])
+            logger.info(f"任务 {job.id} {job.status}: {job.filename} ({result['duration']:.2f}s)")
+
+    async def _sweep(self):
+        """定期删除超过保留时间的已结束任务"""
+        while True:
+            await asyncio.sleep(min(60, max(1, self.result_ttl)))
+            self._expire(time.time())
+
+    def _expire(self, now: float):
+        """删除超过保留时间的已结束任务（工作进程仍在转换的任务不删除）"""
+        for job in list(self.jobs.values()):
+            if job.in_progress:
+                continue
+            if job.finished and now - job.finished > self.result_ttl:
+                self._remove(job)
+                self.jobs.pop(job.id, None)
+
+    def _remove(self, job: Job):
+        """删除任务的工作目录；调试进程正在写入时，等调试任务结束后再删除"""
+        future = job.debug_future
+        if future is not None and not future.cancel() and not future.done():
+            future.add_done_callback(lambda _: shutil.rmtree(job.workdir, ignore_errors=True))
+            return
+        shutil.rmtree(job.workdir, ignore_errors=True)
+
+    # ---- HTTP ----
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            try:
+                method, target, headers = await asyncio.wait_for(_read_head(reader), HEADER_TIMEOUT)
+            except asyncio.TimeoutError:
+                await _send_json(writer, 408, {'error': '请求头超时'})
+                return
+            except ValueError as e:
+                await _send_json(writer, 400, {'error': str(e)})
+                return
+            url = urlsplit(target)
+            parts = [p for p in url.path.split('/') if p]
+
+            if parts == ['convert']:
+                if method != 'POST':
+                    await _send_json(writer, 405, {'error': '仅支持 POST'})
+                    return
+                await self._handle_upload(reader, writer, headers, parse_qs(url.query))
+            elif len(parts) in (2, 3) and parts[0] == 'jobs':
+                job = self.jobs.get(parts[1])
+                if job is None:
+                    await _send_json(writer, 404, {'error': '任务不存在'})
+                elif len(parts) == 3 and parts[2] == 'result' and method == 'GET':
+                    await self._handle_result(writer, job)
+                elif len(parts) == 2 and method == 'GET':
+                    await _send_json(writer, 200, job.to_dict())
+                elif len(parts) == 2 and method == 'DELETE':
+                    self.cancel(job)
+                    await _send_json(writer, 200, job.to_dict())
+                else:
+                    await _send_json(writer, 405, {'error': '不支持的方法'})
+            elif parts == ['health']:
+                await _send_json(writer, 200, self.health())
+            elif parts == ['metrics'] and self.converter.metrics:
+                await _send(writer, 200, self.converter.metrics.render().encode('utf-8'), METRICS_CONTENT_TYPE)
+            else:
+                await _send_json(writer, 404, {'error': '未知路径'})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.exception(f"请求处理异常: {e}")
+            try:
+                await _send_json(writer, 500, {'error': str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    def health(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        health = {
+            'workers': self.workers,
+            'pending_pages': self.pending_pages,
+            'max_queued_pages': self.max_queued_pages,
+            'seconds_per_page': round(self.seconds_per_page, 3),
+            'jobs': counts,
+        }
+        worker = self.converter.debug_worker
+        if worker is not None:
+            health['debug'] = {'pending': worker.pending(), 'succeeded': worker.succeeded, 'failed': worker.failed}
+        return health
+
+    async def _handle_upload(self, reader, writer, headers: Dict[str, str], query: Dict[str, list]):
+        # 先按已有积压拒绝，不读取请求体
+        if self.pending_pages >= self.max_queued_pages:
+            await self._send_busy(writer)
+            return
+        if 'content-length' not in headers:
+            await _send_json(writer, 411, {'error': '需要 Content-Length（请求体为 PDF 原始字节）'})
+            return
+        try:
+            length = int(headers['content-length'])
+        except ValueError:
+            await _send_json(writer, 400, {'error': 'Content-Length 无效'})
+            return
+        if length > self.max_upload_bytes:
+            await _send_json(writer, 413, {'error': f'文件超过 {self.max_upload_bytes // 1048576}MB'})
+            return
+
+        filename = Path(query.get('filename', ['document.pdf'])[0]).name or 'document.pdf'
+        if not filename.lower().endswith('.pdf'):
+            filename += '.pdf'
+        job_id = uuid.uuid4().hex
+        pdf_path = self.spool_dir / job_id / 'input' / filename
+        pdf_path.parent.mkdir(parents=True)
+        try:
+            await _receive_file(reader, pdf_path, length)
+            pages = await asyncio.to_thread(_page_count, pdf_path)
+        except BaseException:
+            shutil.rmtree(pdf_path.parent.parent, ignore_errors=True)
+            raise
+        if not pages:
+            shutil.rmtree(pdf_path.parent.parent, ignore_errors=True)
+            await _send_json(writer, 400, {'error': '无法打开 PDF'})
+            return
+        if not self.admit(pages):
+            shutil.rmtree(pdf_path.parent.parent, ignore_errors=True)
+            await self._send_busy(writer)
+            return
+
+        job = self.submit(filename, pdf_path, pages, job_id)
+        logger.info(f"任务 {job.id} 入队: {filename} ({pages} 页，积压 {self.pending_pages} 页)")
+        await _send_json(writer, 202, job.to_dict(), {'Location': f'/jobs/{job.id}'})
+
+    async def _send_busy(self, writer):
+        await _send_json(
+            writer, 429,
+            {'error': '转换队列已满', 'pending_pages': self.pending_pages, 'max_queued_pages': self.max_queued_pages},
+            {'Retry-After': str(self.retry_after())}
+        )
+
+    async def _handle_result(self, writer, job: Job):
+        if job.status != 'done':
+            await _send_json(writer, 409, job.to_dict())
+            return
+        if job.output_path is None or not job.output_path.exists():
+            await _send_json(writer, 404, {'error': '结果文件已删除'})
+            return
+        name = Path(job.filename).stem + '.docx'
+        size = job.output_path.stat().st_size
+        writer.write(_head(200, {
+            'Content-Type': DOCX_CONTENT_TYPE,
+            'Content-Length': str(size),
+            'Content-Disposition': f"attachment; filename*=UTF-8''{quote(name)}",
+        }))
+        with open(job.output_path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        await writer.drain()
+
+
+async def _read_head(reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str]]:
+    """读取请求行和请求头"""
+    line = (await reader.readline()).decode('latin-1').strip()
+    try:
+        method, target, _ = line.split(' ', 2)
+    except ValueError:
+        raise ValueError('请求行无效')
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1')
+        if line in ('\r\n', '\n', ''):
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return method.upper(), target, headers
+
+
+async def _receive_file(reader: asyncio.StreamReader, path: Path, length: int):
+    """按块读取请求体写入文件（不在内存中保留整个上传文件）"""
+    with open(path, 'wb') as f:
+        remaining = length
+        while remaining:
+            chunk = await reader.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b'', remaining)
+            f.write(chunk)
+            remaining -= len(chunk)
+
+
+def _head(status: int, headers: Dict[str, str]) -> bytes:
+    lines = [f'HTTP/1.1 {status} {REASONS.get(status, "")}', 'Connection: close']
+    lines.extend(f'{k}: {v}' for k, v in headers.items())
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8')
+
+
+async def _send(writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str,
+                headers: Optional[Dict[str, str]] = None):
+    writer.write(_head(status, dict(headers or {}, **{
+        'Content-Type': content_type,
+        'Content-Length': str(len(body)),
+    })) + body)
+    await writer.drain()
+
+
+async def _send_json(writer: asyncio.StreamWriter, status: int, data: Dict[str, Any],
+                     headers: Optional[Dict[str, str]] = None):
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    await _send(writer, status, body, 'application/json; charset=utf-8', headers)
+
+
+async def serve(service: ConversionService, host: str, port: int):
+    await service.start()
+    server = await asyncio.start_server(service.handle, host, port)
+    address = server.sockets[0].getsockname()
+    logger.info(f"转换服务已启动: http://{address[0]}:{address[1]} "
+                f"({service.workers} 个工作进程，积压上限 {service.max_queued_pages} 页)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='PDF 转 DOCX HTTP 服务')
+    parser.add_argument('--config', type=str, default='config.yaml', help='配置文件路径（默认: config.yaml）')
+    parser.add_argument('--host', type=str, help='监听地址（默认: config.yaml 中的 service.host）')
+    parser.add_argument('--port', type=int, help='监听端口（默认: config.yaml 中的 service.port）')
+    parser.add_argument('--workers', type=int, help='工作进程数（0 表示 CPU 核心数）')
+    parser.add_argument('--max-queued-pages', type=int, help='排队与转换中任务的总页数上限，超过时返回 429')
+    args = parser.parse_args()
+
+    converter = PDFConverter(args.config)
+    service_cfg = converter.config.get('service', {})
+    workers = args.workers if args.workers is not None else service_cfg.get('workers', 2)
+    service = ConversionService(
+        converter,
+        workers=converter._resolve_workers(workers),
+        max_queued_pages=args.max_queued_pages or service_cfg.get('max_queued_pages', 2000),
+        max_upload_mb=service_cfg.get('max_upload_mb', 200),
+        spool_dir=service_cfg.get('spool_dir', '.service'),
+        result_ttl=service_cfg.get('result_ttl', 3600)
+    )
+    try:
+        asyncio.run(serve(
+            service,
+            args.host or service_cfg.get('host', '127.0.0.1'),
+            args.port if args.port is not None else service_cfg.get('port', 8080)
+        ))
+    except KeyboardInterrupt:
+        print("\n服务已停止")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合同模板指纹索引
+用首页文本 shingle 的 MinHash、页面尺寸和字体集合识别已知合同模板，
+并为每个模板保存调优后的转换参数
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Tuple
+
+import numpy as np  # pyright: ignore[reportMissingImports]
+import fitz  # pyright: ignore[reportMissingImports]
+
+
+# MinHash 参数：64 个哈希函数，分为 16 个 band，每个 band 4 行
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+# 取模用的梅森素数 2^61-1 过大，这里使用大于 2^32 的素数，保证 uint64 运算不溢出
+_PRIME = np.uint64(4294967311)
+_rng = np.random.RandomState(20250828)
+_PERM_A = _rng.randint(1, 2 ** 31 - 1, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, 2 ** 31 - 1, size=NUM_PERM).astype(np.uint64)
+
+
+def _normalize_text(text: str) -> str:
+    """去除数字和空白：同一模板的不同合同仅金额、日期、编号不同"""
+    return re.sub(r'[\d\s]+', '', text)
+
+
+def minhash(shingles) -> Optional[List[int]]:
+    """计算 shingle 集合的 MinHash 签名（集合为空时返回 None：没有文本的文档无法按文本比较）"""
+    if not shingles:
+        return None
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in shingles],
+        dtype=np.uint64
+    )
+    values = (np.outer(hashes, _PERM_A) + _PERM_B) % _PRIME
+    return values.min(axis=0).tolist()
+
+
+def document_signature(pdf_path: Path) -> Dict[str, Any]:
+    """
+    提取文档的模板签名（只读取首页，通常只需几毫秒）
+
+    Returns:
+        {'minhash': 首页文本 MinHash（扫描件等首页没有文本时为 None）, 'geometry': 首页尺寸, 'fonts': 字体名集合}
+    """
+    with fitz.open(str(pdf_path)) as doc:
+        if not doc.page_count:
+            return {'minhash': None, 'geometry': '', 'fonts': []}
+        page = doc[0]
+        text = _normalize_text(page.get_text())
+        fonts = sorted({
+            # 去掉子集字体前缀（如 ABCDEF+SimSun）
+            font[3].split('+', 1)[-1] for font in page.get_fonts(full=True) if font[3]
+        })
+        geometry = f"{round(page.rect.width)}x{round(page.rect.height)}"
+
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(len(text) - SHINGLE_SIZE + 1, 0))}
+    return {'minhash': minhash(shingles), 'geometry': geometry, 'fonts': fonts}
+
+
+def matchable(signature: Dict[str, Any]) -> bool:
+    """
+    签名能否参与模板匹配
+
+    首页没有文本时没有 MinHash；旧索引中这类签名记为全 0，任意两个扫描件的相似度都会是 1.0，同样不参与匹配。
+    """
+    values = signature.get('minhash')
+    return bool(values) and any(values)
+
+
+def _jaccard(a, b) -> float:
+    a, b = set(a), set(b)
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def similarity(sig_a: Dict[str, Any], sig_b: Dict[str, Any]) -> float:
+    """签名相似度：文本 MinHash 估计的 Jaccard 占 0.7，字体集合 0.15，页面尺寸 0.15"""
+    text = float(np.mean(np.array(sig_a['minhash']) == np.array(sig_b['minhash'])))
+    fonts = _jaccard(sig_a['fonts'], sig_b['fonts'])
+    geometry = 1.0 if sig_a['geometry'] == sig_b['geometry'] else 0.0
+    return 0.7 * text + 0.15 * fonts + 0.15 * geometry
+
+
+def _band_keys(signature: List[int]) -> List[str]:
+    """LSH 分桶键：每个 band 的哈希值"""
+    return [
+        f"{b}:" + hashlib.md5(repr(signature[b * ROWS:(b + 1) * ROWS]).encode()).hexdigest()[:16]
+        for b in range(BANDS)
+    ]
+
+
+class TemplateIndex:
+    """
+    模板索引（JSON 文件）
+
+    {
+      "templates": {
+        "<模板名>": {"signature": {...}, "settings": {...}, "source": "...", "created": "..."}
+      }
+    }
+
+    加载时在内存中建立 LSH 分桶，查询只比较落入相同桶的候选模板，
+    数千个模板时单次查询仍在毫秒级。
+    """
+
+    def __init__(self, index_file: str, threshold: float = 0.6):
+        """
+        Args:
+            index_file: 索引文件路径
+            threshold: 判定为同一模板的最低相似度
+        """
+        self.path = Path(index_file)
+        self.threshold = threshold
+        self.templates: Dict[str, Dict[str, Any]] = {}
+        self._buckets: Dict[str, set] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.templates = json.load(f).get('templates', {})
+        for name, entry in self.templates.items():
+            self._add_to_buckets(name, entry['signature'])
+
+    def _add_to_buckets(self, name: str, signature: Dict[str, Any]):
+        if not matchable(signature):
+            return
+        for key in _band_keys(signature['minhash']):
+            self._buckets.setdefault(key, set()).add(name)
+
+    def _remove_from_buckets(self, name: str):
+        for names in self._buckets.values():
+            names.discard(name)
+
+    def save(self):
+        """写回索引文件"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'templates': self.templates}, f, ensure_ascii=False, indent=2)
+        tmp.replace(self.path)
+
+    def add(self, name: str, pdf_path: Path, settings: Dict[str, Any]) -> bool:
+        """
+        登记（或更新）模板及其调优参数
+
+        Returns:
+            是否已登记（样本首页没有文本时无法识别模板，不登记）
+        """
+        signature = document_signature(pdf_path)
+        if not matchable(signature):
+            return False
+        if name in self.templates:
+            self._remove_from_buckets(name)
+        self.templates[name] = {
+            'signature': signature,
+            'settings': settings,
+            'source': Path(pdf_path).name,
+            'created': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        self._add_to_buckets(name, signature)
+        return True
+
+    def remove(self, name: str) -> bool:
+        """删除模板"""
+        if name not in self.templates:
+            return False
+        del self.templates[name]
+        self._remove_from_buckets(name)
+        return True
+
+    def match(self, pdf_path: Path) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        """
+        查找与文档最相似的已知模板
+
+        Returns:
+            (模板名, 相似度, 调优参数)，没有达到阈值的模板时返回 None
+        """
+        if not self.templates:
+            return None
+        return self.match_signature(document_signature(pdf_path))
+
+    def match_signature(self, signature: Dict[str, Any]) -> Optional[Tuple[str, float, Dict[str, Any]]]:
+        """按签名查找最相似的模板（只比较 LSH 候选；首页没有文本的签名不匹配任何模板）"""
+        if not matchable(signature):
+            return None
+        candidates = set()
+        for key in _band_keys(signature['minhash']):
+            candidates |= self._buckets.get(key, set())
+
+        best = None
+        for name in candidates:
+            entry = self.templates[name]
+            score = similarity(signature, entry['signature'])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (name, score, entry.get('settings', {}))
+        return best
+
+
+def _parse_setting(text: str) -> Tuple[str, Any]:
+    """解析 key=value 形式的参数，value 按 YAML 规则转换类型"""
+    import yaml
+    key, _, value = text.partition('=')
+    if not key or not _:
+        raise argparse.ArgumentTypeError(f"参数格式应为 key=value: {text}")
+    return key.strip(), yaml.safe_load(value)
+
+
+def main():
+    """命令行入口：管理模板索引"""
+    parser = argparse.ArgumentParser(description='合同模板指纹索引管理')
+    parser.add_argument('--index', default='templates/index.json', help='索引文件路径（默认: templates/index.json）')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_add = sub.add_parser('add', help='登记模板（以样本 PDF 提取签名）')
+    p_add.add_argument('pdf', help='模板样本 PDF')
+    p_add.add_argument('--name', help='模板名称（默认: 文件名）')
+    p_add.add_argument('--set', dest='settings', action='append', type=_parse_setting, default=[],
+                       metavar='KEY=VALUE', help='模板专用转换参数，可重复，如 --set parse_lattice_table=false')
+
+    p_match = sub.add_parser('match', help='查找 PDF 对应的模板')
+    p_match.add_argument('pdf', nargs='+', help='待匹配的 PDF')
+
+    p_rm = sub.add_parser('remove', help='删除模板')
+    p_rm.add_argument('name', help='模板名称')
+
+    sub.add_parser('list', help='列出所有模板')
+
+    args = parser.parse_args()
+    index = TemplateIndex(args.index)
+
+    if args.command == 'add':
+        name = args.name or Path(args.pdf).stem
+        if not index.add(name, Path(args.pdf), dict(args.settings)):
+            print(f"✗ 样本首页没有文本（扫描件？），无法按文本识别模板: {args.pdf}")
+            return
+        index.save()
+        print(f"✓ 已登记模板: {name} {dict(args.settings)}")
+
+    elif args.command == 'match':
+        for pdf in args.pdf:
+            t0 = time.perf_counter()
+            found = index.match(Path(pdf))
+            elapsed = (time.perf_counter() - t0) * 1000
+            if found:
+                name, score, settings = found
+                print(f"{Path(pdf).name}: {name} (相似度 {score:.2f}, {elapsed:.1f}ms) {settings}")
+            else:
+                print(f"{Path(pdf).name}: 未匹配 ({elapsed:.1f}ms)")
+
+    elif args.command == 'remove':
+        if index.remove(args.name):
+            index.save()
+            print(f"✓ 已删除模板: {args.name}")
+        else:
+            print(f"模板不存在: {args.name}")
+
+    else:
+        if not index.templates:
+            print("索引为空")
+        for name, entry in sorted(index.templates.items()):
+            print(f"{name}: {entry.get('settings', {})} (样本: {entry.get('source')}, {entry.get('created')})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""测试配置：V2 的模块直接位于项目目录下（以脚本方式运行），测试时加入 sys.path"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
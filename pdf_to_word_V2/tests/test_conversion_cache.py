@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""转换结果缓存：缓存键敏感性与 LRU 淘汰"""
+
+import os
+
+import pytest
+
+from conversion_cache import ConversionCache, PageLayoutCache, file_sha256
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"%PDF-1.4 first")
+    return path
+
+
+def test_make_key_ignores_key_order(tmp_path, pdf):
+    cache = ConversionCache(str(tmp_path / "cache"))
+    a = cache.make_key(pdf, {'parse_lattice_table': True, 'multi_processing': False})
+    b = cache.make_key(pdf, {'multi_processing': False, 'parse_lattice_table': True})
+    assert a == b
+
+
+def test_make_key_changes_with_content_and_settings(tmp_path, pdf):
+    cache = ConversionCache(str(tmp_path / "cache"))
+    base = cache.make_key(pdf, {'conversion': {'parse_lattice_table': True}, 'preflight': {'enable': False}})
+    assert base != cache.make_key(pdf, {'conversion': {'parse_lattice_table': False},
+                                        'preflight': {'enable': False}})
+    assert base != cache.make_key(pdf, {'conversion': {'parse_lattice_table': True},
+                                        'preflight': {'enable': True}})
+    pdf.write_bytes(b"%PDF-1.4 second")
+    assert base != cache.make_key(pdf, {'conversion': {'parse_lattice_table': True},
+                                        'preflight': {'enable': False}})
+
+
+def test_make_key_accepts_precomputed_hash(tmp_path, pdf):
+    cache = ConversionCache(str(tmp_path / "cache"))
+    settings = {'parse_lattice_table': True}
+    assert cache.make_key(pdf, settings, pdf_hash=file_sha256(pdf)) == cache.make_key(pdf, settings)
+
+
+def test_effective_settings_cover_pipeline_config():
+    pytest.importorskip('pdf2docx')
+    from convert import PDFConverter
+
+    config = PDFConverter._default_config()
+    converter = PDFConverter(config=config)
+    kwargs = dict(config['conversion'])
+    base = converter._effective_settings(kwargs)
+
+    for section, key, value in [('preflight', 'enable', True), ('windowed', 'enable', True),
+                                ('sharding', 'enable', True), ('error_handling', 'page_fallback', False)]:
+        converter.config = dict(config, **{section: dict(config[section], **{key: value})})
+        assert converter._effective_settings(kwargs) != base, section
+
+    # 未启用的功能，其参数改动不影响结果
+    converter.config = dict(config, windowed=dict(config['windowed'], window_pages=7))
+    assert converter._effective_settings(kwargs) == base
+
+
+def _put(cache, key, tmp_path, size, mtime):
+    src = tmp_path / f"{key}.docx"
+    src.write_bytes(b"x" * size)
+    cache.put(key, src)
+    entry = cache._entry(key)
+    os.utime(entry, (mtime, mtime))
+    return entry
+
+
+def test_lru_eviction_removes_oldest(tmp_path):
+    cache = ConversionCache(str(tmp_path / "cache"), max_size_mb=1)
+    third = 400 * 1024
+    old = _put(cache, "aa" + "0" * 62, tmp_path, third, 1000)
+    mid = _put(cache, "bb" + "0" * 62, tmp_path, third, 2000)
+    assert old.exists() and mid.exists()
+
+    new = _put(cache, "cc" + "0" * 62, tmp_path, third, 3000)
+    assert not old.exists() and not old.with_suffix('.json').exists()
+    assert mid.exists() and new.exists()
+    assert cache._size == 2 * third
+
+
+def test_running_size_avoids_rescan(tmp_path, monkeypatch):
+    import conversion_cache
+
+    cache = PageLayoutCache(str(tmp_path / "cache"), max_size_mb=1)
+    cache.put("aa" + "0" * 62, {'page': 1})
+    scans = []
+    monkeypatch.setattr(conversion_cache, '_scan_size', lambda *a: scans.append(a) or 0)
+    monkeypatch.setattr(conversion_cache, '_evict_lru', lambda *a, **k: scans.append(a) or 0)
+    for i in range(5):
+        cache.put(f"b{i}" + "0" * 62, {'page': i})
+        cache.evict()
+    assert scans == []
+    assert cache.get("b4" + "0" * 62) == {'page': 4}
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""PDFConverter 单文件转换"""
+
+import logging
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+pytest.importorskip('pdf2docx')
+
+import fitz  # noqa: E402
+
+from convert import PDFConverter  # noqa: E402
+
+
+def make_pdf(path, pages=1):
+    doc = fitz.open()
+    for i in range(pages):
+        doc.new_page().insert_text((72, 72), f"第 {i + 1} 页 page text")
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def test_convert_single_does_not_register_loggers(tmp_path):
+    converter = PDFConverter(config=PDFConverter._default_config())
+    before = set(logging.root.manager.loggerDict)
+    for name in ('a', 'b'):
+        result = converter.convert_single(make_pdf(tmp_path / f"{name}.pdf"), tmp_path / "out")
+        assert result['success']
+    # 每个文件的 logger 不在 logging 中注册，文件日志照常创建
+    assert set(logging.root.manager.loggerDict) == before
+    assert (tmp_path / "out" / "a" / "conversion.log").exists()
+
+
+def make_scanned_pdf(path):
+    """第 1 页为文本页，第 2、3 页为整页图片（扫描页）"""
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 4, 4), False)
+    pix.clear_with(200)
+    png = pix.tobytes('png')
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "text layer page with enough characters")
+    for _ in range(2):
+        page = doc.new_page()
+        page.insert_image(page.rect, stream=png)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+class EmptyOCR:
+    """没有生成任何页面（或识别出错）的 OCR 后端"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+
+    def available(self):
+        return True
+
+    def convert(self, pdf, save_dir):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return [None, None]
+
+
+def hybrid_converter(ocr):
+    config = PDFConverter._default_config()
+    config['hybrid'] = dict(config['hybrid'], enable=True)
+    converter = PDFConverter(config=config)
+    converter.ocr_backend = ocr
+    return converter
+
+
+def test_empty_ocr_converts_with_pdf2docx_instead_of_fallback(tmp_path):
+    ocr = EmptyOCR()
+    converter = hybrid_converter(ocr)
+    result = converter.convert_single(make_scanned_pdf(tmp_path / "scan.pdf"), tmp_path / "out")
+
+    assert result['success'] and not result['use_fallback']
+    assert result['ocr_failed_pages'] == [1, 2] and result['missing_pages'] == []
+    assert ocr.calls == 1
+
+
+def test_failed_ocr_is_not_repeated_by_document_fallback(tmp_path, monkeypatch):
+    ocr = EmptyOCR(error=RuntimeError('OCR 服务不可用'))
+    converter = hybrid_converter(ocr)
+    calls = []
+    monkeypatch.setattr(converter, '_do_convert', lambda *args, **kwargs: calls.append(args[2]) and None)
+    result = converter.convert_single(make_scanned_pdf(tmp_path / "scan.pdf"), tmp_path / "out")
+
+    # pdf2docx 失败时仍按 fallback 配置重试，但不再识别一次
+    assert not result['success']
+    assert ocr.calls == 1
+    assert len(calls) == 2 and calls[1]['parse_lattice_table'] is False
+
+
+class CrashingPool:
+    """submit 返回已失败的 future，模拟工作进程异常退出"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker killed"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_crashed_worker_result_has_convert_single_fields(tmp_path, monkeypatch):
+    converter = PDFConverter(config=PDFConverter._default_config())
+    monkeypatch.setattr(converter, '_process_pool', lambda *args, **kwargs: CrashingPool())
+    logged = []
+    monkeypatch.setattr(converter, '_record_result', lambda stats, result, log=None: logged.append(result) or True)
+    pdf = tmp_path / "a.pdf"
+    converter._pool_convert([pdf], tmp_path / "out", False, 2, {'total': 1})
+
+    result, = logged
+    template = converter.convert_single(make_pdf(tmp_path / "b.pdf"), tmp_path / "out")
+    assert set(result) >= set(template) - {'debug'}
+    assert not result['success'] and 'worker killed' in result['message']
+    assert result['input'] == str(pdf) and result['pages'] is None and result['cache_hit'] is None
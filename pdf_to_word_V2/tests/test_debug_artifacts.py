@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""低优先级调试进程：任务结果的汇总"""
+
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import debug_artifacts
+from debug_artifacts import DebugWorker
+
+
+def fake_generate(pdf_path, docx_path, debug_dir, settings, fallback_pages, document_fallback, failed,
+                  max_pages, giant_table_chars):
+    return {'pages': {}, 'generated': list(fallback_pages)[:max_pages], 'errors': {}}
+
+
+def test_wait_counts_futures_finished_before_later_submits(tmp_path, monkeypatch):
+    monkeypatch.setattr(debug_artifacts, 'generate_debug', fake_generate)
+    worker = DebugWorker(max_pages=5)
+    # 用线程池代替后台进程
+    worker._executor = ThreadPoolExecutor(1)
+    first = worker.submit(tmp_path / "a.pdf", None, tmp_path / "debug_a", {}, [1, 2])
+    wait([first])
+    worker.submit(tmp_path / "b.pdf", None, tmp_path / "debug_b", {}, [3])
+    assert worker.wait() == 3
+    assert worker.pending() == 0
+    assert worker.succeeded == 2 and worker.failed == 0
+    worker.close()
+
+
+def test_finished_futures_are_released_without_wait(tmp_path, monkeypatch):
+    monkeypatch.setattr(debug_artifacts, 'generate_debug', fake_generate)
+    worker = DebugWorker(max_pages=5)
+    worker._executor = ThreadPoolExecutor(1)
+    futures = [worker.submit(tmp_path / f"{i}.pdf", None, tmp_path / f"debug_{i}", {}, [i]) for i in range(20)]
+    wait(futures)
+    worker._executor.shutdown(wait=True)
+    # 服务从不调用 wait()：完成的任务在回调中移出，只留下计数
+    assert not worker._futures
+    assert worker.succeeded == 20
+    assert worker.generated == 20
+
+
+def test_wait_skips_failed_tasks(tmp_path, monkeypatch):
+    def broken(*args):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(debug_artifacts, 'generate_debug', broken)
+    worker = DebugWorker()
+    worker._executor = ThreadPoolExecutor(1)
+    worker.submit(tmp_path / "a.pdf", None, tmp_path / "debug", {}, [1])
+    assert worker.wait() == 0
+    assert worker.failed == 1
+    worker.close()
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""DOCX 拼接：关系、样式、编号在合并后保持有效"""
+
+import io
+import zipfile
+from copy import deepcopy
+
+import pytest
+
+pytest.importorskip('docx')
+
+from docx import Document  # noqa: E402
+from docx.opc.constants import RELATIONSHIP_TYPE as RT  # noqa: E402
+from docx.oxml.ns import qn  # noqa: E402
+from docx.shared import Pt  # noqa: E402
+from lxml import etree  # noqa: E402
+
+from docx_stitch import stitch_docx  # noqa: E402
+
+W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+
+def _png() -> bytes:
+    fitz = pytest.importorskip('fitz')
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 4, 4), False)
+    pix.clear_with(200)
+    return pix.tobytes('png')
+
+
+def _numbering(doc):
+    return doc.part.part_related_by(RT.NUMBERING).element
+
+
+def _add_list(doc, fmt: str) -> str:
+    """新增一个编号定义并用于一个段落，返回 numId"""
+    numbering = _numbering(doc)
+    abstract = deepcopy(numbering.find(qn('w:abstractNum')))
+    abstract.set(qn('w:abstractNumId'), '40')
+    abstract.find(f"{qn('w:lvl')}/{qn('w:numFmt')}").set(qn('w:val'), fmt)
+    numbering.findall(qn('w:abstractNum'))[-1].addnext(abstract)
+    num = etree.SubElement(numbering, qn('w:num'), {qn('w:numId'): '30'})
+    etree.SubElement(num, qn('w:abstractNumId'), {qn('w:val'): '40'})
+
+    p = doc.add_paragraph(f"list item {fmt}")
+    num_pr = p._p.get_or_add_pPr().get_or_add_numPr()
+    num_pr.get_or_add_ilvl().val = 0
+    num_pr.get_or_add_numId().val = 30
+    return '30'
+
+
+def _make(path, text, image=None, link=None, normal_size=None, list_fmt=None):
+    doc = Document()
+    if normal_size:
+        doc.styles['Normal'].font.size = Pt(normal_size)
+    doc.add_paragraph(text)
+    doc.add_paragraph(text, style='Heading 1')
+    if image:
+        doc.add_picture(io.BytesIO(image))
+    if link:
+        p = doc.add_paragraph()
+        rid = doc.part.relate_to(link, RT.HYPERLINK, is_external=True)
+        h = etree.SubElement(p._p, qn('w:hyperlink'), {qn('r:id'): rid})
+        r = etree.SubElement(h, qn('w:r'))
+        etree.SubElement(r, qn('w:t')).text = link
+    if list_fmt:
+        _add_list(doc, list_fmt)
+    doc.save(str(path))
+    return path
+
+
+def _check_package(path):
+    """关系引用完整、docPr id 唯一、样式引用存在、numId 有定义"""
+    doc = Document(str(path))
+    body = doc.element.body
+    rels = doc.part.rels
+    for attr in (qn('r:embed'), qn('r:id')):
+        for node in body.iter():
+            if node.get(attr):
+                assert node.get(attr) in rels, node.get(attr)
+
+    ids = body.xpath('.//wp:docPr/@id')
+    assert len(ids) == len(set(ids))
+
+    styles = doc.styles.element
+    style_ids = {s.get(qn('w:styleId')) for s in styles.findall(qn('w:style'))}
+    for tag in ('w:pStyle', 'w:rStyle', 'w:tblStyle'):
+        for node in body.iter(qn(tag)):
+            assert node.get(qn('w:val')) in style_ids
+    defaults = [s for s in styles.findall(qn('w:style'))
+                if s.get(qn('w:type')) == 'paragraph' and s.get(qn('w:default')) == '1']
+    assert len(defaults) == 1
+
+    numbering = _numbering(doc)
+    nums = {n.get(qn('w:numId')): n for n in numbering.findall(qn('w:num'))}
+    abstracts = {a.get(qn('w:abstractNumId')) for a in numbering.findall(qn('w:abstractNum'))}
+    for node in body.iter(qn('w:numId')):
+        num = nums[node.get(qn('w:val'))]
+        assert num.find(qn('w:abstractNumId')).get(qn('w:val')) in abstracts
+    # abstractNum 必须全部位于 num 之前
+    tags = [etree.QName(c).localname for c in numbering if etree.QName(c).localname in ('abstractNum', 'num')]
+    assert tags == sorted(tags, key=lambda t: t != 'abstractNum')
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+    return doc
+
+
+def _list_format(doc, paragraph):
+    numbering = _numbering(doc)
+    num_id = paragraph._p.pPr.numPr.numId.val
+    num = next(n for n in numbering.findall(qn('w:num')) if n.get(qn('w:numId')) == str(num_id))
+    abstract_id = num.find(qn('w:abstractNumId')).get(qn('w:val'))
+    abstract = next(a for a in numbering.findall(qn('w:abstractNum')) if a.get(qn('w:abstractNumId')) == abstract_id)
+    return abstract.find(f"{qn('w:lvl')}/{qn('w:numFmt')}").get(qn('w:val'))
+
+
+def test_same_template_chunks_keep_single_style_table(tmp_path):
+    png = _png()
+    a = _make(tmp_path / "a.docx", "first", image=png, link="https://example.com/a")
+    b = _make(tmp_path / "b.docx", "second", image=png, link="https://example.com/b")
+    out = tmp_path / "out.docx"
+    assert stitch_docx([a, b], out)
+
+    doc = _check_package(out)
+    assert len(doc.styles.element.findall(qn('w:style'))) == len(Document(str(a)).styles.element.findall(qn('w:style')))
+    assert [p.text for p in doc.paragraphs if p.text][:4] == ['first', 'first', 'https://example.com/a', 'second']
+    # 相同图片只保存一份
+    with zipfile.ZipFile(out) as zf:
+        assert len([n for n in zf.namelist() if n.startswith('word/media/')]) == 1
+    assert len(doc.sections) == 2
+
+
+def test_conflicting_styles_are_renamed(tmp_path):
+    a = _make(tmp_path / "a.docx", "pdf2docx page", normal_size=10)
+    b = _make(tmp_path / "b.docx", "ocr page", normal_size=16)
+    out = tmp_path / "out.docx"
+    stitch_docx([a, b], out)
+
+    doc = _check_package(out)
+    ocr = next(p for p in doc.paragraphs if p.text == 'ocr page')
+    first = next(p for p in doc.paragraphs if p.text == 'pdf2docx page')
+    assert first.style.style_id == 'Normal' and first.style.font.size == Pt(10)
+    assert ocr.style.style_id == 'Normal2' and ocr.style.font.size == Pt(16)
+    # Heading1 基于 Normal，重命名后的 Heading1 指向 Normal2
+    heading = [p for p in doc.paragraphs if p.style.name.lower().startswith('heading 1')]
+    assert heading[1].style.style_id == 'Heading12'
+    assert heading[1].style.base_style.style_id == 'Normal2'
+
+
+def test_numbering_is_merged_and_remapped(tmp_path):
+    a = _make(tmp_path / "a.docx", "a", list_fmt='decimal')
+    b = _make(tmp_path / "b.docx", "b", list_fmt='upperRoman')
+    c = _make(tmp_path / "c.docx", "c", list_fmt='decimal')
+    out = tmp_path / "out.docx"
+    stitch_docx([a, b, c], out)
+
+    doc = _check_package(out)
+    items = [p for p in doc.paragraphs if p.text.startswith('list item')]
+    assert [_list_format(doc, p) for p in items] == ['decimal', 'upperRoman', 'decimal']
+    # 内容相同的编号定义复用
+    assert items[0]._p.pPr.numPr.numId.val == items[2]._p.pPr.numPr.numId.val
+    assert items[0]._p.pPr.numPr.numId.val != items[1]._p.pPr.numPr.numId.val
+
+
+def test_hybrid_records_missing_ocr_pages(tmp_path):
+    pytest.importorskip('pdf2docx')
+    import fitz
+    from convert import PDFConverter
+
+    png = _png()
+    pdf_path = tmp_path / "mixed.pdf"
+    pdf = fitz.open()
+    pdf.new_page().insert_text((72, 72), "text layer page with enough characters")
+    for _ in range(2):
+        page = pdf.new_page()
+        page.insert_image(page.rect, stream=png)
+    pdf.save(str(pdf_path))
+    pdf.close()
+
+    ocr_docx = _make(tmp_path / "ocr.docx", "recognised scan", normal_size=16)
+
+    class FakeOCR:
+        def available(self):
+            return True
+
+        def convert(self, pdf, save_dir):
+            return [ocr_docx, None]
+
+    config = PDFConverter._default_config()
+    config['hybrid'] = dict(config['hybrid'], enable=True)
+    converter = PDFConverter(config=config)
+    converter.ocr_backend = FakeOCR()
+
+    result = converter.convert_single(pdf_path, tmp_path / "out")
+    assert result['success']
+    assert result['missing_pages'] == [2]
+    doc = _check_package(result['output_path'])
+    texts = [p.text for p in doc.paragraphs if p.text.strip()]
+    assert 'recognised scan' in texts
+    assert next(p for p in doc.paragraphs if p.text == 'recognised scan').style.font.size == Pt(16)
+
+
+def test_docpr_ids_are_threaded_without_rescanning(tmp_path, monkeypatch):
+    import docx_stitch
+
+    png = _png()
+    chunks = [_make(tmp_path / f"{i}.docx", f"chunk {i}", image=png) for i in range(4)]
+    scans = []
+    original = docx_stitch._max_docpr_id
+    monkeypatch.setattr(docx_stitch, '_max_docpr_id', lambda body: scans.append(1) or original(body))
+    out = tmp_path / "out.docx"
+    stitch_docx(chunks, out)
+
+    # 只在第一次追加时扫描一次正文
+    assert len(scans) == 1
+    doc = _check_package(out)
+    assert len(doc.element.body.xpath('.//wp:docPr/@id')) == 4
+
+
+def test_windowed_conversion_stitches_windows_from_disk(tmp_path):
+    pytest.importorskip('pdf2docx')
+    import fitz
+    from pdf2docx import Converter
+    from pipeline import convert_windowed
+
+    pdf_path = tmp_path / "long.pdf"
+    pdf = fitz.open()
+    for i in range(5):
+        pdf.new_page().insert_text((72, 72), f"window page {i + 1}")
+    pdf.save(str(pdf_path))
+    pdf.close()
+
+    out = tmp_path / "out" / "long.docx"
+    out.parent.mkdir()
+    cv = Converter(str(pdf_path))
+    try:
+        stats = convert_windowed(cv, out, {}, window_pages=2)
+    finally:
+        cv.close()
+
+    assert stats['windows'] == [(0, 2), (2, 4), (4, 5)]
+    doc = _check_package(out)
+    assert [p.text for p in doc.paragraphs if p.text.strip()] == [f"window page {i + 1}" for i in range(5)]
+    # 窗口临时文件已删除
+    assert [p.name for p in out.parent.iterdir()] == ['long.docx']
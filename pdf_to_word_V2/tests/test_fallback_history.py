@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""fallback 历史记录与预测"""
+
+import json
+
+import pytest
+
+pytest.importorskip('fitz')
+
+from fallback_history import FallbackHistory  # noqa: E402
+
+
+def features(template='t1', producer='WPS'):
+    return {'producer': producer, 'creator': '', 'page_size': '595x842', 'density': 'mid',
+            'template': template}
+
+
+def test_predict_needs_min_samples(tmp_path):
+    history = FallbackHistory(str(tmp_path / "h.jsonl"), threshold=0.5, min_samples=2)
+    assert not history.predict(features())
+    history.record('a.pdf', features(), fallback=True)
+    assert not history.predict(features())
+    history.record('b.pdf', features(), fallback=True)
+    assert history.predict(features())
+
+
+def test_predict_uses_threshold(tmp_path):
+    history = FallbackHistory(str(tmp_path / "h.jsonl"), threshold=0.5, min_samples=2)
+    history.record('a.pdf', features(), fallback=True)
+    for name in ('b.pdf', 'c.pdf'):
+        history.record(name, features(), fallback=False, fallback_pages=[3])
+    assert not history.predict(features())
+
+
+def test_template_match_takes_priority_over_coarse_key(tmp_path):
+    history = FallbackHistory(str(tmp_path / "h.jsonl"), min_samples=2)
+    for name in ('a.pdf', 'b.pdf'):
+        history.record(name, features('t1'), fallback=True)
+    for name in ('c.pdf', 'd.pdf', 'e.pdf', 'f.pdf'):
+        history.record(name, features('t2'), fallback=False)
+    assert history.predict(features('t1'))
+    assert not history.predict(features('t2'))
+    # 未见过的模板回退到（生成工具、页面尺寸、绘图密度）：6 份中 2 份需要 fallback
+    assert not history.predict(features('t3'))
+
+
+def test_unprobed_predictions_are_not_counted(tmp_path):
+    path = tmp_path / "h.jsonl"
+    history = FallbackHistory(str(path), min_samples=2)
+    for name in ('a.pdf', 'b.pdf'):
+        history.record(name, features(), fallback=True)
+    for name in ('c.pdf', 'd.pdf', 'e.pdf'):
+        history.record(name, features(), fallback=True, predicted=True)
+    assert history._by_template['t1'] == [2, 2]
+    assert FallbackHistory(str(path), min_samples=2)._by_template['t1'] == [2, 2]
+
+
+def test_probed_runs_can_reverse_prediction(tmp_path):
+    path = tmp_path / "h.jsonl"
+    history = FallbackHistory(str(path), min_samples=2)
+    for name in ('a.pdf', 'b.pdf'):
+        history.record(name, features(), fallback=True)
+    assert history.predict(features())
+    # 抽样转换成功，按标准配置转换，整份文档不需要 fallback
+    for name in ('c.pdf', 'd.pdf', 'e.pdf'):
+        history.record(name, features(), fallback=False, probed=True)
+    assert not history.predict(features())
+    assert not FallbackHistory(str(path), min_samples=2).predict(features())
+
+
+def test_records_survive_partial_lines(tmp_path):
+    path = tmp_path / "h.jsonl"
+    history = FallbackHistory(str(path), min_samples=1)
+    history.record('a.pdf', features(), fallback=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"source": "b.pdf", "feat')
+    assert FallbackHistory(str(path), min_samples=1).predict(features())
+
+
+def test_page_fallback_is_not_recorded_as_document_fallback(tmp_path, monkeypatch):
+    pytest.importorskip('pdf2docx')
+    import fitz
+    from convert import PDFConverter
+
+    pdf_path = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "合同正文 contract text")
+    doc.save(str(pdf_path))
+    doc.close()
+
+    config = PDFConverter._default_config()
+    config['error_handling'] = dict(config['error_handling'], history_file=str(tmp_path / "h.jsonl"))
+    converter = PDFConverter(config=config)
+    monkeypatch.setattr(converter.fallback_history, 'predict', lambda f: True)
+
+    result = converter.convert_single(pdf_path, tmp_path / "out")
+    assert result['success'] and not result['use_fallback']
+
+    with open(tmp_path / "h.jsonl", encoding='utf-8') as f:
+        record = json.loads(f.readline())
+    # 抽样通过，按标准配置转换；检验过的结果计入统计
+    assert record['probed'] and not record['predicted'] and not record['fallback']
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""结果日志的续跑判断与哈希复用"""
+
+import json
+
+import results_log as results_log_module
+from results_log import ResultsLog
+
+
+def make_result(pdf, docx, success=True, **extra):
+    result = {'input': str(pdf), 'success': success, 'output_path': str(docx),
+              'message': '', 'duration': 1.0, 'pages': 2}
+    result.update(extra)
+    return result
+
+
+def _no_rehash(path):
+    raise AssertionError("不应重新计算 PDF 哈希")
+
+
+def test_append_reuses_passed_hash(tmp_path, monkeypatch):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b'%PDF-1.4')
+    docx = tmp_path / "a.docx"
+    docx.write_bytes(b'docx')
+    monkeypatch.setattr(results_log_module, 'file_sha256', _no_rehash)
+    log = ResultsLog(tmp_path / "results.jsonl", 'settings')
+    log.append(make_result(pdf, docx, pdf_hash='h1'))
+    record = json.loads((tmp_path / "results.jsonl").read_text(encoding='utf-8'))
+    assert record['pdf_hash'] == 'h1'
+    assert log.is_done(log.completed()[str(pdf.resolve())], pdf, 'h1')
+
+
+def test_is_done_hash_is_memoised_for_append(tmp_path, monkeypatch):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b'%PDF-1.4')
+    docx = tmp_path / "a.docx"
+    docx.write_bytes(b'docx')
+    calls = []
+    monkeypatch.setattr(results_log_module, 'file_sha256', lambda path: calls.append(path) or 'h1')
+    log = ResultsLog(tmp_path / "results.jsonl", 'settings')
+    assert not log.is_done({'settings_hash': 'settings', 'output': str(docx), 'pdf_hash': 'old'}, pdf)
+    log.append(make_result(pdf, docx))
+    assert len(calls) == 1
+
+
+def test_is_done_rejects_changed_settings_and_incomplete_ocr(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    pdf.write_bytes(b'%PDF-1.4')
+    docx = tmp_path / "a.docx"
+    docx.write_bytes(b'docx')
+    log = ResultsLog(tmp_path / "results.jsonl", 'settings')
+    log.append(make_result(pdf, docx, missing_pages=[3]), pdf_hash='h1')
+    log.append(make_result(tmp_path / "b.pdf", docx), pdf_hash='h2')
+    log.append(make_result(tmp_path / "c.pdf", docx, ocr_failed_pages=[1]), pdf_hash='h3')
+    done = log.completed()
+    assert not log.is_done(done[str(pdf.resolve())], pdf, 'h1')
+    assert not log.is_done(done[str((tmp_path / "c.pdf").resolve())], tmp_path / "c.pdf", 'h3')
+    assert log.is_done(done[str((tmp_path / "b.pdf").resolve())], tmp_path / "b.pdf", 'h2')
+    other = ResultsLog(tmp_path / "results.jsonl", 'changed')
+    assert not other.is_done(done[str((tmp_path / "b.pdf").resolve())], tmp_path / "b.pdf", 'h2')
+
+
+def test_failure_overrides_earlier_success(tmp_path):
+    pdf = tmp_path / "a.pdf"
+    docx = tmp_path / "a.docx"
+    log = ResultsLog(tmp_path / "results.jsonl", 'settings')
+    log.append(make_result(pdf, docx), pdf_hash='h1')
+    log.append(make_result(pdf, docx, success=False), pdf_hash='h1')
+    assert log.completed() == {}
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""转换服务：积压准入（429）与取消"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import SimpleNamespace
+
+import service as service_module
+from service import ConversionService
+
+
+def make_service(tmp_path, **kwargs):
+    converter = SimpleNamespace(config={'debug': {'enable': False}}, metrics=None,
+                                _submit_debug=lambda result: None)
+    return ConversionService(converter, spool_dir=str(tmp_path / "spool"), **kwargs)
+
+
+def spool_pdf(tmp_path, job_id):
+    pdf_path = tmp_path / "spool" / job_id / "input" / "a.pdf"
+    pdf_path.parent.mkdir(parents=True)
+    pdf_path.write_bytes(b'%PDF-1.4')
+    return pdf_path
+
+
+def test_admit_by_queued_pages(tmp_path):
+    service = make_service(tmp_path, max_queued_pages=10)
+    # 空闲时超大文档也能提交
+    assert service.admit(50)
+    service.pending_pages = 8
+    assert service.admit(2)
+    assert not service.admit(3)
+
+
+def test_upload_rejected_with_429_when_backlog_full(tmp_path):
+    service = make_service(tmp_path, max_queued_pages=10)
+    service.pending_pages = 10
+
+    async def run():
+        server = await asyncio.start_server(service.handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'POST /convert?filename=a.pdf HTTP/1.1\r\nContent-Length: 8\r\n\r\n%PDF-1.4')
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+        return response.decode('utf-8')
+
+    response = asyncio.run(run())
+    assert response.startswith('HTTP/1.1 429')
+    assert 'Retry-After: ' in response
+    assert not (tmp_path / "spool").exists()
+
+
+def test_cancel_queued_job_releases_pages(tmp_path):
+    service = make_service(tmp_path)
+
+    async def run():
+        service._queue = asyncio.Queue()
+        job = service.submit('a.pdf', spool_pdf(tmp_path, 'job1'), 5, 'job1')
+        assert service.cancel(job)
+        return job
+
+    job = asyncio.run(run())
+    assert job.status == 'cancelled' and job.finished is not None
+    assert service.pending_pages == 0
+    assert not job.workdir.exists()
+
+
+def test_cancel_running_job_keeps_workdir_until_finished(tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def convert(pdf_path, output_dir, enable_debug):
+        release.wait(5)
+        return {'input': str(pdf_path), 'success': True, 'message': '', 'output_path': None,
+                'use_fallback': False, 'duration': 0.1}
+
+    monkeypatch.setattr(service_module, '_convert_in_worker', convert)
+    service = make_service(tmp_path, result_ttl=0)
+
+    async def run():
+        service._queue = asyncio.Queue()
+        service._executor = ThreadPoolExecutor(1)
+        dispatch = asyncio.create_task(service._dispatch())
+        job = service.submit('a.pdf', spool_pdf(tmp_path, 'job1'), 5, 'job1')
+        while job.status != 'running':
+            await asyncio.sleep(0.01)
+
+        assert service.cancel(job)
+        assert job.status == 'cancelled' and job.finished is None
+        # 工作进程仍在转换：清理与再次 DELETE 都不能删除工作目录
+        service._expire(job.created + 3600)
+        service.cancel(job)
+        assert job.workdir.exists() and job.id in service.jobs
+
+        release.set()
+        while job.finished is None:
+            await asyncio.sleep(0.01)
+        dispatch.cancel()
+        await asyncio.gather(dispatch, return_exceptions=True)
+        service._executor.shutdown()
+        return job
+
+    job = asyncio.run(run())
+    assert not job.workdir.exists()
+    assert service.pending_pages == 0
+    service._expire(job.finished + 1)
+    assert job.id not in service.jobs
+
+
+def test_remove_waits_for_running_debug_task(tmp_path):
+    service = make_service(tmp_path)
+    job = service_module.Job('job1', 'a.pdf', spool_pdf(tmp_path, 'job1'), 1)
+    job.finished = job.created
+    job.debug_future = Future()
+    job.debug_future.set_running_or_notify_cancel()
+    service.jobs[job.id] = job
+
+    # 调试进程仍在写入 output/<stem>/debug：到期也不能立即删除工作目录
+    service._expire(job.finished + 3600 * 2)
+    assert job.id not in service.jobs
+    assert job.workdir.exists()
+    job.debug_future.set_result({'generated': []})
+    assert not job.workdir.exists()
+
+
+def test_remove_cancels_queued_debug_task(tmp_path):
+    service = make_service(tmp_path)
+    job = service_module.Job('job1', 'a.pdf', spool_pdf(tmp_path, 'job1'), 1)
+    job.status = 'done'
+    job.debug_future = Future()
+    service.jobs[job.id] = job
+
+    service.cancel(job)
+    assert job.debug_future.cancelled()
+    assert not job.workdir.exists()
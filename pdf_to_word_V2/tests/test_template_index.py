@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""合同模板索引：扫描件不参与匹配"""
+
+import pytest
+
+pytest.importorskip('fitz')
+pytest.importorskip('numpy')
+
+import fitz  # noqa: E402
+
+from template_index import NUM_PERM, TemplateIndex, document_signature  # noqa: E402
+
+CONTRACT = "采购合同 甲方 乙方 双方经友好协商 就货物买卖事宜达成如下协议 purchase agreement terms"
+
+
+def make_text_pdf(path, text=CONTRACT):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def make_scanned_pdf(path, shade=200):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 4, 4), False)
+    pix.clear_with(shade)
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_image(page.rect, stream=pix.tobytes('png'))
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def test_text_template_matches_same_document(tmp_path):
+    index = TemplateIndex(str(tmp_path / "index.json"))
+    assert index.add('采购合同', make_text_pdf(tmp_path / "sample.pdf"), {'parse_lattice_table': False})
+    name, score, settings = index.match(make_text_pdf(tmp_path / "other.pdf"))
+    assert name == '采购合同' and score > 0.9
+    assert settings == {'parse_lattice_table': False}
+
+
+def test_scanned_documents_are_not_registered_or_matched(tmp_path):
+    index = TemplateIndex(str(tmp_path / "index.json"))
+    assert document_signature(make_scanned_pdf(tmp_path / "scan_a.pdf"))['minhash'] is None
+    assert not index.add('扫描模板', tmp_path / "scan_a.pdf", {})
+    assert not index.templates
+
+    index.add('采购合同', make_text_pdf(tmp_path / "sample.pdf"), {})
+    assert index.match(make_scanned_pdf(tmp_path / "scan_b.pdf", shade=50)) is None
+
+
+def test_legacy_empty_signatures_are_ignored(tmp_path):
+    index = TemplateIndex(str(tmp_path / "index.json"))
+    index.templates['旧扫描模板'] = {
+        'signature': {'minhash': [0] * NUM_PERM, 'geometry': '595x842', 'fonts': []},
+        'settings': {},
+    }
+    index.save()
+
+    # 旧版本为没有文本的样本记录了全 0 签名：重新加载后不参与匹配
+    index = TemplateIndex(str(tmp_path / "index.json"))
+    legacy = {'minhash': [0] * NUM_PERM, 'geometry': '595x842', 'fonts': []}
+    assert index.match_signature(legacy) is None
+    assert index.match(make_scanned_pdf(tmp_path / "scan.pdf")) is None